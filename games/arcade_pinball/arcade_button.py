@@ -1,7 +1,7 @@
 import asyncio
 import logging
 import pigpio
-from surrortg.inputs import Switch
+from surrortg.inputs import Switch, Timeline
 from surrortg.inputs.input_filters import SpamFilter
 from games.arcade_pinball.config import (
     BUTTON_PRESS_TIME,
@@ -12,6 +12,8 @@ from games.arcade_pinball.config import (
 
 
 class ArcadeMultiButton(Switch):
+    single_seat = True
+
     def __init__(
         self,
         pi,
@@ -32,7 +34,7 @@ class ArcadeMultiButton(Switch):
             self.pi.set_mode(pin, pigpio.OUTPUT)
 
     async def on(self, seat=0):
-        if not self.spam_filter.too_much_spam():
+        if not self.spam_filter.too_much_spam(seat):
             logging.debug(f"{self.name} on")
             for pin in self.pins:
                 self.pi.write(pin, 0)
@@ -53,9 +55,12 @@ class ArcadeMultiButton(Switch):
             await self.off()
 
     async def single_press(self):
-        await self.on()
-        await asyncio.sleep(self.button_press_time)
-        await self.off()
+        await Timeline(
+            [
+                (0, self, {"state": "down"}),
+                (self.button_press_time, self, {"state": "up"}),
+            ]
+        ).run()
 
     def _reset_timer(self, start_new):
         if self.task is not None and not self.task.cancelled():
@@ -14,6 +14,8 @@ from games.arcade_pinball.config import (
 
 
 class Plunger(Switch):
+    single_seat = True
+
     def __init__(
         self,
         io,
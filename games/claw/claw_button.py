@@ -6,6 +6,8 @@ from games.claw.config import BTN_PIN, BTN_TIME
 
 
 class ClawButton(Switch):
+    single_seat = True
+
     def __init__(self, pi, pre_press_action=None, post_press_action=None):
         self.pre_press_action = pre_press_action
         self.post_press_action = post_press_action
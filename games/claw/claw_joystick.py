@@ -52,8 +52,11 @@ DIRECTION_CMD_MAP = {
 
 
 class ClawJoystick(Joystick):
+    single_seat = True
+
     def __init__(self, pi):
         self.set_min_amount(MIN_AMOUNT)
+        self.set_direction_mode(8)
         self.pi = pi
         # set out pins
         for dir_pin in DIR_PINS:
@@ -61,8 +64,7 @@ class ClawJoystick(Joystick):
         # get into stopped state
         self.move(Directions.MIDDLE)
 
-    async def handle_coordinates(self, x, y, seat=0):
-        direction = self.get_direction_8(x, y)
+    async def handle_direction(self, direction, seat=0):
         self.move(direction)
 
     def move(self, direction):
@@ -74,4 +76,6 @@ class ClawJoystick(Joystick):
             self.pi.write(on_pin, 1)
 
     async def reset(self, seat=0):
+        # the game calls this directly, so forget the last direction here
+        self._reset(seat)
         self.move(Directions.MIDDLE)
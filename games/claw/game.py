@@ -2,7 +2,7 @@ import logging
 import asyncio
 import pigpio
 from surrortg import Game
-from surrortg.inputs import Directions
+from surrortg.inputs import Timeline
 from games.claw.claw_joystick import ClawJoystick
 from games.claw.claw_button import ClawButton
 from games.claw.claw_toy_sensor import ClawToySensor
@@ -130,14 +130,15 @@ class ClawGame(Game):
         # drop claw button can't be used before moving.
         # 'ur' + 'dl' forces the claw to move regardless of the current
         # position
-        for direction in [
-            Directions.TOP_RIGHT,
-            Directions.MIDDLE,
-            Directions.BOTTOM_LEFT,
-            Directions.MIDDLE,
-        ]:
-            self.joystick.move(direction)
-            await asyncio.sleep(AUTOMATIC_MOVE_TIME)
+        await Timeline(
+            [
+                (0, self.joystick, {"x": 1, "y": 1}),
+                (AUTOMATIC_MOVE_TIME, self.joystick, {"x": 0, "y": 0}),
+                (2 * AUTOMATIC_MOVE_TIME, self.joystick, {"x": -1, "y": -1}),
+                (3 * AUTOMATIC_MOVE_TIME, self.joystick, {"x": 0, "y": 0}),
+            ]
+        ).run()
+        await asyncio.sleep(AUTOMATIC_MOVE_TIME)
 
     async def pre_button_press(self):
         self.io.disable_inputs()
@@ -42,6 +42,9 @@ class PwmActuator(LinearActuator):
         modified with increase_delta and reduce_delta methods.
     """
 
+    # the servo follows the latest value
+    latest_value_only = True
+
     def __init__(self, pi, pin, delta_max=300, calibration=0):
         self.middle = 1500 + calibration
         self.delta_max = delta_max
@@ -52,6 +55,9 @@ class PwmActuator(LinearActuator):
         self.pin = pin
         self.pi.set_mode(self.pin, pigpio.OUTPUT)
         self.pi.set_servo_pulsewidth(self.pin, self.middle)
+        # round the values to steps of at most 1 us of pulsewidth, and skip
+        # driving the unchanged ones
+        self.set_output_limits(resolution=1 / delta_max)
         """  You can also change the pwm frequency
             if your use case requires it. More at:
             http://abyz.me.uk/rpi/pigpio/python.html#set_PWM_frequency """
@@ -109,6 +115,9 @@ class ShiftGear(LinearActuator):
     :type: inc: Int
     """
 
+    # every shift is kept, the latest value 0 would skip a press
+    latest_value_only = False
+
     def __init__(self, actuator, inc=10):
         self.actuator = actuator
         self.increment = inc
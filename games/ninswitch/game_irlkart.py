@@ -4,6 +4,7 @@ import cv2
 from time import time
 from pathlib import Path
 from surrortg import Game
+from surrortg.inputs import Timeline
 from surrortg.image_recognition import AsyncVideoCapture, get_pixel_detector
 from games.ninswitch.ns_gamepad_serial import NSGamepadSerial, NSButton, NSDPad
 from games.ninswitch.ns_switch import NSSwitch
@@ -162,27 +163,28 @@ class NinSwitchIRLKart(Game):
         # init controls
         self.nsg = NSGamepadSerial()
         self.nsg.begin()
+        self.a_button = NSSwitch(self.nsg, NSButton.A)
+        self.b_button = NSSwitch(self.nsg, NSButton.B)
+        # the prepare timeline presses these outside the router
+        self.a_button.skip_reset_at_rest = False
+        self.b_button.skip_reset_at_rest = False
         self.io.register_inputs(
             {
-                "left_joystick": NSJoystick(
-                    self.nsg.leftXAxis, self.nsg.leftYAxis
-                ),
+                "left_joystick": NSJoystick(self.nsg.leftAxes),
                 "dpad_up": NSDPadSwitch(self.nsg, NSDPad.UP),
                 "dpad_left": NSDPadSwitch(self.nsg, NSDPad.LEFT),
                 "dpad_right": NSDPadSwitch(self.nsg, NSDPad.RIGHT),
                 "dpad_down": NSDPadSwitch(self.nsg, NSDPad.DOWN),
                 "X": NSSwitch(self.nsg, NSButton.X),
-                "A": NSSwitch(self.nsg, NSButton.A),
-                "B": NSSwitch(self.nsg, NSButton.B),
+                "A": self.a_button,
+                "B": self.b_button,
                 "left_throttle": NSSwitch(self.nsg, NSButton.LEFT_THROTTLE),
                 "right_throttle": NSSwitch(self.nsg, NSButton.RIGHT_THROTTLE),
             }
         )
         self.io.register_inputs(
             {
-                "right_joystick": NSJoystick(
-                    self.nsg.rightXAxis, self.nsg.rightYAxis
-                ),
+                "right_joystick": NSJoystick(self.nsg.rightAxes),
                 "Y": NSSwitch(self.nsg, NSButton.Y),
                 "left_trigger": NSSwitch(self.nsg, NSButton.LEFT_TRIGGER),
                 "right_trigger": NSSwitch(self.nsg, NSButton.RIGHT_TRIGGER),
@@ -230,13 +232,13 @@ class NinSwitchIRLKart(Game):
 
     async def on_prepare(self):
         logging.info("self.driving...")
-        for _ in range(4):
-            self.nsg.press(NSButton.A)
-            self.nsg.release(NSButton.A)
-            await asyncio.sleep(4)
-        self.nsg.press(NSButton.B)
-        await asyncio.sleep(2.5)
-        self.nsg.release(NSButton.B)
+        steps = []
+        for i in range(4):
+            steps.append((4 * i, self.a_button, {"state": "down"}))
+            steps.append((4 * i, self.a_button, {"state": "up"}))
+        steps.append((16, self.b_button, {"state": "down"}))
+        steps.append((18.5, self.b_button, {"state": "up"}))
+        await Timeline(steps).run()
         self.nsg.releaseAll()
         logging.info("...self.driving finished")
 
@@ -12,12 +12,8 @@ class NinSwitchSimpleGame(Game):
         self.nsg.begin()
         self.io.register_inputs(
             {
-                "left_joystick": NSJoystick(
-                    self.nsg.leftXAxis, self.nsg.leftYAxis
-                ),
-                "right_joystick": NSJoystick(
-                    self.nsg.rightXAxis, self.nsg.rightYAxis
-                ),
+                "left_joystick": NSJoystick(self.nsg.leftAxes),
+                "right_joystick": NSJoystick(self.nsg.rightAxes),
                 "dpad_up": NSDPadSwitch(self.nsg, NSDPad.UP),
                 "dpad_left": NSDPadSwitch(self.nsg, NSDPad.LEFT),
                 "dpad_right": NSDPadSwitch(self.nsg, NSDPad.RIGHT),
@@ -3,12 +3,17 @@ from games.ninswitch.ns_gamepad_serial import NSDPad
 
 
 class NSDPadSwitch(Switch):
+    single_seat = True
+    # the gamepad is driven only through the router, so the serial writes
+    # of resetting an input at rest are skipped
+    skip_reset_at_rest = True
+
     def __init__(self, nsg, dpad_dir):
         self.nsg = nsg
         self.dpad_dir = dpad_dir
 
     async def on(self, seat=0):
-        self.nsg.dPad(self.dpad_dir)
+        self.nsg.set_state(d_pad=self.dpad_dir)
 
     async def off(self, seat=0):
-        self.nsg.dPad(NSDPad.CENTERED)
+        self.nsg.set_state(d_pad=NSDPad.CENTERED)
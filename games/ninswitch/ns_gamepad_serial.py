@@ -20,11 +20,25 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 import array
+import collections
+import logging
 import threading
+import time
 import serial
-from struct import pack
+from contextlib import contextmanager
+from struct import Struct
 from enum import IntEnum
 
+# maximum reports per second sent to the gadget
+MAX_REPORT_RATE = 500
+# maximum reports with different buttons waiting for the writer
+MAX_PENDING_REPORTS = 32
+# seconds to wait for the writer to send the last report in end
+WRITER_STOP_TIMEOUT = 1
+REPORT_STRUCT = Struct("<BBBHBBBBBBB")
+# bytes of the buttons and the directional pad in the report
+REPORT_BUTTONS = slice(3, 6)
+
 
 # Direction pad names
 class NSDPad(IntEnum):
@@ -62,7 +76,16 @@ class NSButton(IntEnum):
 
 
 class NSGamepadSerial:
-    """Nintendo Switch Gamepad Serial Interface"""
+    """Nintendo Switch Gamepad Serial Interface
+
+    The reports are sent by a writer thread, so the callers never block on
+    the serial port.
+
+    :param max_report_rate: maximum reports per second, the changes made
+        faster are combined into the latest report, defaults to
+        MAX_REPORT_RATE
+    :type max_report_rate: float, optional
+    """
 
     # pylint: disable=too-many-instance-attributes
     compass_dir_x = array.array(
@@ -110,8 +133,18 @@ class NSGamepadSerial:
         ],
     )
 
-    def __init__(self):
-        self.thread_lock = threading.Lock()
+    def __init__(self, max_report_rate=MAX_REPORT_RATE):
+        # reentrant, so that the setters can be called inside batch
+        self.thread_lock = threading.RLock()
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self.min_report_interval = 1 / max_report_rate
+        # reports which the writer has not taken yet, each with different
+        # buttons, so that short presses are not combined away
+        self._pending_reports = collections.deque()
+        self._report_ready = threading.Condition()
+        self._writer = None
+        self._stopping = False
         self.ser_port = 0
         self.left_x_axis = 128
         self.left_y_axis = 128
@@ -149,31 +182,136 @@ class NSGamepadSerial:
             self.dpad_x_axis = 128
             self.dpad_y_axis = 128
             self.write()
+        if self._writer is None or not self._writer.is_alive():
+            self._stopping = False
+            self._writer = threading.Thread(
+                target=self._write_reports,
+                name="NSGamepadSerial writer",
+                daemon=True,
+            )
+            self._writer.start()
         return
 
     def end(self):
-        """End NSGamepad"""
+        """End NSGamepad, after sending the latest report"""
+        if self._writer is not None:
+            with self._report_ready:
+                self._stopping = True
+                self._report_ready.notify()
+            self._writer.join(WRITER_STOP_TIMEOUT)
+            self._writer = None
         self.ser_port.close()
         return
 
     def write(self):
-        """Send NSGamepad state"""
-        self.ser_port.write(
-            pack(
-                "<BBBHBBBBBBB",
-                2,
-                9,
-                2,
-                self.my_buttons,
-                self.d_pad,
-                self.left_x_axis,
-                self.left_y_axis,
-                self.right_x_axis,
-                self.right_y_axis,
-                0,
-                3,
-            )
+        """Queue NSGamepad state for the writer thread, or only mark it
+        changed inside batch"""
+        if self._batch_depth > 0:
+            self._batch_dirty = True
+            return
+        report = REPORT_STRUCT.pack(
+            2,
+            9,
+            2,
+            self.my_buttons,
+            self.d_pad,
+            self.left_x_axis,
+            self.left_y_axis,
+            self.right_x_axis,
+            self.right_y_axis,
+            0,
+            3,
         )
+        with self._report_ready:
+            pending = self._pending_reports
+            if len(pending) > 0 and (
+                pending[-1][REPORT_BUTTONS] == report[REPORT_BUTTONS]
+                or len(pending) >= MAX_PENDING_REPORTS
+            ):
+                pending[-1] = report
+            else:
+                pending.append(report)
+            self._report_ready.notify()
+        return
+
+    def _write_reports(self):
+        """Writer thread, which owns the serial port
+
+        Sends reports at most max_report_rate times per second, and
+        immediately if the port has been idle. The reports queued while
+        waiting are combined unless their buttons differ, and a report
+        identical to the previous one is not sent.
+        """
+        pending = self._pending_reports
+        last_report = None
+        last_write = float("-inf")
+        while True:
+            with self._report_ready:
+                while len(pending) == 0 and not self._stopping:
+                    self._report_ready.wait()
+                if len(pending) == 0:
+                    return
+            wait = last_write + self.min_report_interval - time.monotonic()
+            if wait > 0 and not self._stopping:
+                time.sleep(wait)
+            with self._report_ready:
+                report = pending.popleft()
+            if report == last_report:
+                continue
+            try:
+                self.ser_port.write(report)
+                last_report = report
+            except Exception as e:
+                logging.warning(f"NSGamepadSerial: could not write: {e}")
+            last_write = time.monotonic()
+
+    @contextmanager
+    def batch(self):
+        """Apply the changes made inside the with block in a single report
+
+        The other threads wait until the block ends, so they never see a
+        half-updated state. Batches can be nested, the outermost one sends
+        the report.
+
+        Example::
+
+            with nsg.batch():
+                nsg.leftXAxis(0)
+                nsg.leftYAxis(255)
+        """
+        with self.thread_lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._batch_dirty:
+                    self._batch_dirty = False
+                    self.write()
+
+    def set_state(self, buttons=None, d_pad=None, left=None, right=None):
+        """Set several fields and send a single report, the fields which
+        are None are not changed
+
+        :param buttons: all buttons 0..13 as bits, defaults to None
+        :type buttons: int, optional
+        :param d_pad: directional pad (0..7, 15), defaults to None
+        :type d_pad: int, optional
+        :param left: left stick (x, y) axes 0..128..255, defaults to None
+        :type left: tuple, optional
+        :param right: right stick (x, y) axes 0..128..255, defaults to None
+        :type right: tuple, optional
+        """
+        with self.thread_lock:
+            if buttons is not None:
+                self.my_buttons = buttons
+            if d_pad is not None:
+                self._set_dpad(d_pad)
+            if left is not None:
+                self.left_x_axis, self.left_y_axis = left
+            if right is not None:
+                self.right_x_axis, self.right_y_axis = right
+            self.write()
         return
 
     def press(self, button_number):
@@ -232,6 +370,14 @@ class NSGamepadSerial:
             self.write()
         return
 
+    def leftAxes(self, x, y):
+        """Move both left stick axes 0..128..255 in a single report"""
+        self.set_state(left=(x, y))
+
+    def rightAxes(self, x, y):
+        """Move both right stick axes 0..128..255 in a single report"""
+        self.set_state(right=(x, y))
+
     def map_dpad_xy(self, x, y):
         """Return direction pad number given axes x,y"""
         if x == 128:
@@ -275,15 +421,18 @@ class NSGamepadSerial:
 
     def dPad(self, position):
         """Move directional pad (0..7, 15)"""
-        if position < 0 or position > 7:
-            position = 15
         with self.thread_lock:
-            self.d_pad = position
-            self.dpad_x_axis = self.compass_dir_x[position]
-            self.dpad_y_axis = self.compass_dir_y[position]
+            self._set_dpad(position)
             self.write()
         return
 
+    def _set_dpad(self, position):
+        if position < 0 or position > 7:
+            position = 15
+        self.d_pad = position
+        self.dpad_x_axis = self.compass_dir_x[position]
+        self.dpad_y_axis = self.compass_dir_y[position]
+
 
 def main():
     """ test NSGamepadSerial class """
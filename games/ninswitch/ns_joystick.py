@@ -14,16 +14,44 @@ DIRECTION_TO_JOYSTICK_VALS = {
 
 
 class NSJoystick(Joystick):
-    def __init__(self, x_axis, y_axis):
-        self.x_axis = x_axis
-        self.y_axis = y_axis
+    """Joystick of NSGamepadSerial
 
-    async def handle_coordinates(self, x, y, seat=0):
-        direction = self.get_direction_8(x, y)
-        x, y = DIRECTION_TO_JOYSTICK_VALS[direction]
+    Give either axes, or x_axis and y_axis which send a report each.
+
+    :param axes: function setting both axes of the stick in a single
+        report, for example NSGamepadSerial.leftAxes, defaults to None
+    :type axes: function, optional
+    :param x_axis: function setting the x axis, for example
+        NSGamepadSerial.leftXAxis, defaults to None
+    :type x_axis: function, optional
+    :param y_axis: function setting the y axis, for example
+        NSGamepadSerial.leftYAxis, defaults to None
+    :type y_axis: function, optional
+    """
+
+    single_seat = True
+    # the gamepad is driven only through the router, so the serial writes
+    # of resetting an input at rest are skipped
+    skip_reset_at_rest = True
+
+    def __init__(self, axes=None, x_axis=None, y_axis=None):
+        if axes is None:
+            assert (
+                x_axis is not None and y_axis is not None
+            ), "axes, or both x_axis and y_axis must be given"
+            self.x_axis = x_axis
+            self.y_axis = y_axis
+            axes = self._set_axes
+        self.axes = axes
+        self.set_direction_mode(8)
+
+    def _set_axes(self, x, y):
         self.x_axis(x)
         self.y_axis(y)
 
+    async def handle_direction(self, direction, seat=0):
+        self.axes(*DIRECTION_TO_JOYSTICK_VALS[direction])
+
     async def reset(self, seat=0):
-        self.x_axis(128)
-        self.y_axis(128)
+        self._reset(seat)
+        self.axes(128, 128)
@@ -2,6 +2,11 @@ from surrortg.inputs import Switch
 
 
 class NSSwitch(Switch):
+    single_seat = True
+    # the gamepad is driven only through the router, so the serial writes
+    # of resetting an input at rest are skipped
+    skip_reset_at_rest = True
+
     def __init__(self, nsg, button):
         self.nsg = nsg
         self.button = button
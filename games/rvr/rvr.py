@@ -23,6 +23,9 @@ SPEED_FAST = 210
 SPEED_SLOW = 50
 # stopped speed
 SPEED_STOP = 0
+# the rvr stops the raw motors if it gets no command in 2 seconds,
+# so the last drive command is resent every this many seconds
+DRIVE_KEEPALIVE = 1
 
 # valid motor modes
 MODE_FORWARD = RawMotorModesEnum.forward.value
@@ -47,6 +50,11 @@ DRIVE_OPTIONS = {
 
 
 class RVR(Joystick):
+    single_seat = True
+
+    def __init__(self):
+        self.set_direction_mode(8, keepalive=DRIVE_KEEPALIVE)
+
     async def init_sphero(self):
         # init the rvr
         # TODO fix asyncio problems and use the asyncio version
@@ -66,17 +74,18 @@ class RVR(Joystick):
         await self.rvr.reset_yaw()
         logging.info("RVR: init done")
 
-    async def handle_coordinates(self, x, y, seat=0):
-        # get direction from the coordinates
-        direction = self.get_direction_8(x, y)
+    async def handle_direction(self, direction, seat=0):
         # drive motors based on the direction
         await self.drive(*DRIVE_OPTIONS[direction])
 
     async def reset(self, seat=0):
+        # stops the keepalive from driving again
+        self._reset(seat)
         await self.drive(SPEED_STOP, SPEED_STOP, MODE_FORWARD, MODE_FORWARD)
 
     async def shutdown(self, seat=0):
         # stop the rvr motors
+        self._reset(seat)
         await self.drive(SPEED_STOP, SPEED_STOP, MODE_OFF, MODE_OFF)
         # close the rvr connection
         await self.rvr.close()
@@ -1,4 +1,5 @@
 from .udp_input import UdpInput
+from .udp_keepalive import UdpKeepalive
 from .udp_actuator import UdpActuator
 from .udp_bot import UdpBot
 from .udp_car import UdpCar
@@ -1,7 +1,6 @@
 import logging
 import struct
-import asyncio
-from . import UdpInput
+from . import UdpInput, UdpKeepalive
 from ...inputs import LinearActuator
 
 
@@ -13,10 +12,14 @@ class UdpActuator(LinearActuator, UdpInput):
     :param multiplier: multiplier of the value, defaults to 1.0
     :type multiplier: float, optional
     :param repeat_commands: defines if commands should be repeated,
-    defaults to False
+    defaults to False. The repeats are sent by the UdpKeepalive of the
+    UdpBot, or of the actuator if it is not added to a bot.
     :type repeat_commands: bool, optional
     """
 
+    # the bot follows the latest value
+    latest_value_only = True
+
     def __init__(self, cmd, multiplier=1.0, repeat_commands=False):
         super().__init__()
         self.cmd = cmd
@@ -24,8 +27,22 @@ class UdpActuator(LinearActuator, UdpInput):
         self.middle = 100
         self.range = 100
         self.should_repeat = repeat_commands
-        self.current_val = self.middle
-        self.repeat_task = None
+        self.keepalive = None
+
+    def set_keepalive(self, keepalive):
+        """Set the keepalive which repeats the commands, UdpBot sets its
+        own to all of its inputs
+
+        :param keepalive: keepalive scheduler
+        :type keepalive: UdpKeepalive
+        """
+        self.keepalive = keepalive
+
+    def _reset(self, seat):
+        super()._reset(seat)
+        # the value driven before the reset is no longer repeated
+        if self.keepalive is not None:
+            self.keepalive.forget(seat, self)
 
     async def drive_actuator(self, val, seat, unscaled=False):
         """Drive actuator by sending value as a udp command
@@ -39,14 +56,12 @@ class UdpActuator(LinearActuator, UdpInput):
         """
         if not unscaled:
             val = val * self.multiplier
-        self._send_command(val, seat)
         if self.should_repeat:
-            self.current_val = val
-            if self.repeat_task is not None:
-                self.repeat_task.cancel()
-            self.repeat_task = asyncio.create_task(
-                self._repeat_command(10, 0.2, seat)
-            )
+            if self.keepalive is None:
+                self.keepalive = UdpKeepalive()
+            self.keepalive.update(self, val, seat)
+        else:
+            self._send_command(val, seat)
 
     def _send_command(self, val, seat):
         """Sends a udp command to the endpoint of the seat
@@ -87,17 +102,3 @@ class UdpActuator(LinearActuator, UdpInput):
                 f"Did not send value {val} to seat {seat} "
                 f"command {self.cmd}, was closed"
             )
-
-    async def _repeat_command(self, num_sends, interval, seat):
-        """Calls _send_command on repeat a specific number of times
-
-        :param num_sends: number of times _send_command is called
-        :type num_sends: int
-        :param interval: number of seconds between command sends
-        :type interval: float
-        :param seat: Robot seat
-        :type seat: int
-        """
-        for _ in range(num_sends):
-            await asyncio.sleep(interval)
-            self._send_command(self.current_val, seat)
@@ -1,5 +1,7 @@
 import asyncio
 import logging
+from .udp_actuator import UdpActuator
+from .udp_keepalive import UdpKeepalive
 from .udp_protocol import open_remote_endpoint
 
 BOT_UDP_PORT = 31337
@@ -8,9 +10,13 @@ set_file_name = "/var/lib/srtg/current_set"
 
 class UdpBot:
     """Base class for all bots that are controlled with udp commands
+
+    The repeated commands of all the inputs are sent by a single
+    UdpKeepalive, available as keepalive.
     """
 
     def __init__(self):
+        self.keepalive = UdpKeepalive()
         self.inputs = {}
         self.bots = {}
         self.endpoints = {}
@@ -116,11 +122,16 @@ class UdpBot:
         :type new_input: dict
         """
         self.inputs.update(new_input)
+        for input_impl in new_input.values():
+            if isinstance(input_impl, UdpActuator):
+                input_impl.set_keepalive(self.keepalive)
 
     async def shutdown(self):
         """Resets all registered inputs for all bots,
         and then closes all endpoints
         """
+        # the shutdown values of the inputs are sent only once
+        self.keepalive.stop()
 
         for seat, endpoint in self.endpoints.items():
             for input_impl in self.inputs.values():
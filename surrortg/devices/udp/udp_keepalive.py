@@ -0,0 +1,87 @@
+import asyncio
+
+KEEPALIVE_INTERVAL = 0.2
+KEEPALIVE_REPEATS = 10
+
+
+class UdpKeepalive:
+    """Repeats the latest values of udp actuators at a fixed rate
+
+    A single task sends the latest value of every actuator of every seat
+    on each tick, until the value has been repeated the given number of
+    times. The task runs only while there are values to repeat, so the
+    commands do not create tasks, and a bot sends at most one datagram
+    per actuator and seat per interval in addition to the changes.
+
+    :param interval: seconds between the repeats, defaults to
+        KEEPALIVE_INTERVAL
+    :type interval: float, optional
+    :param repeats: how many times a value is repeated after it was
+        sent, defaults to KEEPALIVE_REPEATS
+    :type repeats: int, optional
+    """
+
+    def __init__(self, interval=KEEPALIVE_INTERVAL, repeats=KEEPALIVE_REPEATS):
+        self.interval = interval
+        self.repeats = repeats
+        # (actuator, seat) -> [value, repeats left]
+        self.values = {}
+        self.repeated = 0
+        self._stopped = False
+        self._task = None
+
+    def update(self, actuator, val, seat):
+        """Send the value immediately and repeat it on the next ticks
+
+        :param actuator: udp actuator
+        :type actuator: UdpActuator
+        :param val: actuator position value, between -1.0 and 1.0
+        :type val: float
+        :param seat: Robot seat
+        :type seat: int
+        """
+        actuator._send_command(val, seat)
+        if self.repeats <= 0 or self._stopped:
+            return
+        self.values[(actuator, seat)] = [val, self.repeats]
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def forget(self, seat=None, actuator=None):
+        """Stop repeating the values of the seat
+
+        :param seat: Robot seat, defaults to None (all seats)
+        :type seat: int/None, optional
+        :param actuator: forget only the values of this actuator, defaults
+            to None (all actuators)
+        :type actuator: UdpActuator/None, optional
+        """
+        for key in list(self.values):
+            if (seat is None or key[1] == seat) and (
+                actuator is None or key[0] is actuator
+            ):
+                del self.values[key]
+
+    def stop(self):
+        """Stop repeating all the values, the values updated after this
+        are sent only once"""
+        self._stopped = True
+        self.values.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while len(self.values) > 0:
+            # absolute deadlines, so the ticks do not drift
+            deadline += self.interval
+            await asyncio.sleep(max(deadline - loop.time(), 0))
+            for key, entry in list(self.values.items()):
+                actuator, seat = key
+                actuator._send_command(entry[0], seat)
+                self.repeated += 1
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self.values[key]
@@ -1,11 +1,21 @@
 import logging
 from .network.socket_handler import SocketHandler
-from .network.message_router import MultiSeatMessageRouter
+from .network.message_router import (
+    MultiSeatMessageRouter,
+    SRC_GAME_ENGINE,
+)
+from .network.outbound_buffer import OUTBOUND_BUFFER_DEFAULT_PATH
+from .network.rpc import RpcError, RpcTimeoutError
+from .network.tracing import TRACER, STATS_SOCKET_NAME
+from .inputs.input_filters import FilterChain
 from .config_parser import get_config
 
 SURRORTG_VERSION = "0.2.0"
 LOCAL_SOCKET_NAME = "/tmp/.srtg-sock"
 DATACHANNEL_CONFIG_KEY = "datachannel"
+EVENT_CONFIG = "config"
+PERSIST_OUTBOUND_BUFFER_CONFIG_KEY = "persist_outbound_buffer"
+TRACE_INPUTS_CONFIG_KEY = "trace_inputs"
 
 
 class GameIO:
@@ -23,6 +33,9 @@ class GameIO:
         robot_type,
     ):
         self._config = get_config(config_path)
+        # input latency tracing and the stats socket are opt-in
+        trace_inputs = self._config.get(TRACE_INPUTS_CONFIG_KEY, False)
+        TRACER.enabled = trace_inputs
 
         self._socket_handler = SocketHandler(
             self._config["game_engine"]["url"],
@@ -38,29 +51,41 @@ class GameIO:
             if self._config.get(DATACHANNEL_CONFIG_KEY, False)
             else None,
             socketio_logging_level=socketio_logging_level,
+            outbound_buffer_path=OUTBOUND_BUFFER_DEFAULT_PATH
+            if self._config.get(PERSIST_OUTBOUND_BUFFER_CONFIG_KEY, False)
+            else None,
+            stats_socket_name=STATS_SOCKET_NAME if trace_inputs else None,
+        )
+        # the GE handler runs the long game loop methods, so it gets a task
+        self._socket_handler.register_on_message_cb(
+            ge_message_handler, src=SRC_GAME_ENGINE, create_task=True
         )
-        self._socket_handler.register_on_message_cb(ge_message_handler)
         self._socket_handler.register_on_message_response_cb(
-            ge_message_handler, self._is_config_message
+            ge_message_handler, src=SRC_GAME_ENGINE, event=EVENT_CONFIG
         )
         self._message_router = MultiSeatMessageRouter(robot_log_handler)
         self._socket_handler.register_on_message_cb(
             self._message_router.handle_message
         )
+        self._socket_handler.register_on_control_frame_cb(
+            self._message_router.handle_control_frame
+        )
         self._socket_handler.register_on_connect_cb(self.provide_inputs)
+        self._socket_handler.register_stats_cb(
+            "input_states", self.get_input_states
+        )
         self.input_bindings = {}
         self._can_register_inputs = False
 
-    def _is_config_message(self, message):
-        return message.src == "gameEngine" and message.event == "config"
-
     async def provide_inputs(self):
         bindings = []
         for commandId, obj in self.input_bindings.items():
             bindings.append({"commandId": commandId, **obj})
         self._send_threadsafe("robotInputs", payload=bindings)
 
-    def register_inputs(self, inputs, admin=False, bindable=True):
+    def register_inputs(
+        self, inputs, admin=False, bindable=True, filters=None
+    ):
         """Registers inputs
 
         Input names must be unique.
@@ -76,6 +101,11 @@ class GameIO:
         :type admin: bool, optional
         :param bindable: Describes if the input can be bound to user
         input. Defaults to True.
+        :param filters: Input filters, such as RateLimit, Deadzone, Dedup,
+            Quantize and Smoothing from surrortg.inputs.input_filters, which
+            are run in order before the commands reach the inputs. Each
+            input gets its own copies of the filters. Defaults to None.
+        :type filters: list[InputFilter], optional
         :raises RuntimeError: if called outside on_init
         """
         if not self._can_register_inputs:
@@ -84,11 +114,17 @@ class GameIO:
         for input_id, handler_obj in inputs.items():
             if input_id in self.input_bindings:
                 raise RuntimeError(f"Duplicate input_ids: {input_id}")
-            self._message_router.register_input(input_id, handler_obj, admin)
+            index = self._message_router.register_input(
+                input_id,
+                handler_obj,
+                admin,
+                None if not filters else FilterChain.copy_of(filters),
+            )
             if bindable:
                 self.input_bindings[input_id] = {
                     "type": handler_obj.get_name(),
                     "admin": admin,
+                    "index": index,
                 }
 
     def enable_inputs(self):
@@ -123,24 +159,15 @@ class GameIO:
         If seat is not defined, resets all registered inputs,
         otherwise affects only the inputs with specified seat.
 
+        The inputs are reset concurrently, and inputs which do not finish
+        in INPUT_RESET_TIMEOUT seconds are logged and not waited for. Inputs
+        which set skip_reset_at_rest are skipped when they are at rest
+        after their last command.
+
         :param seat: seat number, defaults to None
         :type seat: Int, optional
         """
-        # get router and all registered seats
-        router = self._message_router.router
-        registered_seats = self._message_router.get_all_seats()
-        # return if seat is not specified or not found
-        if seat is not None and seat not in registered_seats:
-            logging.warning(f"Cannot reset inputs for seat {seat}")
-            return
-        # reset all inputs in router for a specific seat,
-        # or all seats if seat is not defined
-        for input_ in router.inputs.values():
-            if seat is not None:
-                await input_.dev.reset(seat)
-            else:
-                for current_seat in registered_seats:
-                    await input_.dev.reset(current_seat)
+        await self._call_inputs("reset", seat)
 
     async def shutdown_inputs(self, seat=None):
         """Shutdown registered inputs
@@ -148,24 +175,51 @@ class GameIO:
         If seat is not defined, shuts down all registered inputs,
         otherwise affects only the inputs with specified seat.
 
+        The inputs are shut down concurrently, and inputs which do not
+        finish in INPUT_RESET_TIMEOUT seconds are logged and not waited for.
+        Inputs which set skip_reset_at_rest and do not override
+        Input.shutdown are skipped when they are at rest after their last
+        command.
+
         :param seat: seat number, defaults to None
         :type seat: Int, optional
         """
+        await self._call_inputs("shutdown", seat)
+
+    def get_input_states(self, seat=None):
+        """Returns the last commands of the registered inputs, and whether
+        the inputs are at rest after them
+
+        Resets and shutdowns skip the inputs which are at rest, if they set
+        skip_reset_at_rest.
+
+        :param seat: seat number, defaults to None (all seats)
+        :type seat: Int, optional
+        :return: {seat: {input id: {"command": command, "at_rest": bool}}},
+            where command is None if the input has been reset after it
+        :rtype: dict
+        """
+        return self._message_router.router.get_input_states(seat)
+
+    async def _call_inputs(self, action, seat):
+        """Calls reset or shutdown of the registered inputs concurrently
+
+        :param action: 'reset' or 'shutdown'
+        :type action: String
+        :param seat: seat number, None for all registered seats
+        :type seat: Int/None
+        """
         # get router and all registered seats
         router = self._message_router.router
         registered_seats = self._message_router.get_all_seats()
         # return if seat is not specified or not found
         if seat is not None and seat not in registered_seats:
-            logging.warning(f"Cannot shutdown inputs for seat {seat}")
+            logging.warning(f"Cannot {action} inputs for seat {seat}")
             return
-        # shutdown all inputs in router for a specific seat,
+        # call all inputs in router for a specific seat,
         # or all seats if seat is not defined
-        for input_ in router.inputs.values():
-            if seat is not None:
-                await input_.dev.shutdown(seat)
-            else:
-                for current_seat in registered_seats:
-                    await input_.dev.shutdown(current_seat)
+        seats = registered_seats if seat is None else [seat]
+        await router.call_inputs(seats, action)
 
     def send_lap(self, seat=0):
         """Send a lap update to the game engine when lap is finished
@@ -218,6 +272,56 @@ class GameIO:
             scores coming to the specified seats, defaults to False
         :type seat_final_score: bool, optional
         """
+        self._send_threadsafe(
+            "scoreUpdate",
+            payload=self._get_score_payload(
+                score, scores, seat, final_score, seat_final_score
+            ),
+        )
+
+    async def send_score_acknowledged(
+        self,
+        score=None,
+        scores=None,
+        seat=0,
+        final_score=False,
+        seat_final_score=False,
+        timeout=None,
+    ):
+        """Send a score update to the game engine and wait until the game
+        engine has acknowledged it
+
+        The parameters are the same as with send_score. If the score
+        cannot be sent now, it is buffered and sent after reconnecting,
+        like with send_score.
+
+        :param timeout: acknowledgement timeout in seconds, defaults to None
+            (RpcClient default)
+        :type timeout: float, optional
+        :return: 'True' if the game engine acknowledged the score
+        :rtype: bool
+        """
+        payload = self._get_score_payload(
+            score, scores, seat, final_score, seat_final_score
+        )
+        try:
+            await self._socket_handler.request_socketio(
+                "scoreUpdate",
+                "gameEngine",
+                0,
+                payload=payload,
+                timeout=timeout,
+            )
+            return True
+        except RpcTimeoutError as e:
+            logging.warning(f"Score was not acknowledged: {e}")
+        except RpcError as e:
+            logging.info(f"Score was not sent yet: {e}")
+        return False
+
+    def _get_score_payload(
+        self, score, scores, seat, final_score, seat_final_score
+    ):
         assert isinstance(seat, int), "seat must be int"
         assert (
             score is not None or scores is not None
@@ -241,14 +345,11 @@ class GameIO:
         elif isinstance(scores, list):
             scores = {seat: score for seat, score in enumerate(scores)}
 
-        self._send_threadsafe(
-            "scoreUpdate",
-            payload={
-                "scores": scores,
-                "endGame": final_score,
-                "seatEndGame": seat_final_score,
-            },
-        )
+        return {
+            "scores": scores,
+            "endGame": final_score,
+            "seatEndGame": seat_final_score,
+        }
 
     def send_state_alive(self, seat=0):
         """Send a state update: alive to the game engine
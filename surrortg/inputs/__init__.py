@@ -3,3 +3,4 @@ from .switch import Switch
 from .delayed_switch import DelayedSwitch
 from .joystick import Joystick, Directions
 from .linear_actuator import LinearActuator
+from .timeline import Timeline
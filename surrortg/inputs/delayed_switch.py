@@ -53,7 +53,7 @@ class DelayedSwitch(Input):
         :param seat: Robot seat
         :type seat: int
         """
-        self.set_state("up", 0, seat)
+        await self.set_state("up", 0, seat)
 
     def get_name(self):
         """Returns the name of the input
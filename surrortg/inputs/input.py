@@ -1,10 +1,32 @@
+import logging
 from abc import ABC, abstractmethod
 
+# Axis values in binary control frames are scaled to -32767...32767,
+# see surrortg.network.control_frame
+CONTROL_FRAME_AXIS_MAX = 32767
+
 
 class Input(ABC):
     """Base class for all user inputs
     """
 
+    # If 'True', a command which the input has not started handling yet is
+    # replaced by a newer one, as only the latest value matters.
+    # Otherwise all the commands are handled in order, for example to keep
+    # all the button presses and releases.
+    latest_value_only = False
+    # If 'True', the input controls the same device for all the seats, so
+    # when several seats are reset or shut down at once, it is called only
+    # once, with the first seat.
+    single_seat = False
+    # If 'True', the router skips resets and shutdowns of the input when
+    # its last routed command left it at rest, see _command_at_rest. Set
+    # only for inputs which are controlled only through the router, as
+    # the router does not see direct calls from the game code or Timeline.
+    # The inputs of the library do not set it, as they cannot know how the
+    # game uses them, games enable it for their own inputs.
+    skip_reset_at_rest = False
+
     @abstractmethod
     async def _on_input(self, command, seat):
         """Implements the spesific Input functionality
@@ -16,6 +38,70 @@ class Input(ABC):
         """
         pass
 
+    async def _on_control_frame(self, a, b, seat):
+        """Implements the Input functionality for binary control frames
+
+        Defaults to ignoring the frame, as not all inputs support them.
+
+        :param a: x, actuator value or button bitmask from the frame
+        :type a: int
+        :param b: y value from the frame
+        :type b: int
+        :param seat: Robot seat
+        :type seat: int
+        """
+        logging.warning(f"{self.get_name()} does not support control frames")
+
+    def _control_frame_to_command(self, a, b):
+        """Converts control frame values into an _on_input command
+
+        Used when input filters are attached to the input, as the filters
+        work on commands. Defaults to None, which passes the frame to
+        _on_control_frame without filtering.
+
+        :param a: x, actuator value or button bitmask from the frame
+        :type a: int
+        :param b: y value from the frame
+        :type b: int
+        :rtype: dict/None
+        """
+        return None
+
+    def _command_at_rest(self, command):
+        """Returns 'True' if the command leaves the device at rest, so that
+        it does not need to be reset after it, if skip_reset_at_rest is set
+
+        Defaults to 'False', so that the input is always reset.
+
+        :param command: Command from the game engine
+        :type command: dict
+        :rtype: bool
+        """
+        return False
+
+    def _control_frame_at_rest(self, a, b):
+        """Returns 'True' if the control frame leaves the device at rest,
+        like _command_at_rest
+
+        :param a: x, actuator value or button bitmask from the frame
+        :type a: int
+        :param b: y value from the frame
+        :type b: int
+        :rtype: bool
+        """
+        return False
+
+    def _reset(self, seat):
+        """Clears the state which the input keeps about the seat
+
+        Called before the input is reset or shut down, and when the
+        commands of the seat are dropped. Defaults to doing nothing.
+
+        :param seat: Robot seat, None for all seats
+        :type seat: int/None
+        """
+        pass
+
     @abstractmethod
     async def reset(self, seat):
         """Reset functionality for the Input
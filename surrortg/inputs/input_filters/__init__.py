@@ -1 +1,10 @@
 from .spam_filter import SpamFilter
+from .filter_chain import (
+    InputFilter,
+    FilterChain,
+    RateLimit,
+    Deadzone,
+    Quantize,
+    Dedup,
+    Smoothing,
+)
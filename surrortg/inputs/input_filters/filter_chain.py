@@ -0,0 +1,364 @@
+"""Input command filters, which the router runs before Input._on_input
+
+Filters are given to GameIO.register_inputs, and each input gets its own
+copies of them. The filters keep their state per seat, and the state is
+cleared when the inputs of the seat are reset.
+
+The filters work on the command dicts, and the numeric filters change
+only the "x", "y" and "val" values by default. Switch releases and
+commands where all the values are zero are never dropped, so that a
+filter cannot leave a device pressed or moving.
+
+RateLimit and Smoothing can also pass commands on later from a timer,
+when the chain has an output, which the router sets.
+"""
+import asyncio
+import copy
+import functools
+import time
+
+NUMERIC_KEYS = ("x", "y", "val")
+# seconds between the steps of Smoothing when no new commands arrive
+SMOOTHING_INTERVAL = 0.05
+# Smoothing sends the target value when it is this close to it
+SMOOTHING_TOLERANCE = 0.01
+
+
+def _is_at_rest(command, keys=NUMERIC_KEYS):
+    """Returns 'True' for switch releases and all zero values"""
+    if command.get("state") == "up":
+        return True
+    values = [command[key] for key in keys if key in command]
+    return len(values) > 0 and all(value == 0 for value in values)
+
+
+def _map_values(command, keys, function):
+    """Returns a copy of the command with function applied to the numeric
+    values of the keys, or the command itself if it has none of them"""
+    mapped = None
+    for key in keys:
+        value = command.get(key)
+        if type(value) in (int, float):
+            if mapped is None:
+                mapped = dict(command)
+            mapped[key] = function(key, value)
+    return command if mapped is None else mapped
+
+
+def _converged(command, target, keys):
+    """Returns 'True' if the numeric values of the command are within
+    SMOOTHING_TOLERANCE of the target"""
+    for key in keys:
+        value = command.get(key)
+        if type(value) in (int, float):
+            if abs(value - target[key]) > SMOOTHING_TOLERANCE:
+                return False
+    return True
+
+
+class InputFilter:
+    """Base class for input filters"""
+
+    # function called with (command, seat) to pass a command on later,
+    # through the rest of the chain, set by FilterChain.set_output
+    emit = None
+
+    def filter(self, command, seat):
+        """Filter a command
+
+        :param command: Command from the game engine
+        :type command: dict
+        :param seat: Robot seat
+        :type seat: int
+        :return: the command to pass on, or None to drop it
+        :rtype: dict/None
+        """
+        return command
+
+    def reset(self, seat=None):
+        """Clear the state of the seat
+
+        :param seat: Robot seat, defaults to None (all seats)
+        :type seat: int/None, optional
+        """
+        pass
+
+
+class _SeatStateFilter(InputFilter):
+    """Base class for filters which keep state per seat in self.state"""
+
+    def __init__(self):
+        self.state = {}
+
+    def reset(self, seat=None):
+        if seat is None:
+            self.state.clear()
+        else:
+            self.state.pop(seat, None)
+
+
+class RateLimit(_SeatStateFilter):
+    """Passes at most max_rate commands per second
+
+    The latest command which arrived too soon is passed on when the
+    interval has passed, if no other command has been passed before that,
+    so that the device does not stay at a stale value after a burst.
+
+    :param max_rate: maximum commands per second
+    :type max_rate: float
+    """
+
+    def __init__(self, max_rate):
+        super().__init__()
+        self.min_interval = 1 / max_rate
+        # seat -> [latest deferred command, timer handle]
+        self.deferred = {}
+
+    def filter(self, command, seat):
+        now = time.monotonic()
+        last = self.state.get(seat)
+        if (
+            last is not None
+            and now - last < self.min_interval
+            and not _is_at_rest(command)
+        ):
+            self._defer(command, seat, last + self.min_interval - now)
+            return None
+        self._cancel_deferred(seat)
+        self.state[seat] = now
+        return command
+
+    def _defer(self, command, seat, delay):
+        if self.emit is None:
+            return
+        deferred = self.deferred.get(seat)
+        if deferred is not None:
+            deferred[0] = command
+        else:
+            handle = asyncio.get_event_loop().call_later(
+                delay, self._pass_deferred, seat
+            )
+            self.deferred[seat] = [command, handle]
+
+    def _pass_deferred(self, seat):
+        command, _ = self.deferred.pop(seat)
+        self.state[seat] = time.monotonic()
+        self.emit(command, seat)
+
+    def _cancel_deferred(self, seat):
+        deferred = self.deferred.pop(seat, None)
+        if deferred is not None:
+            deferred[1].cancel()
+
+    def reset(self, seat=None):
+        super().reset(seat)
+        for deferred_seat in list(self.deferred):
+            if seat is None or deferred_seat == seat:
+                self._cancel_deferred(deferred_seat)
+
+
+class Deadzone(InputFilter):
+    """Sets values closer to zero than deadzone to zero
+
+    :param deadzone: deadzone, between 0 and 1
+    :type deadzone: float
+    :param keys: command keys to filter, defaults to NUMERIC_KEYS
+    :type keys: tuple, optional
+    """
+
+    def __init__(self, deadzone, keys=NUMERIC_KEYS):
+        self.deadzone = deadzone
+        self.keys = keys
+
+    def filter(self, command, seat):
+        return _map_values(
+            command,
+            self.keys,
+            lambda key, value: 0 if abs(value) < self.deadzone else value,
+        )
+
+
+class Quantize(InputFilter):
+    """Rounds values to multiples of step
+
+    :param step: quantization step, for example 0.05
+    :type step: float
+    :param keys: command keys to filter, defaults to NUMERIC_KEYS
+    :type keys: tuple, optional
+    """
+
+    def __init__(self, step, keys=NUMERIC_KEYS):
+        self.step = step
+        self.keys = keys
+
+    def filter(self, command, seat):
+        return _map_values(
+            command,
+            self.keys,
+            lambda key, value: round(value / self.step) * self.step,
+        )
+
+
+class Dedup(_SeatStateFilter):
+    """Drops a command identical to the previous passed command
+
+    Put after Deadzone and Quantize to drop the commands which they made
+    identical.
+    """
+
+    def filter(self, command, seat):
+        if self.state.get(seat) == command and command.get("state") != "up":
+            return None
+        self.state[seat] = command
+        return command
+
+
+class Smoothing(_SeatStateFilter):
+    """Exponential smoothing of the values
+
+    Commands at rest are passed immediately and restart the smoothing,
+    so that stopping is never delayed. If no new command arrives in
+    interval seconds, the smoothing keeps stepping toward the last
+    received values, until they are reached, so that the clients which
+    send only changes do not leave the device at an intermediate value.
+
+    :param alpha: weight of the new value, between 0 and 1, smaller is
+        smoother
+    :type alpha: float
+    :param keys: command keys to filter, defaults to NUMERIC_KEYS
+    :type keys: tuple, optional
+    :param interval: seconds between the steps without new commands,
+        defaults to SMOOTHING_INTERVAL
+    :type interval: float, optional
+    """
+
+    def __init__(self, alpha, keys=NUMERIC_KEYS, interval=SMOOTHING_INTERVAL):
+        super().__init__()
+        self.alpha = alpha
+        self.keys = keys
+        self.interval = interval
+        # seat -> last received command, which the smoothing approaches
+        self.targets = {}
+        # seat -> timer handle of the next step
+        self.timers = {}
+
+    def filter(self, command, seat):
+        self._cancel_timer(seat)
+        if _is_at_rest(command, self.keys):
+            self.state.pop(seat, None)
+            self.targets.pop(seat, None)
+            return command
+        target = command
+        previous = self.state.get(seat)
+        if previous is not None:
+            command = self._step(previous, target)
+        self.state[seat] = command
+        self.targets[seat] = target
+        self._schedule(command, target, seat)
+        return command
+
+    def _step(self, previous, target):
+        return _map_values(
+            target,
+            self.keys,
+            lambda key, value: previous.get(key, value)
+            + self.alpha * (value - previous.get(key, value)),
+        )
+
+    def _schedule(self, command, target, seat):
+        if self.emit is None or _converged(command, target, self.keys):
+            return
+        self.timers[seat] = asyncio.get_event_loop().call_later(
+            self.interval, self._step_toward_target, seat
+        )
+
+    def _step_toward_target(self, seat):
+        del self.timers[seat]
+        target = self.targets[seat]
+        command = self._step(self.state[seat], target)
+        if _converged(command, target, self.keys):
+            command = target
+        else:
+            self._schedule(command, target, seat)
+        self.state[seat] = command
+        self.emit(command, seat)
+
+    def _cancel_timer(self, seat):
+        timer = self.timers.pop(seat, None)
+        if timer is not None:
+            timer.cancel()
+
+    def reset(self, seat=None):
+        super().reset(seat)
+        for timer_seat in list(self.timers):
+            if seat is None or timer_seat == seat:
+                self._cancel_timer(timer_seat)
+        if seat is None:
+            self.targets.clear()
+        else:
+            self.targets.pop(seat, None)
+
+
+class FilterChain:
+    """Runs the filters in order, until one of them drops the command
+
+    :param filters: input filters
+    :type filters: list[InputFilter]
+    """
+
+    def __init__(self, filters):
+        self.filters = list(filters)
+        self.dropped = 0
+        self.output = None
+
+    @classmethod
+    def copy_of(cls, filters):
+        """Returns a chain of copies of the filters, for a single input
+
+        :param filters: input filters
+        :type filters: list[InputFilter]
+        :rtype: FilterChain
+        """
+        return cls(copy.deepcopy(filters))
+
+    def set_output(self, output):
+        """Set the function which gets the commands the filters pass on
+        later, for example from a timer
+
+        :param output: function called with (command, seat)
+        :type output: function
+        """
+        self.output = output
+        for index, input_filter in enumerate(self.filters):
+            input_filter.emit = functools.partial(self._emit, index + 1)
+
+    def filter(self, command, seat):
+        """Filter a command
+
+        :return: the filtered command, or None if it was dropped
+        :rtype: dict/None
+        """
+        return self._run(self.filters, command, seat)
+
+    def _run(self, filters, command, seat):
+        for input_filter in filters:
+            command = input_filter.filter(command, seat)
+            if command is None:
+                self.dropped += 1
+                return None
+        return command
+
+    def _emit(self, index, command, seat):
+        """Runs the filters after index, and passes the command to output"""
+        command = self._run(self.filters[index:], command, seat)
+        if command is not None and self.output is not None:
+            self.output(command, seat)
+
+    def reset(self, seat=None):
+        """Clear the state of the seat from all the filters
+
+        :param seat: Robot seat, defaults to None (all seats)
+        :type seat: int/None, optional
+        """
+        for input_filter in self.filters:
+            input_filter.reset(seat)
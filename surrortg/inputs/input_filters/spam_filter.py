@@ -1,50 +1,91 @@
 import logging
-from time import time
-from collections import deque
+import time
 
 
 class SpamFilter:
     """Class for adding a spam filter for any input
 
     Only allows a certain number of inputs commands to pass through,
-    during the specified rolling time window.
+    during the specified rolling time window. Reaching max_inputs inside
+    the window is considered spam, so in practice max_inputs - 1 inputs
+    pass per window.
+
+    The limit is a token bucket per seat on the monotonic clock, so a
+    spamming player does not throttle the other seats, and each check takes
+    constant time and memory.
     :param max_inputs: maximum number of inputs allowed
     :type max_inputs: int
-    :param per_seconds: time window length
+    :param per_seconds: time window length, 0 never detects spam
     :type per_seconds: float
+    :param clock: function returning the time in seconds, defaults to
+        time.monotonic
+    :type clock: function, optional
     """
 
-    def __init__(self, max_inputs, per_seconds):
+    def __init__(self, max_inputs, per_seconds, clock=time.monotonic):
         self.max_inputs = max_inputs
         self.per_seconds = per_seconds
-        self.input_timestamps = deque()
+        self.clock = clock
+        self.capacity = max(max_inputs - 1, 0)
+        # with an empty window nothing is too fast, like before
+        self.refill_rate = (
+            self.capacity / per_seconds if per_seconds > 0 else None
+        )
+        # seat -> [tokens, monotonic time of the last check]
+        self.buckets = {}
+        self.passed = 0
+        self.rejected = 0
+        self.rejected_by_seat = {}
 
-    def too_much_spam(self):
+    def too_much_spam(self, seat=0):
         """Check if input has received too many commands
 
+        :param seat: Robot seat, defaults to 0
+        :type seat: int, optional
         :return: 'True' if input has received too many commands
         :rtype: bool
         """
-        # append the current timestamp
-        self.input_timestamps.append(time())
-        # check has there been enough inputs
-        if len(self.input_timestamps) >= self.max_inputs:
-            oldest = self.input_timestamps.popleft()
-            # check if inputs have happened too fast
-            seconds = time() - oldest
-            if seconds < self.per_seconds:
-                logging.debug(
-                    f"{self.max_inputs} in {round(seconds, 2)} "
-                    "seconds\t\tTOO MUCH"
-                )
-                return True
-            else:
-                logging.debug(
-                    f"{self.max_inputs} in {round(seconds, 2)} seconds"
-                )
+        if self.refill_rate is None:
+            self.passed += 1
+            return False
+        now = self.clock()
+        bucket = self.buckets.get(seat)
+        if bucket is None:
+            bucket = self.buckets[seat] = [self.capacity, now]
+        else:
+            tokens = bucket[0] + (now - bucket[1]) * self.refill_rate
+            bucket[0] = tokens if tokens < self.capacity else self.capacity
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.passed += 1
+            return False
+        self.rejected += 1
+        self.rejected_by_seat[seat] = self.rejected_by_seat.get(seat, 0) + 1
+        logging.debug(
+            f"More than {self.capacity} inputs in {self.per_seconds} "
+            f"seconds from seat {seat}\t\tTOO MUCH"
+        )
+        return True
+
+    def reset(self, seat=None):
+        """Forget the earlier inputs of the seat
+
+        :param seat: Robot seat, defaults to None (all seats)
+        :type seat: int/None, optional
+        """
+        if seat is None:
+            self.buckets.clear()
         else:
-            logging.debug(f"Not enough inputs: {len(self.input_timestamps)}")
-        return False
+            self.buckets.pop(seat, None)
+
+    def stats(self):
+        """Returns the passed and rejected input counters in a dict"""
+        return {
+            "passed": self.passed,
+            "rejected": self.rejected,
+            "rejected_by_seat": dict(self.rejected_by_seat),
+        }
 
 
 if __name__ == "__main__":
@@ -66,11 +107,12 @@ if __name__ == "__main__":
         if key == keyboard.Key.esc:
             return False
         if key in keys:
-            spam_filter.too_much_spam()
+            if not spam_filter.too_much_spam():
+                logging.debug("Passed")
 
     try:
         with keyboard.Listener(on_press=on_press) as listener:
             listener.join()
     except KeyboardInterrupt:
         pass
-    print("\n")
+    print(f"\n{spam_filter.stats()}")
@@ -1,7 +1,14 @@
+import asyncio
 import logging
 import math
 from enum import Enum, auto
 from . import Input
+from .input import CONTROL_FRAME_AXIS_MAX
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class Directions(Enum):
@@ -52,6 +59,26 @@ DIRECTION_DICT_4 = {
     -4: Directions.LEFT,
 }
 
+DEFAULT_MIN_AMOUNT = 0.1
+# the direction dicts as tuples, negative keys index from the end
+DIRECTIONS_8_BY_KEY = tuple(
+    DIRECTION_DICT_8[key if key <= 8 else key - 17] for key in range(17)
+)
+DIRECTIONS_4_BY_KEY = tuple(
+    DIRECTION_DICT_4[key if key <= 4 else key - 9] for key in range(9)
+)
+# center angles of the directions, used for the hysteresis
+DIRECTION_ANGLES = {
+    Directions.RIGHT: 0,
+    Directions.TOP_RIGHT: ONE_8TH,
+    Directions.TOP: 2 * ONE_8TH,
+    Directions.TOP_LEFT: 3 * ONE_8TH,
+    Directions.LEFT: math.pi,
+    Directions.BOTTOM_LEFT: -3 * ONE_8TH,
+    Directions.BOTTOM: -2 * ONE_8TH,
+    Directions.BOTTOM_RIGHT: -ONE_8TH,
+}
+
 
 class Joystick(Input):
     """Joystick input class
@@ -59,6 +86,11 @@ class Joystick(Input):
     Implement custom logic based on directions and amounts or x/y coordinates.
     """
 
+    latest_value_only = True
+    _min_amount = DEFAULT_MIN_AMOUNT
+    _direction_hysteresis = 0
+    _direction_mode = None
+
     def set_min_amount(self, min_amount):
         """Set joystick min_amount parameter
 
@@ -72,10 +104,121 @@ class Joystick(Input):
 
         self._min_amount = min_amount
 
+    def set_direction_hysteresis(self, hysteresis):
+        """Set the angular hysteresis of get_direction_8 and get_direction_4
+
+        The previous direction of the seat is kept until the joystick is
+        turned more than hysteresis past the direction border, which
+        stops the direction from flickering on the border. The middle is
+        not affected. Defaults to 0 (no hysteresis).
+
+        :param hysteresis: hysteresis in radians
+        :type hysteresis: float
+        """
+        assert isinstance(
+            hysteresis, (float, int)
+        ), "hysteresis must be float or int"
+        assert hysteresis >= 0, "hysteresis must not be negative"
+
+        self._direction_hysteresis = hysteresis
+        # (seat, sector half width) -> the previous direction
+        self._previous_directions = {}
+
+    def set_direction_mode(self, directions=8, keepalive=None):
+        """Handle the joystick as 8 or 4 directions instead of coordinates
+
+        The coordinates are classified with get_direction_8 or
+        get_direction_4, and handle_direction is called only when the
+        direction of the seat changes, instead of calling handle_coordinates
+        for every sample. This saves device writes, as most of the
+        consecutive samples have the same direction.
+
+        :param directions: 8, 4, or None to call handle_coordinates again,
+            defaults to 8
+        :type directions: int/None, optional
+        :param keepalive: if set, the last direction other than the middle
+            is passed again every keepalive seconds until the direction
+            changes or the seat is reset, for devices which stop without
+            new commands, defaults to None
+        :type keepalive: float/None, optional
+        """
+        assert directions in (8, 4, None), "directions must be 8, 4 or None"
+        assert keepalive is None or isinstance(
+            keepalive, (float, int)
+        ), "keepalive must be float, int or None"
+
+        self._direction_mode = directions
+        self._direction_keepalive = keepalive
+        # seat -> the last passed direction
+        self._passed_directions = {}
+        # seat -> the task passing the direction again after keepalive
+        self._keepalive_tasks = {}
+
+    def _reset(self, seat):
+        if self._direction_mode is not None:
+            if seat is None:
+                self._passed_directions.clear()
+                self._keepalive_tasks.clear()
+            else:
+                self._passed_directions.pop(seat, None)
+                self._keepalive_tasks.pop(seat, None)
+        if self._direction_hysteresis:
+            for key in list(self._previous_directions):
+                if seat is None or key[0] == seat:
+                    del self._previous_directions[key]
+
+    async def _handle_sample(self, x, y, seat):
+        """Calls handle_coordinates, or handle_direction in direction mode
+        if the direction changed"""
+        if self._direction_mode is None:
+            await self.handle_coordinates(x, y, seat)
+            return
+
+        if self._direction_mode == 8:
+            direction = self.get_direction_8(x, y, seat)
+        else:
+            direction = self.get_direction_4(x, y, seat)
+        if self._passed_directions.get(seat) is direction:
+            return
+        # stored before the call, so that a concurrent _reset is not undone
+        self._passed_directions[seat] = direction
+        self._keepalive_tasks.pop(seat, None)
+        try:
+            await self.handle_direction(direction, seat)
+        except Exception:
+            self._passed_directions.pop(seat, None)
+            raise
+        if (
+            self._direction_keepalive is not None
+            and direction is not Directions.MIDDLE
+            and self._passed_directions.get(seat) is direction
+        ):
+            self._keepalive_tasks[seat] = asyncio.create_task(
+                self._keep_direction(direction, seat)
+            )
+
+    async def _keep_direction(self, direction, seat):
+        """Passes the direction again every keepalive seconds
+
+        Stops when the task is no longer the keepalive task of the seat,
+        which happens when the direction changes or the seat is reset. The
+        task is not cancelled, so that a device write is never interrupted.
+        """
+        task = asyncio.current_task()
+        while True:
+            await asyncio.sleep(self._direction_keepalive)
+            if self._keepalive_tasks.get(seat) is not task:
+                return
+            try:
+                await self.handle_direction(direction, seat)
+            except Exception as e:
+                logging.warning(f"Joystick: keepalive failed: {e}")
+
     async def _on_input(self, command, seat):
         """Joystick input functionality
 
-        Parses x- and y-coordinates and calls handle_coordinates
+        Parses x- and y-coordinates and calls handle_coordinates, or
+        handle_direction in direction mode
         :param command: Command from game engine
         :type command: dict
         :param seat: Robot seat
@@ -84,7 +227,39 @@ class Joystick(Input):
         x = self._parse_coordinate(command, "x")
         y = self._parse_coordinate(command, "y")
         if x is not None and y is not None:
-            await self.handle_coordinates(x, y, seat)
+            await self._handle_sample(x, y, seat)
+
+    async def _on_control_frame(self, a, b, seat):
+        """Joystick input functionality for binary control frames
+
+        :param a: quantized x-coordinate
+        :type a: int
+        :param b: quantized y-coordinate
+        :type b: int
+        :param seat: Robot seat
+        :type seat: int
+        """
+        await self._handle_sample(
+            max(a / CONTROL_FRAME_AXIS_MAX, -1.0),
+            max(b / CONTROL_FRAME_AXIS_MAX, -1.0),
+            seat,
+        )
+
+    def _control_frame_to_command(self, a, b):
+        return {
+            "x": max(a / CONTROL_FRAME_AXIS_MAX, -1.0),
+            "y": max(b / CONTROL_FRAME_AXIS_MAX, -1.0),
+        }
+
+    def _command_at_rest(self, command):
+        return (
+            type(command) is dict
+            and command.get("x") == 0
+            and command.get("y") == 0
+        )
+
+    def _control_frame_at_rest(self, a, b):
+        return a == 0 and b == 0
 
     def _parse_coordinate(self, command, key):
         """Parse the coordinate given as key from the command
@@ -130,7 +305,20 @@ class Joystick(Input):
         """
         pass
 
-    def get_direction_8(self, x, y):
+    async def handle_direction(self, direction, seat):
+        """Direction based Joystick control, used after set_direction_mode
+
+        Called only when the direction of the seat changes, or again every
+        keepalive seconds.
+
+        :param direction: Current direction
+        :type direction: Directions
+        :param seat: Robot seat
+        :type seat: int
+        """
+        pass
+
+    def get_direction_8(self, x, y, seat=0):
         """Get the current direction from 8 main directions + middle
 
         Result Directions.MIDDLE means that Joystick distance from the center
@@ -143,19 +331,17 @@ class Joystick(Input):
         :type x: float
         :param y: y-coordinate, between -1.0 and 1.0
         :type y: float
+        :param seat: Robot seat, used for the hysteresis, defaults to 0
+        :type seat: int, optional
         :return: Current direction
         :rtype: Directions
         """
-        if not hasattr(self, "_min_amount"):
-            self._min_amount = 0.1
-        direction, amount = self.get_direction_and_amount(x, y)
-        if amount < self._min_amount:
-            return Directions.MIDDLE
-        else:
-            key = int(direction / ONE_16TH)
-            return DIRECTION_DICT_8[key]
+        direction = self._classify(x, y, DIRECTIONS_8_BY_KEY, ONE_16TH)
+        if self._direction_hysteresis:
+            direction = self._apply_hysteresis(direction, x, y, seat, ONE_16TH)
+        return direction
 
-    def get_direction_4(self, x, y):
+    def get_direction_4(self, x, y, seat=0):
         """Get the current direction from 4 main directions + middle
 
         Result Directions.MIDDLE means that Joystick distance from the center
@@ -167,17 +353,45 @@ class Joystick(Input):
         :type x: float
         :param y: y-coordinate, between -1.0 and 1.0
         :type y: float
+        :param seat: Robot seat, used for the hysteresis, defaults to 0
+        :type seat: int, optional
         :return: Current direction
         :rtype: Directions
         """
-        if not hasattr(self, "_min_amount"):
-            self._min_amount = 0.1
-        direction, amount = self.get_direction_and_amount(x, y)
-        if amount < self._min_amount:
-            return Directions.MIDDLE
-        else:
-            key = int(direction / ONE_8TH)
-            return DIRECTION_DICT_4[key]
+        direction = self._classify(x, y, DIRECTIONS_4_BY_KEY, ONE_8TH)
+        if self._direction_hysteresis:
+            direction = self._apply_hysteresis(direction, x, y, seat, ONE_8TH)
+        return direction
+
+    def get_directions_8(self, xs, ys):
+        """Get the directions of many coordinates, like get_direction_8
+
+        Meant for replays and analysis, the hysteresis is not applied.
+        Uses NumPy if it is installed.
+
+        :param xs: x-coordinates, between -1.0 and 1.0
+        :type xs: list[float] or numpy.ndarray
+        :param ys: y-coordinates, between -1.0 and 1.0
+        :type ys: list[float] or numpy.ndarray
+        :return: directions
+        :rtype: list[Directions]
+        """
+        return self._get_directions(xs, ys, DIRECTIONS_8_BY_KEY, ONE_16TH)
+
+    def get_directions_4(self, xs, ys):
+        """Get the directions of many coordinates, like get_direction_4
+
+        Meant for replays and analysis, the hysteresis is not applied.
+        Uses NumPy if it is installed.
+
+        :param xs: x-coordinates, between -1.0 and 1.0
+        :type xs: list[float] or numpy.ndarray
+        :param ys: y-coordinates, between -1.0 and 1.0
+        :type ys: list[float] or numpy.ndarray
+        :return: directions
+        :rtype: list[Directions]
+        """
+        return self._get_directions(xs, ys, DIRECTIONS_4_BY_KEY, ONE_8TH)
 
     def get_direction_and_amount(self, x, y):
         """Get exact direction and amount from the x/y coordinates
@@ -196,15 +410,72 @@ class Joystick(Input):
         phi = math.atan2(y, x)
         return (phi, rho)
 
+    def _classify(self, x, y, directions_by_key, key_width):
+        """Returns the direction of the coordinates without the hysteresis
+
+        :param directions_by_key: DIRECTIONS_8_BY_KEY or DIRECTIONS_4_BY_KEY
+        :type directions_by_key: tuple
+        :param key_width: ONE_16TH or ONE_8TH, respectively
+        :type key_width: float
+        """
+        min_amount = self._min_amount
+        if x * x + y * y < min_amount * min_amount:
+            return Directions.MIDDLE
+        return directions_by_key[int(math.atan2(y, x) / key_width)]
+
+    def _apply_hysteresis(self, direction, x, y, seat, half_width):
+        """Returns the previous direction of the seat instead, if the
+        coordinates are within the hysteresis from it
+
+        :param half_width: half of the direction sector width in radians
+        :type half_width: float
+        """
+        key = (seat, half_width)
+        previous = self._previous_directions.get(key)
+        if (
+            previous is not None
+            and previous is not direction
+            and previous is not Directions.MIDDLE
+            and direction is not Directions.MIDDLE
+        ):
+            offset = math.atan2(y, x) - DIRECTION_ANGLES[previous]
+            offset = abs((offset + math.pi) % (2 * math.pi) - math.pi)
+            if offset <= half_width + self._direction_hysteresis:
+                direction = previous
+        self._previous_directions[key] = direction
+        return direction
+
+    def _get_directions(self, xs, ys, directions_by_key, key_width):
+        if np is None:
+            return [
+                self._classify(x, y, directions_by_key, key_width)
+                for x, y in zip(xs, ys)
+            ]
+
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        # astype truncates towards zero like int()
+        keys = (np.arctan2(ys, xs) / key_width).astype(np.intp)
+        directions = np.array(directions_by_key, dtype=object)[keys]
+        directions[
+            xs * xs + ys * ys < self._min_amount ** 2
+        ] = Directions.MIDDLE
+        return directions.tolist()
+
     async def reset(self, seat):
         """Joystick reset functionality
 
-        Defaults to x=0, y=0
+        Defaults to x=0, y=0, or Directions.MIDDLE in direction mode
 
         :param seat: Robot seat
         :type seat: int
         """
-        await self.handle_coordinates(0, 0, seat)
+        if self._direction_mode is None:
+            await self.handle_coordinates(0, 0, seat)
+        else:
+            # the game may call this directly, so forget the last direction
+            self._reset(seat)
+            await self.handle_direction(Directions.MIDDLE, seat)
 
     def get_name(self):
         """Returns the name of the input
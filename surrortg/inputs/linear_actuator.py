@@ -1,13 +1,98 @@
+import asyncio
 import logging
+import time
 import traceback
 from abc import abstractmethod
-from .input import Input
+from .input import Input, CONTROL_FRAME_AXIS_MAX
+
+# update interval of the slew limiter, if max_rate is not set
+SLEW_INTERVAL = 0.02
+
+
+class _SeatOutput:
+    """The driven value and the writer task of a seat"""
+
+    __slots__ = ("target", "driven", "driven_at", "position", "task")
+
+    def __init__(self):
+        # the latest value, quantized
+        self.target = None
+        # the last value given to drive_actuator
+        self.driven = None
+        # monotonic time of the last drive_actuator call
+        self.driven_at = 0
+        # the slew limited position, before quantizing
+        self.position = None
+        self.task = None
 
 
 class LinearActuator(Input):
     """A class for moving linear actuators
+
+    All the values are passed to drive_actuator in order by default. An
+    actuator which only follows the latest position, such as a servo, can
+    set latest_value_only to 'True' to skip the values which have already
+    been replaced. Actuators which react to the changes of the value,
+    like buttons, must not set it, as a press could be replaced by its
+    release before it is handled.
     """
 
+    # seat -> _SeatOutput, when the output is limited
+    _outputs = None
+    _resolution = None
+    _min_interval = None
+    _slew_rate = None
+
+    def set_output_limits(
+        self, resolution=None, max_rate=None, slew_rate=None
+    ):
+        """Limit the drive_actuator calls
+
+        The limits are applied per seat, and reset drives the actuator to 0
+        without them. Driving is done in a separate task when max_rate or
+        slew_rate is set.
+
+        :param resolution: the values are rounded to multiples of this, and
+            a value which rounds to the last driven value is not driven,
+            for example 1 / 300 for 300 PWM steps per direction, defaults
+            to None
+        :type resolution: float/None, optional
+        :param max_rate: maximum drive_actuator calls per second, the
+            latest value is driven when the interval has passed, defaults
+            to None
+        :type max_rate: float/None, optional
+        :param slew_rate: maximum value change per second, the actuator is
+            moved towards the latest value on a timer, starting from 0,
+            defaults to None
+        :type slew_rate: float/None, optional
+        """
+        for name, limit in (
+            ("resolution", resolution),
+            ("max_rate", max_rate),
+            ("slew_rate", slew_rate),
+        ):
+            assert limit is None or (
+                isinstance(limit, (float, int)) and limit > 0
+            ), f"{name} must be a positive float or int, or None"
+
+        self._reset(None)
+        self._resolution = resolution
+        self._min_interval = None if max_rate is None else 1 / max_rate
+        self._slew_rate = slew_rate
+        if resolution is None and max_rate is None and slew_rate is None:
+            self._outputs = None
+        else:
+            self._outputs = {}
+
+    def _reset(self, seat):
+        if self._outputs is None:
+            return
+        for output_seat in list(self._outputs):
+            if seat is None or output_seat == seat:
+                task = self._outputs.pop(output_seat).task
+                if task is not None:
+                    task.cancel()
+
     async def _on_input(self, command, seat):
         """LinearActuator input functionality
 
@@ -29,13 +114,131 @@ class LinearActuator(Input):
                     "Received invalid value [%d] for LinearActuator", val
                 )
                 return
-            await self.drive_actuator(val, seat)
+            await self._drive(val, seat)
         except (ValueError, TypeError):
             logging.warning(
                 "Could not convert command for LinearActuator into float %s"
                 % traceback.format_exc()
             )
 
+    async def _on_control_frame(self, a, b, seat):
+        """LinearActuator input functionality for binary control frames
+
+        :param a: quantized actuator value
+        :type a: int
+        :param b: unused
+        :type b: int
+        :param seat: Robot seat
+        :type seat: int
+        """
+        await self._drive(max(a / CONTROL_FRAME_AXIS_MAX, -1.0), seat)
+
+    def _control_frame_to_command(self, a, b):
+        return {"val": max(a / CONTROL_FRAME_AXIS_MAX, -1.0)}
+
+    def _command_at_rest(self, command):
+        # the writer task may still be moving the actuator
+        return (
+            self._min_interval is None
+            and self._slew_rate is None
+            and type(command) is dict
+            and command.get("val") == 0
+        )
+
+    def _control_frame_at_rest(self, a, b):
+        return (
+            self._min_interval is None and self._slew_rate is None and a == 0
+        )
+
+    async def _drive(self, val, seat):
+        """Calls drive_actuator within the output limits"""
+        if self._outputs is None:
+            await self.drive_actuator(val, seat)
+            return
+
+        if self._resolution is not None:
+            val = self._quantize(val)
+        output = self._outputs.get(seat)
+        if output is None:
+            output = self._outputs[seat] = _SeatOutput()
+        output.target = val
+        if self._min_interval is None and self._slew_rate is None:
+            if val != output.driven:
+                output.driven = val
+                try:
+                    await self.drive_actuator(val, seat)
+                except Exception:
+                    output.driven = None
+                    raise
+        elif output.task is None and val != output.driven:
+            if self._slew_rate is None:
+                write = self._write_limited
+            else:
+                write = self._write_slewed
+            output.task = asyncio.create_task(write(output, seat))
+
+    def _quantize(self, val):
+        val = round(val / self._resolution) * self._resolution
+        return min(max(val, -1.0), 1.0)
+
+    async def _write_limited(self, output, seat):
+        """Drives the latest value at most every _min_interval seconds,
+        until the latest value has been driven"""
+        try:
+            while output.target != output.driven:
+                wait = output.driven_at + self._min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                output.driven = output.target
+                output.driven_at = time.monotonic()
+                await self.drive_actuator(output.driven, seat)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            output.driven = None
+            logging.warning(
+                f"{self.get_name()} of seat {seat} failed to drive:\n"
+                f"{traceback.format_exc()}"
+            )
+        finally:
+            output.task = None
+
+    async def _write_slewed(self, output, seat):
+        """Moves the position towards the latest value at most _slew_rate
+        per second, until it has been reached"""
+        interval = self._min_interval or SLEW_INTERVAL
+        if output.position is None:
+            output.position = 0
+        moved_at = time.monotonic()
+        try:
+            while output.position != output.target:
+                await asyncio.sleep(interval)
+                now = time.monotonic()
+                step = self._slew_rate * (now - moved_at)
+                moved_at = now
+                output.position = min(
+                    max(output.target, output.position - step),
+                    output.position + step,
+                )
+                val = output.position
+                if self._resolution is not None:
+                    val = self._quantize(val)
+                if val != output.driven:
+                    output.driven = val
+                    output.driven_at = now
+                    await self.drive_actuator(val, seat)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            output.driven = None
+            logging.warning(
+                f"{self.get_name()} of seat {seat} failed to drive:\n"
+                f"{traceback.format_exc()}"
+            )
+        finally:
+            output.task = None
+
     @abstractmethod
     async def drive_actuator(self, val, seat):
         """Drive actuator to parameter val
@@ -55,6 +258,8 @@ class LinearActuator(Input):
         :param seat: Robot seat
         :type seat: int
         """
+        # the game may call this directly, so stop the output limiting
+        self._reset(seat)
         await self.drive_actuator(0, seat)
 
     def get_name(self):
@@ -39,6 +39,30 @@ class Switch(Input):
         else:
             await self.on(seat)
 
+    async def _on_control_frame(self, a, b, seat):
+        """Switch input functionality for binary control frames
+
+        :param a: button bitmask, bit 0 set means down
+        :type a: int
+        :param b: unused
+        :type b: int
+        :param seat: Robot seat
+        :type seat: int
+        """
+        if a & 1:
+            await self.on(seat)
+        else:
+            await self.off(seat)
+
+    def _control_frame_to_command(self, a, b):
+        return {"state": "down" if a & 1 else "up"}
+
+    def _command_at_rest(self, command):
+        return type(command) is dict and command.get("state") == "up"
+
+    def _control_frame_at_rest(self, a, b):
+        return not a & 1
+
     @abstractmethod
     async def on(self, seat):
         """Switch turned on functionality
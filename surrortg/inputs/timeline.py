@@ -0,0 +1,89 @@
+import asyncio
+import logging
+
+
+def _set_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+async def _sleep_until(loop, deadline):
+    """Sleeps until the event loop time deadline"""
+    if deadline <= loop.time():
+        return
+    future = loop.create_future()
+    handle = loop.call_at(deadline, _set_done, future)
+    try:
+        await future
+    finally:
+        handle.cancel()
+
+
+class Timeline:
+    """Runs input commands at fixed offsets from the start
+
+    The steps are run at absolute event loop deadlines, so the delays of
+    the earlier steps do not add up, unlike with a chain of asyncio.sleep
+    calls. The steps run in order, a slow step only delays the steps after
+    it which are already due. If the run is cancelled, the inputs which
+    got commands are reset, so that for example no button is left pressed.
+
+    Example::
+
+        await Timeline(
+            [
+                (0, button, {"state": "down"}),
+                (0.1, button, {"state": "up"}),
+            ]
+        ).run()
+
+    :param steps: (offset in seconds, input, command) tuples, the commands
+        are given to the inputs like the commands from the game engine
+    :type steps: list[tuple]
+    :param seat: Robot seat, defaults to 0
+    :type seat: int, optional
+    """
+
+    def __init__(self, steps, seat=0):
+        # sorted is stable, so the steps with the same offset keep the order
+        self.steps = sorted(steps, key=lambda step: step[0])
+        self.seat = seat
+        # how late each step of the latest run started, in seconds
+        self.timing_errors = []
+
+    @property
+    def duration(self):
+        """Offset of the last step in seconds"""
+        return self.steps[-1][0] if self.steps else 0
+
+    async def run(self):
+        """Runs the steps, the timeline can be run again after this
+
+        :raises asyncio.CancelledError: if cancelled, after resetting the
+            inputs
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.timing_errors = []
+        used_inputs = []
+        try:
+            for offset, dev, command in self.steps:
+                deadline = start + offset
+                await _sleep_until(loop, deadline)
+                self.timing_errors.append(loop.time() - deadline)
+                if not any(dev is used for used in used_inputs):
+                    used_inputs.append(dev)
+                await dev._on_input(command, self.seat)
+        except asyncio.CancelledError:
+            await self._reset(used_inputs)
+            raise
+
+    async def _reset(self, inputs):
+        results = await asyncio.gather(
+            *(dev.reset(self.seat) for dev in inputs), return_exceptions=True
+        )
+        for dev, result in zip(inputs, results):
+            if isinstance(result, Exception):
+                logging.warning(
+                    f"Timeline could not reset {dev.get_name()}: {result!r}"
+                )
@@ -0,0 +1,91 @@
+"""Codecs for the local datachannel socket.
+
+JSON is always available, and uses orjson for speed when it is installed.
+msgpack is available when the msgpack package is installed, and it is used
+only after the local datachannel peer has selected it.
+
+Inbound packets are decoded based on their first byte, so both formats
+are accepted at any time, also during the codec negotiation.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JsonCodec:
+    """JSON codec, the default and the fallback"""
+
+    name = "json"
+
+    def decode(self, data):
+        """Decode a JSON packet
+
+        :param data: packet
+        :type data: bytes/bytearray/memoryview
+        :raises ValueError: if the packet is not valid JSON
+        :raises UnicodeDecodeError: if the packet is not valid utf-8
+        """
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(bytes(data).decode("utf-8"))
+
+    def encode(self, obj):
+        if orjson is not None:
+            # scores dicts use int seats as keys
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj).encode("utf-8")
+
+
+class MsgpackCodec:
+    """msgpack codec, requires the msgpack package"""
+
+    name = "msgpack"
+
+    def decode(self, data):
+        """Decode a msgpack packet
+
+        :param data: packet
+        :type data: bytes/bytearray/memoryview
+        :raises ValueError: if the packet is not valid msgpack
+        """
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+    def encode(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+
+JSON_CODEC = JsonCodec()
+MSGPACK_CODEC = None if msgpack is None else MsgpackCodec()
+
+# available codecs by name, in the order of preference
+CODECS = {
+    codec.name: codec
+    for codec in (MSGPACK_CODEC, JSON_CODEC)
+    if codec is not None
+}
+
+# msgpack maps start with fixmap (0x80-0x8f), map 16 (0xde) or map 32 (0xdf)
+_MSGPACK_MAP_FIRST_BYTES = frozenset(range(0x80, 0x90)) | {0xDE, 0xDF}
+
+
+def get_decoder(first_byte):
+    """Returns the codec for a packet starting with first_byte
+
+    Messages are always maps, so the first byte tells the format apart.
+    Falls back to JSON, which reports the errors of unknown packets.
+
+    :param first_byte: first byte of the packet
+    :type first_byte: int
+    :rtype: JsonCodec/MsgpackCodec
+    """
+    if MSGPACK_CODEC is not None and first_byte in _MSGPACK_MAP_FIRST_BYTES:
+        return MSGPACK_CODEC
+    return JSON_CODEC
@@ -0,0 +1,78 @@
+"""Binary control frames for gameControls on the local datachannel.
+
+A control frame is a fixed size little-endian packet:
+
++--------+------+-------------------------------------------------+
+| Offset | Type | Field                                           |
++========+======+=================================================+
+| 0      | u8   | CONTROL_FRAME_MAGIC                             |
++--------+------+-------------------------------------------------+
+| 1      | u16  | input index, sent to GE in robotInputs          |
++--------+------+-------------------------------------------------+
+| 3      | u8   | seat                                            |
++--------+------+-------------------------------------------------+
+| 4      | i16  | value a: x, actuator value or button bitmask    |
++--------+------+-------------------------------------------------+
+| 6      | i16  | value b: y, zero for other inputs               |
++--------+------+-------------------------------------------------+
+
+Axis values are quantized from -1.0...1.0 to -32767...32767. Button
+bitmasks use bit 0 for the switch state, 1 meaning down. The frame values
+are passed directly to Input._on_control_frame.
+
+The magic byte 0xC1 is never used in msgpack and never starts a JSON
+message, so frames can share the local socket with the other codecs.
+"""
+import struct
+from ..inputs.input import CONTROL_FRAME_AXIS_MAX
+
+CONTROL_FRAME_MAGIC = 0xC1
+CONTROL_FRAME = struct.Struct("<BHBhh")
+
+
+def quantize_axis(value):
+    """Quantize an axis value between -1.0 and 1.0 into a frame value
+
+    :param value: axis value, between -1.0 and 1.0
+    :type value: float
+    :rtype: int
+    """
+    return int(round(max(-1.0, min(1.0, value)) * CONTROL_FRAME_AXIS_MAX))
+
+
+def encode_control_frame(input_index, seat, a, b=0):
+    """Encode a control frame
+
+    :param input_index: input index from robotInputs
+    :type input_index: int
+    :param seat: Robot seat
+    :type seat: int
+    :param a: quantized x/actuator value or button bitmask
+    :type a: int
+    :param b: quantized y value, defaults to 0
+    :type b: int, optional
+    :rtype: bytes
+    """
+    return CONTROL_FRAME.pack(CONTROL_FRAME_MAGIC, input_index, seat, a, b)
+
+
+def is_control_frame(data):
+    """Returns 'True' if data is a control frame
+
+    :param data: packet
+    :type data: bytes/bytearray/memoryview
+    :rtype: bool
+    """
+    return len(data) == CONTROL_FRAME.size and data[0] == CONTROL_FRAME_MAGIC
+
+
+def decode_control_frame(data):
+    """Decode a control frame
+
+    :param data: packet, which must be a control frame
+    :type data: bytes/bytearray/memoryview
+    :return: input index, seat, value a and value b
+    :rtype: (int, int, int, int)
+    """
+    _, input_index, seat, a, b = CONTROL_FRAME.unpack_from(data)
+    return (input_index, seat, a, b)
@@ -3,6 +3,7 @@ import logging
 import sys
 import asyncio
 import functools
+from .rpc import RpcClient
 
 SOCKETIO_NAMESPACE = "/api"
 
@@ -26,6 +27,9 @@ class ApiClient(socketio.AsyncClientNamespace):
         self.connected = False
 
         self.connected_futures = []
+        # no default timeout, the requests wait for the response like
+        # before, unless request is given a timeout
+        self.rpc = RpcClient("api", timeout=None)
 
         super().__init__(SOCKETIO_NAMESPACE)
 
@@ -42,21 +46,29 @@ class ApiClient(socketio.AsyncClientNamespace):
 
     def on_disconnect(self):
         self.connected = False
+        self.rpc.fail_all("disconnected")
         self.connected_future.set_exception(Exception())
         self.connected_future = None
 
-    @staticmethod
-    def _resolve_future(future, data):
-        future.set_result(data)
-
-    async def request(self, event, data):
-        future = asyncio.get_running_loop().create_future()
-        await self.emit(
-            "message",
-            {"event": event, "payload": data},
-            callback=functools.partial(self._resolve_future, future),
-        )
-        return await future
+    async def request(self, event, data, timeout=None):
+        """Send a request and wait for the response
+
+        :param timeout: response timeout in seconds, defaults to None
+            (wait until the response or a disconnect)
+        :type timeout: float, optional
+        :raises RpcTimeoutError: if timeout was given and the response did
+            not arrive in time
+        :raises RpcError: if disconnected before the response
+        """
+
+        async def send(request_id):
+            await self.emit(
+                "message",
+                {"event": event, "payload": data},
+                callback=functools.partial(self.rpc.resolve, request_id),
+            )
+
+        return await self.rpc.request(send, timeout)
 
     async def on_message(self):
         pass
@@ -1,8 +1,15 @@
 """This module implements different types of message routing strategies."""
 import logging
 import asyncio
+import functools
+import time
+import traceback
+from collections import deque
+from .tracing import TRACER
+from ..inputs.input_filters import FilterChain
 from ..inputs.input import Input
 from dataclasses import dataclass
+from typing import Optional
 
 SRC_GAME_ENGINE = "gameEngine"
 EVENT_NEW_PEER = "newPeer"
@@ -12,12 +19,25 @@ EVENT_DISABLE_ROUTING = "disableRouting"
 EVENT_GAME_CONTROLS = "gameControls"
 EVENT_PING = "ping"
 EVENT_ROBOT_LOG = "robotLog"
+# inputs of a seat are reset when no peer messages arrive in this time
+WATCHDOG_TIMEOUT = 5
+# maximum number of commands waiting for an input which keeps all commands,
+# the oldest are dropped first
+INPUT_MAILBOX_MAX_SIZE = 64
+# resets which take longer are logged, and the rest of the game continues
+INPUT_RESET_TIMEOUT = 5
+# an input worker waits this long for new commands before it exits
+INPUT_WORKER_IDLE_TIMEOUT = 1
+# seats are 0...MAX_SEATS - 1, as the seat bitsets grow with the seat
+MAX_SEATS = 4096
 
 
 @dataclass
 class InputBinding:
     dev: Input
     admin: bool
+    dev_id: str
+    filters: Optional[FilterChain] = None
 
 
 @dataclass
@@ -26,6 +46,148 @@ class SeatStatus:
     clientType: str
 
 
+@dataclass
+class PeerRoute:
+    """Precompiled routing of a peer, see MultiSeatMessageRouter"""
+
+    seat: int
+    admin: bool
+    enabled: bool
+
+
+class SeatTable:
+    """Known, enabled and admin seats as bitsets
+
+    Enabling or disabling all the seats is a single integer operation,
+    regardless of the number of seats. Seats are integers from 0 to
+    MAX_SEATS - 1.
+    """
+
+    def __init__(self):
+        self.known = 0
+        self.enabled = 0
+        self.admin = 0
+
+    def __contains__(self, seat):
+        return type(seat) is int and seat >= 0 and (self.known >> seat) & 1
+
+    def __iter__(self):
+        return iter(self._seats(self.known))
+
+    def __len__(self):
+        return bin(self.known).count("1")
+
+    @staticmethod
+    def _seats(mask):
+        seats = []
+        seat = 0
+        while mask:
+            if mask & 1:
+                seats.append(seat)
+            mask >>= 1
+            seat += 1
+        return seats
+
+    def add(self, seat, admin):
+        """Adds a seat, or updates its admin status
+
+        New seats are disabled.
+
+        :param seat: Robot seat
+        :type seat: int
+        :param admin: Defines if the seat is used by an admin
+        :type admin: bool
+        :raises ValueError: if the seat is not an int from 0 to
+            MAX_SEATS - 1
+        """
+        if type(seat) is not int or not 0 <= seat < MAX_SEATS:
+            raise ValueError(
+                f"seat must be an int from 0 to {MAX_SEATS - 1}, not {seat!r}"
+            )
+        bit = 1 << seat
+        self.known |= bit
+        if admin:
+            self.admin |= bit
+        else:
+            self.admin &= ~bit
+
+    def is_enabled(self, seat):
+        return bool((self.enabled >> seat) & 1)
+
+    def is_admin(self, seat):
+        return bool((self.admin >> seat) & 1)
+
+    def set_enabled(self, seat, enabled):
+        """Sets the enabled status of a known seat
+
+        :param seat: Robot seat
+        :type seat: int
+        :param enabled: Enabled status to set
+        :type enabled: bool
+        :raises KeyError: if the seat is not known
+        """
+        if seat not in self:
+            raise KeyError(seat)
+        if enabled:
+            self.enabled |= 1 << seat
+        else:
+            self.enabled &= ~(1 << seat)
+
+    def set_enabled_all(self, enabled):
+        """Sets the enabled status of all the known seats
+
+        :param enabled: Enabled status to set
+        :type enabled: bool
+        """
+        self.enabled = self.known if enabled else 0
+
+
+async def run_input_calls(calls, timeout, action):
+    """Runs input calls concurrently, and waits for them at most timeout
+
+    Calls which fail or do not finish in time are logged. The unfinished
+    calls are not cancelled, so that the devices are not left in the
+    middle of an operation.
+
+    :param calls: (input id, seat, coroutine) tuples
+    :type calls: iterable
+    :param timeout: maximum time to wait in seconds
+    :type timeout: int or float
+    :param action: action name for logging, for example 'reset'
+    :type action: str
+    :return: (input id, seat) of the calls which finished successfully
+    :rtype: list[tuple]
+    """
+    tasks = {
+        asyncio.ensure_future(coroutine): (input_id, seat)
+        for input_id, seat, coroutine in calls
+    }
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    finished = []
+    for task in done:
+        if task.cancelled():
+            continue
+        if task.exception() is not None:
+            input_id, seat = tasks[task]
+            logging.warning(
+                f"Input '{input_id}' {action} failed for seat {seat}: "
+                f"{task.exception()!r}"
+            )
+        else:
+            finished.append(tasks[task])
+    if pending:
+        stragglers = ", ".join(
+            f"'{input_id}' (seat {seat})"
+            for input_id, seat in (tasks[task] for task in pending)
+        )
+        logging.warning(
+            f"Input {action} did not finish in {timeout}s: {stragglers}"
+        )
+    return finished
+
+
 class MessageRouter:
     """Basic message router that routes a command to the correct input.
 
@@ -43,11 +205,60 @@ class MessageRouter:
         }
 
     Additional fields may be present and will be ignored.
+
+    Inputs can also be controlled with binary control frames, which address
+    the inputs by their registration index, see handle_control_frame.
+
+    The commands are passed to the inputs through a mailbox for each seat
+    and input, which is drained by a worker task, so that a slow input
+    does not delay the other inputs. The worker waits for new commands
+    for INPUT_WORKER_IDLE_TIMEOUT seconds before it exits, so a steady
+    stream of commands is handled by a single task. If the input has
+    latest_value_only
+    set, the mailbox has only one slot, and a command which has not been
+    handled yet is replaced by the newer one.
+
+    The router keeps the last command of each seat and input, and whether
+    the input is known to be at rest after it. Resets and shutdowns skip
+    the inputs which are at rest and have skip_reset_at_rest set, see
+    call_inputs.
     """
 
     def __init__(self):
         self.inputs = {}
+        self.inputs_by_index = []
+        # (input id, input) of the inputs which are called for each seat,
+        # and of the single_seat inputs, which are called only once
+        self.seat_inputs = []
+        self.single_seat_inputs = []
+        # seat -> running reset task
         self.reset_tasks = {}
+        # seats to reset again after their running reset
+        self.queued_resets = set()
+        # (seat, input id) -> commands waiting for the input
+        self.mailboxes = {}
+        # (seat, input id) -> worker task draining the mailbox
+        self.input_workers = {}
+        # (seat, input id) of the workers which are handling commands
+        self.busy_workers = set()
+        # (seat, input id) -> future waking up the idle worker
+        self._worker_wakeups = {}
+        # futures of wait_for_inputs, completed when no worker is busy
+        self._idle_waiters = []
+        # (seat, input id) -> arguments of the last command, None after a
+        # reset
+        self.input_states = {}
+        # (seat, input id) of the inputs known to be at rest
+        self.inputs_at_rest = set()
+        # (seat, input id) -> number of posted commands, so that a reset
+        # does not mark an input at rest after a command posted during it
+        self.command_counts = {}
+        self.skipped_calls = 0
+        # seat -> watchdog deadline in event loop time
+        self.watchdog_deadlines = {}
+        self._watchdog_timer = None
+        self._watchdog_timer_at = None
+        self._loop = None
 
     async def handle_message(self, msg, seat, is_admin_msg):
         """Routes a message according to input type and id.
@@ -68,7 +279,7 @@ class MessageRouter:
 
         # We received a message from peer. Kick watchdog
         if msg.src != SRC_GAME_ENGINE:
-            self._kick_watchdog(seat, 5)
+            self._kick_watchdog(seat, WATCHDOG_TIMEOUT)
 
         if msg.event == EVENT_PING:
             return
@@ -79,12 +290,23 @@ class MessageRouter:
             logging.warning(f"Could not route message: malformed message")
             return
 
-        if input_id in self.inputs:
-            if self.inputs[input_id].admin and not is_admin_msg:
+        binding = self.inputs.get(input_id)
+        if binding is not None:
+            if binding.admin and not is_admin_msg:
                 logging.warning(f"Non-admin trying to use admin input")
                 return
-            await self.inputs[input_id].dev._on_input(
-                msg.payload["command"], seat
+            command = msg.payload["command"]
+            if binding.filters is not None and type(command) is dict:
+                command = binding.filters.filter(command, seat)
+                if command is None:
+                    return
+            self._post_command(
+                seat,
+                binding,
+                msg.received_ns,
+                binding.dev._command_at_rest(command),
+                binding.dev._on_input,
+                command,
             )
             return
         else:
@@ -96,7 +318,218 @@ class MessageRouter:
                 f"can be used to register this input during on_init."
             )
 
-    def register_input(self, dev_id, dev, admin):
+    async def handle_control_frame(
+        self, input_index, seat, a, b, is_admin, received_ns=0
+    ):
+        """Routes a binary control frame to the input by index
+
+        :param input_index: Input registration index
+        :type input_index: int
+        :param seat: Robot seat
+        :type seat: int
+        :param a: First frame value
+        :type a: int
+        :param b: Second frame value
+        :type b: int
+        :param is_admin: Defines if the frame came from an admin
+        :type is_admin: bool
+        :param received_ns: receipt time for tracing, defaults to 0
+        :type received_ns: int, optional
+        """
+        self._kick_watchdog(seat, WATCHDOG_TIMEOUT)
+
+        try:
+            binding = self.inputs_by_index[input_index]
+        except IndexError:
+            logging.warning(
+                f"Seat {seat} received a control frame for an unregistered "
+                f"input index {input_index}"
+            )
+            return
+        if binding.admin and not is_admin:
+            logging.warning("Non-admin trying to use admin input")
+            return
+        if binding.filters is not None:
+            # the filters work on commands, so fall back to the dict path
+            command = binding.dev._control_frame_to_command(a, b)
+            if command is not None:
+                command = binding.filters.filter(command, seat)
+                if command is not None:
+                    self._post_command(
+                        seat,
+                        binding,
+                        received_ns,
+                        binding.dev._command_at_rest(command),
+                        binding.dev._on_input,
+                        command,
+                    )
+                return
+        self._post_command(
+            seat,
+            binding,
+            received_ns,
+            binding.dev._control_frame_at_rest(a, b),
+            binding.dev._on_control_frame,
+            a,
+            b,
+        )
+
+    def _post_command(
+        self, seat, binding, received_ns, at_rest, method, *args
+    ):
+        """Puts a command into the mailbox of the seat and input, and wakes
+        up or starts the worker of the mailbox
+
+        :param seat: Robot seat
+        :type seat: int
+        :param binding: Input binding
+        :type binding: InputBinding
+        :param received_ns: receipt time for tracing, 0 if not known
+        :type received_ns: int
+        :param at_rest: 'True' if the command leaves the input at rest
+        :type at_rest: bool
+        :param method: Input method, called with (*args, seat)
+        :type method: function
+        """
+        key = (seat, binding.dev_id)
+        self.input_states[key] = args
+        self.command_counts[key] = self.command_counts.get(key, 0) + 1
+        if at_rest:
+            self.inputs_at_rest.add(key)
+        else:
+            self.inputs_at_rest.discard(key)
+        mailbox = self.mailboxes.get(key)
+        if mailbox is None:
+            mailbox = self.mailboxes[key] = deque()
+        if binding.dev.latest_value_only:
+            mailbox.clear()
+        elif len(mailbox) >= INPUT_MAILBOX_MAX_SIZE:
+            mailbox.popleft()
+            logging.warning(
+                f"Input '{binding.dev_id}' of seat {seat} is too slow, "
+                f"dropped the oldest command"
+            )
+        trace = (
+            (received_ns, time.perf_counter_ns()) if TRACER.enabled else None
+        )
+        mailbox.append((method, args + (seat,), trace))
+        if key in self.busy_workers:
+            return
+        self.busy_workers.add(key)
+        wakeup = self._worker_wakeups.pop(key, None)
+        if wakeup is not None:
+            wakeup.set_result(True)
+        else:
+            self.input_workers[key] = asyncio.ensure_future(
+                self._drain_mailbox(key, mailbox)
+            )
+
+    def _post_filtered(self, binding, command, seat):
+        """Posts a command which the filters passed on later"""
+        self._post_command(
+            seat,
+            binding,
+            0,
+            binding.dev._command_at_rest(command),
+            binding.dev._on_input,
+            command,
+        )
+
+    async def _drain_mailbox(self, key, mailbox):
+        """Passes the commands to the input, and waits for new commands
+        until the mailbox has been empty for INPUT_WORKER_IDLE_TIMEOUT
+
+        :param key: (seat, input id)
+        :type key: tuple
+        :param mailbox: commands waiting for the input
+        :type mailbox: deque
+        """
+        loop = asyncio.get_event_loop()
+        task = asyncio.current_task()
+        wakeup = None
+        try:
+            while True:
+                while mailbox:
+                    await self._handle_command(key, *mailbox.popleft())
+                self.busy_workers.discard(key)
+                self._notify_idle()
+                wakeup = loop.create_future()
+                self._worker_wakeups[key] = wakeup
+                timer = loop.call_later(
+                    INPUT_WORKER_IDLE_TIMEOUT, self._expire_worker, key, wakeup
+                )
+                try:
+                    if not await wakeup:
+                        return
+                finally:
+                    timer.cancel()
+        finally:
+            if self._worker_wakeups.get(key) is wakeup:
+                del self._worker_wakeups[key]
+            if self.input_workers.get(key) is task:
+                del self.input_workers[key]
+                self.busy_workers.discard(key)
+                if self.mailboxes.get(key) is mailbox and not mailbox:
+                    del self.mailboxes[key]
+            self._notify_idle()
+
+    async def _handle_command(self, key, method, args, trace):
+        try:
+            if trace is None:
+                await method(*args)
+            else:
+                started_ns = time.perf_counter_ns()
+                await method(*args)
+                TRACER.record(
+                    key[1], key[0], *trace, started_ns, time.perf_counter_ns(),
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.warning(
+                f"Input '{key[1]}' of seat {key[0]} failed to handle "
+                f"a command:\n{traceback.format_exc()}"
+            )
+
+    def _expire_worker(self, key, wakeup):
+        """Stops an idle worker, called by its idle timer"""
+        if self._worker_wakeups.get(key) is wakeup:
+            del self._worker_wakeups[key]
+            wakeup.set_result(False)
+
+    def _notify_idle(self):
+        if self.busy_workers or not self._idle_waiters:
+            return
+        for waiter in self._idle_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._idle_waiters = []
+
+    def clear_pending_commands(self, seat=None):
+        """Drops the commands which the inputs have not handled yet, and
+        clears the input filter and input state
+
+        :param seat: Robot seat, defaults to None (all seats)
+        :type seat: int/None, optional
+        """
+        for key, mailbox in self.mailboxes.items():
+            if (seat is None or key[0] == seat) and mailbox:
+                mailbox.clear()
+                # the input was left where the last handled command put it
+                self.inputs_at_rest.discard(key)
+        for binding in self.inputs.values():
+            if binding.filters is not None:
+                binding.filters.reset(seat)
+            binding.dev._reset(seat)
+
+    async def wait_for_inputs(self):
+        """Waits until the inputs have handled all the commands"""
+        while self.busy_workers:
+            waiter = asyncio.get_event_loop().create_future()
+            self._idle_waiters.append(waiter)
+            await waiter
+
+    def register_input(self, dev_id, dev, admin, filters=None):
         """Registers a callback for route
 
         :param dev_id: Input device id
@@ -105,8 +538,138 @@ class MessageRouter:
         :type dev: Input
         :param admin: Describes if the input is for admin use only
         :type admin: bool
+        :param filters: Filters to run before the input, defaults to None
+        :type filters: FilterChain/None, optional
+        :return: Input index for binary control frames
+        :rtype: int
+        """
+        binding = InputBinding(dev, admin, dev_id, filters)
+        if filters is not None:
+            filters.set_output(functools.partial(self._post_filtered, binding))
+        if dev_id in self.inputs:
+            index = self.inputs_by_index.index(self.inputs[dev_id])
+            self.inputs_by_index[index] = binding
+        else:
+            index = len(self.inputs_by_index)
+            self.inputs_by_index.append(binding)
+        self.inputs[dev_id] = binding
+        self.seat_inputs = [
+            (input_id, binding.dev)
+            for input_id, binding in self.inputs.items()
+            if not binding.dev.single_seat
+        ]
+        self.single_seat_inputs = [
+            (input_id, binding.dev)
+            for input_id, binding in self.inputs.items()
+            if binding.dev.single_seat
+        ]
+        return index
+
+    def get_seat_inputs(self, seats):
+        """Returns the inputs to call for the seats
+
+        The single_seat inputs are returned only once, with the first seat.
+
+        :param seats: Robot seats
+        :type seats: list
+        :return: (input id, seat, input) tuples
+        :rtype: list[tuple]
+        """
+        if not seats:
+            return []
+        seat_inputs = [
+            (input_id, seats[0], dev)
+            for input_id, dev in self.single_seat_inputs
+        ]
+        for seat in seats:
+            seat_inputs.extend(
+                (input_id, seat, dev) for input_id, dev in self.seat_inputs
+            )
+        return seat_inputs
+
+    def get_input_states(self, seat=None):
+        """Returns the last commands of the inputs, and whether the inputs
+        are at rest after them
+
+        The command is None if the input has been reset after the last
+        command.
+
+        :param seat: Robot seat, defaults to None (all seats)
+        :type seat: int/None, optional
+        :return: {seat: {input id: {"command": command, "at_rest": bool}}}
+        :rtype: dict
         """
-        self.inputs[dev_id] = InputBinding(dev, admin)
+        states = {}
+        for key, args in self.input_states.items():
+            if seat is not None and key[0] != seat:
+                continue
+            binding = self.inputs.get(key[1])
+            if args is None or binding is None:
+                command = None
+            elif len(args) == 1:
+                command = args[0]
+            else:
+                command = binding.dev._control_frame_to_command(*args)
+                if command is None:
+                    command = {"a": args[0], "b": args[1]}
+            states.setdefault(key[0], {})[key[1]] = {
+                "command": command,
+                "at_rest": key in self.inputs_at_rest,
+            }
+        return states
+
+    def _can_skip(self, input_id, seats, dev, action):
+        """Returns 'True' if the reset or shutdown of the input would not
+        change anything, as it is at rest for all the seats
+
+        Only inputs with skip_reset_at_rest are skipped, and shutdowns only
+        for inputs which shut down by resetting.
+        """
+        if not dev.skip_reset_at_rest:
+            return False
+        if action == "shutdown" and type(dev).shutdown is not Input.shutdown:
+            return False
+        for seat in seats:
+            key = (seat, input_id)
+            if key not in self.inputs_at_rest or key in self.busy_workers:
+                return False
+        return True
+
+    async def call_inputs(self, seats, action):
+        """Resets or shuts down the inputs of the seats concurrently
+
+        The commands which the inputs have not handled yet are dropped. The
+        inputs which are at rest after their last command or reset are
+        skipped, if they have skip_reset_at_rest set. The inputs are marked
+        at rest after the call, unless a command was posted to them during
+        it. Inputs which do not finish in INPUT_RESET_TIMEOUT seconds
+        are logged and not waited for.
+
+        :param seats: Robot seats
+        :type seats: list[int]
+        :param action: 'reset' or 'shutdown'
+        :type action: str
+        """
+        for seat in seats:
+            self.clear_pending_commands(seat)
+        calls = []
+        # (input id, seat) -> command counts of the keys when called
+        called_counts = {}
+        for input_id, seat, dev in self.get_seat_inputs(seats):
+            input_seats = seats if dev.single_seat else (seat,)
+            if self._can_skip(input_id, input_seats, dev, action):
+                self.skipped_calls += 1
+                continue
+            keys = [(input_seat, input_id) for input_seat in input_seats]
+            called_counts[(input_id, seat)] = [
+                (key, self.command_counts.get(key)) for key in keys
+            ]
+            calls.append((input_id, seat, getattr(dev, action)(seat)))
+        for call in await run_input_calls(calls, INPUT_RESET_TIMEOUT, action):
+            for key, count in called_counts[call]:
+                if self.command_counts.get(key) == count:
+                    self.input_states[key] = None
+                    self.inputs_at_rest.add(key)
 
     def trigger_watchdog_reset(self, seat):
         """Resets inputs and clears watchdog for given seat immediately
@@ -114,38 +677,111 @@ class MessageRouter:
         :param seat: Robot seat
         :type seat: int
         """
-        self._kick_watchdog(seat, 0)
+        self.trigger_watchdog_resets((seat,))
+
+    def trigger_watchdog_resets(self, seats):
+        """Resets inputs and clears watchdog for given seats immediately
+
+        The seats are reset concurrently in a single task.
+
+        :param seats: Robot seats
+        :type seats: iterable
+        """
+        for seat in seats:
+            self.watchdog_deadlines.pop(seat, None)
+        self._start_resets(seats)
 
     def _kick_watchdog(self, seat, timeout):
         """Kicks watchdog for the specified seat
 
-        Cancels the old reset task if one is defined,
-        replacing it with a new one.
+        Only moves the deadline of the seat. A single timer is running
+        for the earliest deadline of all seats, and it is rescheduled only
+        if the new deadline is earlier.
+
         :param seat: Robot seat
         :type seat: int
         :param timeout: time to wait before resetting inputs
         :type timeout: int or float
         """
-        if seat in self.reset_tasks:
-            reset_task = self.reset_tasks[seat]
-            if not reset_task.cancelled():
-                self.reset_tasks[seat].cancel()
-        self.reset_tasks[seat] = asyncio.create_task(
-            self._reset_all_timeout(seat, timeout)
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        deadline = self._loop.time() + timeout
+        self.watchdog_deadlines[seat] = deadline
+        if self._watchdog_timer is None or deadline < self._watchdog_timer_at:
+            self._schedule_watchdog(deadline)
+
+    def _schedule_watchdog(self, deadline):
+        if self._watchdog_timer is not None:
+            self._watchdog_timer.cancel()
+        self._watchdog_timer_at = deadline
+        self._watchdog_timer = self._loop.call_at(
+            deadline, self._on_watchdog_timer
         )
 
-    async def _reset_all_timeout(self, seat, timeout):
-        """Resets all inputs for the specified seat after the timeout
+    def _on_watchdog_timer(self):
+        """Resets the seats whose deadline has passed, and schedules the
+        timer for the next deadline"""
+        self._watchdog_timer = None
+        now = self._loop.time()
+        expired = [
+            seat
+            for seat, deadline in self.watchdog_deadlines.items()
+            if deadline <= now
+        ]
+        for seat in expired:
+            del self.watchdog_deadlines[seat]
+        if expired:
+            self._start_resets(expired)
+        if self.watchdog_deadlines:
+            self._schedule_watchdog(min(self.watchdog_deadlines.values()))
 
-        :param seat: Robot seat
-        :type seat: int
-        :param timeout: Time to sleep before resetting inputs
-        :type timeout: int or float
+    def _start_resets(self, seats):
+        """Resets the inputs of the seats in a task
+
+        The seats which are being reset already are reset once more after
+        the running reset, as the commands handled during it may have left
+        the inputs active.
+
+        :param seats: Robot seats
+        :type seats: iterable
         """
-        await asyncio.sleep(timeout)
-        for route in self.inputs.values():
-            await route.dev.reset(seat)
-        logging.info(f"All inputs reset for seat {seat}")
+        new_seats = []
+        for seat in seats:
+            if seat in self.reset_tasks:
+                self.queued_resets.add(seat)
+            else:
+                new_seats.append(seat)
+        if not new_seats:
+            return
+        task = asyncio.ensure_future(self._reset_all(new_seats))
+        for seat in new_seats:
+            self.reset_tasks[seat] = task
+
+        def on_resets_done(_):
+            queued = []
+            for seat in new_seats:
+                if self.reset_tasks.get(seat) is task:
+                    del self.reset_tasks[seat]
+                if seat in self.queued_resets:
+                    self.queued_resets.discard(seat)
+                    queued.append(seat)
+            if queued:
+                self._start_resets(queued)
+
+        task.add_done_callback(on_resets_done)
+
+    async def _reset_all(self, seats):
+        """Resets all inputs for the specified seats concurrently
+
+        The commands which the inputs have not handled yet are dropped, and
+        the inputs which are at rest are skipped if they set
+        skip_reset_at_rest.
+
+        :param seats: Robot seats
+        :type seats: list[int]
+        """
+        await self.call_inputs(seats, "reset")
+        logging.info(f"All inputs reset for seats {seats}")
 
 
 class MultiSeatMessageRouter:
@@ -175,6 +811,10 @@ class MultiSeatMessageRouter:
     engine has sent the message. If gameEngine wants to send a message to
     specific seat, `seat` field can be used for that.
 
+    The seat, admin status and enabled status of each peer are compiled
+    into a PeerRoute, which is rebuilt only when the routing changes, so
+    routing a peer message takes a single lookup.
+
     :param robot_log_handler: functions that handles robot logs
     :type robot_log_handler: function
     """
@@ -182,7 +822,9 @@ class MultiSeatMessageRouter:
     def __init__(self, robot_log_handler):
         self.router = MessageRouter()
         self.route_mappings = {"gameEngine": "gameEngine"}
-        self.seat_statuses = {}
+        self.seat_table = SeatTable()
+        # peer id -> PeerRoute
+        self.peer_routes = {}
         self.robot_log_handler = robot_log_handler
 
     async def handle_message(self, msg):
@@ -197,27 +839,57 @@ class MultiSeatMessageRouter:
 
         if msg.event == EVENT_ROBOT_LOG:
             self.robot_log_handler(msg)
-        elif msg.src == SRC_GAME_ENGINE and msg.event != EVENT_GAME_CONTROLS:
-            await self.handle_routing_messages(msg)
+            return
+        route = self.peer_routes.get(msg.src)
+        if route is not None:
+            is_admin_msg = route.admin or msg.isAdmin
+            if is_admin_msg or route.enabled:
+                await self.router.handle_message(msg, route.seat, is_admin_msg)
+        elif msg.src == SRC_GAME_ENGINE:
+            if msg.event != EVENT_GAME_CONTROLS:
+                await self.handle_routing_messages(msg)
+            else:
+                await self.router.handle_message(msg, SRC_GAME_ENGINE, True)
         elif msg.src in self.route_mappings:
-            seat = self.route_mappings[msg.src]
-            is_admin_msg = (
-                msg.src == SRC_GAME_ENGINE
-                or self.seat_statuses[seat].clientType == "admin"
-                or msg.isAdmin
+            logging.warning(
+                f"Seat route registered but enabled status not defined. "
+                f"Message not handled: {msg}"
             )
-            if msg.src == SRC_GAME_ENGINE or seat in self.seat_statuses:
-                if is_admin_msg or self.seat_statuses[seat].enabled:
-                    await self.router.handle_message(msg, seat, is_admin_msg)
-            else:
-                logging.warning(
-                    f"Seat route registered but enabled status not defined. "
-                    f"Message not handled: {msg}"
-                )
         else:
             logging.warning(f"Received unhandleable peer message: {msg}")
 
-    def register_input(self, dev_id, dev, admin=False):
+    async def handle_control_frame(
+        self, input_index, seat, a, b, received_ns=0
+    ):
+        """Handles a binary control frame from the local datachannel
+
+        The frame carries the seat directly, so it is routed the same way
+        as a peer message from that seat.
+
+        :param input_index: Input registration index
+        :type input_index: int
+        :param seat: Robot seat
+        :type seat: int
+        :param a: First frame value
+        :type a: int
+        :param b: Second frame value
+        :type b: int
+        :param received_ns: receipt time for tracing, defaults to 0
+        :type received_ns: int, optional
+        """
+        seat_table = self.seat_table
+        if seat not in seat_table:
+            logging.warning(
+                f"Received a control frame for unknown seat {seat}"
+            )
+            return
+        is_admin_msg = seat_table.is_admin(seat)
+        if is_admin_msg or seat_table.is_enabled(seat):
+            await self.router.handle_control_frame(
+                input_index, seat, a, b, is_admin_msg, received_ns
+            )
+
+    def register_input(self, dev_id, dev, admin=False, filters=None):
         """Registers a new routing
 
         :param dev_id: Input device id
@@ -227,8 +899,12 @@ class MultiSeatMessageRouter:
         :param admin: Describes if the input is for admin use only,
         defaults to False
         :type admin: bool, optional
+        :param filters: Filters to run before the input, defaults to None
+        :type filters: FilterChain/None, optional
+        :return: Input index for binary control frames
+        :rtype: int
         """
-        self.router.register_input(dev_id, dev, admin)
+        return self.router.register_input(dev_id, dev, admin, filters)
 
     async def handle_routing_messages(self, msg):
         """Handle routing related game engine messages
@@ -247,6 +923,12 @@ class MultiSeatMessageRouter:
                     f"for new peer on msg: {msg}"
                 )
                 return True
+            if type(seat) is not int or not 0 <= seat < MAX_SEATS:
+                logging.warning(
+                    f"Registering new route failed, seat must be an int "
+                    f"from 0 to {MAX_SEATS - 1} on msg: {msg}"
+                )
+                return True
             if "clientType" in msg.payload:
                 client_type = msg.payload["clientType"]
             else:
@@ -256,10 +938,8 @@ class MultiSeatMessageRouter:
                 )
                 client_type = "player"
             self.route_mappings[msg.payload["id"]] = seat
-            if seat not in self.seat_statuses:
-                self.seat_statuses[seat] = SeatStatus(False, client_type)
-            else:
-                self.seat_statuses[seat].clientType = client_type
+            self.seat_table.add(seat, client_type == "admin")
+            self._compile_routes()
 
             admin_info = "admin " if client_type == "admin" else ""
             logging.info(
@@ -270,6 +950,7 @@ class MultiSeatMessageRouter:
             try:
                 seat = self.route_mappings[msg.payload["id"]]
                 del self.route_mappings[msg.payload["id"]]
+                self._compile_routes()
                 logging.info(f"Removed route from {msg.payload['id']}")
                 self.router.trigger_watchdog_reset(seat)
             except KeyError:
@@ -300,8 +981,10 @@ class MultiSeatMessageRouter:
         :param enabled: State to set the routings to
         :type enabled: bool
         """
-        for seat in self.seat_statuses:
-            self.set_enabled_seat(seat, enabled)
+        self.seat_table.set_enabled_all(enabled)
+        self._compile_routes()
+        if not enabled:
+            self.router.trigger_watchdog_resets(list(self.seat_table))
 
     def set_enabled_seat(self, seat, enabled):
         """Sets message routing states for the specified seat
@@ -311,14 +994,48 @@ class MultiSeatMessageRouter:
         :param enabled: State to set the routings to
         :type enabled: bool
         """
-        self.seat_statuses[seat].enabled = enabled
+        self.seat_table.set_enabled(seat, enabled)
+        self._compile_routes()
         if not enabled:
             self.router.trigger_watchdog_reset(seat)
 
+    def _compile_routes(self):
+        """Rebuilds the PeerRoute of every peer, call when route_mappings
+        or seat_table change"""
+        seat_table = self.seat_table
+        peer_routes = {}
+        for peer_id, seat in self.route_mappings.items():
+            if peer_id == SRC_GAME_ENGINE or seat not in seat_table:
+                continue
+            peer_routes[peer_id] = PeerRoute(
+                seat, seat_table.is_admin(seat), seat_table.is_enabled(seat)
+            )
+        self.peer_routes = peer_routes
+
+    @property
+    def seat_statuses(self):
+        """The enabled status and client type of every seat
+
+        Kept for compatibility, the statuses are in seat_table. The
+        returned dict is a snapshot, changing it does not change routing.
+        seat_table keeps only the admin status, so clientType is 'admin'
+        or 'player'.
+
+        :rtype: dict[int, SeatStatus]
+        """
+        seat_table = self.seat_table
+        return {
+            seat: SeatStatus(
+                seat_table.is_enabled(seat),
+                "admin" if seat_table.is_admin(seat) else "player",
+            )
+            for seat in seat_table
+        }
+
     def get_all_seats(self):
         """Returns all the seats that have routings set
 
         :return: All the seats that have routings set
         :rtype: list[int]
         """
-        return self.seat_statuses.keys()
+        return list(self.seat_table)
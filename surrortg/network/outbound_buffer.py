@@ -0,0 +1,244 @@
+"""Outbound buffer for critical game engine messages."""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import traceback
+from collections import deque
+
+# Events which must not be lost while the game engine is unreachable
+BUFFERED_EVENTS = ("scoreUpdate", "lapDone", "playingEnded")
+OUTBOUND_BUFFER_MAX_SIZE = 1000
+# replayed messages per second after reconnecting
+OUTBOUND_BUFFER_REPLAY_RATE = 10
+# replay starts after a random delay, so that robots reconnecting at the
+# same time do not replay at the same time
+OUTBOUND_BUFFER_MAX_REPLAY_DELAY = 3
+OUTBOUND_BUFFER_DEFAULT_PATH = "/var/lib/srtg/outbound_buffer.jsonl"
+_MESSAGE_KEYS = {"event", "dst", "seat", "src", "payload"}
+# stored entries have also a sequence number, older files do not
+_ENTRY_KEYS = _MESSAGE_KEYS | {"seq"}
+# records of the file marking the entry with this sequence number replayed
+_ACK_KEYS = {"ack"}
+
+
+class OutboundBuffer:
+    """Bounded buffer for messages which could not be sent
+
+    The messages are replayed in order by run(), at most replay_rate
+    messages per second. After resume() is called on reconnect, the replay
+    starts after a random delay of up to max_replay_delay seconds.
+    Equal messages, such as two lapDone messages of a seat, are all
+    replayed.
+
+    If path is given, the buffer is also kept in an append-only file,
+    which is compacted after replaying, and loaded on startup. This way
+    the messages survive also a restart of the program. Every stored
+    message gets a sequence number, and an ack record with it is appended
+    as soon as the message is replayed, so a restart in the middle of a
+    replay does not replay the already sent messages again.
+
+    store() can be called from any thread.
+
+    :param path: buffer file path, defaults to None (memory only)
+    :type path: str/None, optional
+    :param max_size: maximum number of buffered messages, the oldest are
+        dropped first, defaults to OUTBOUND_BUFFER_MAX_SIZE
+    :type max_size: int, optional
+    :param replay_rate: replayed messages per second, defaults to
+        OUTBOUND_BUFFER_REPLAY_RATE
+    :type replay_rate: float, optional
+    :param max_replay_delay: maximum random delay in seconds before
+        replaying, defaults to OUTBOUND_BUFFER_MAX_REPLAY_DELAY
+    :type max_replay_delay: float, optional
+    """
+
+    def __init__(
+        self,
+        path=None,
+        max_size=OUTBOUND_BUFFER_MAX_SIZE,
+        replay_rate=OUTBOUND_BUFFER_REPLAY_RATE,
+        max_replay_delay=OUTBOUND_BUFFER_MAX_REPLAY_DELAY,
+    ):
+        self.path = path
+        self._max_size = max_size
+        self._replay_interval = 1 / replay_rate
+        self._max_replay_delay = max_replay_delay
+        self._lock = threading.Lock()
+        self._entries = deque()
+        self._next_seq = 0
+        self._loop = None
+        self._wakeup = None
+        self._resumed = False
+        self.dropped = 0
+        if path is not None:
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def store(self, event, dst, seat, src=None, payload={}):
+        """Buffer a message for replaying, can be called from any thread"""
+        with self._lock:
+            entry = {
+                "seq": self._next_seq,
+                "event": event,
+                "dst": dst,
+                "seat": seat,
+                "src": src,
+                "payload": payload,
+            }
+            self._next_seq += 1
+            if len(self._entries) >= self._max_size:
+                self._entries.popleft()
+                self.dropped += 1
+                logging.warning("Outbound buffer full, dropped oldest message")
+            self._entries.append(entry)
+            self._append_to_file(entry)
+        logging.info(f"Buffered message {event} until reconnected")
+        self._notify()
+
+    def resume(self):
+        """Start replaying after a random delay, call when reconnected"""
+        self._resumed = True
+        self._notify()
+
+    def _notify(self):
+        if self._loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run(self, send):
+        """Replay the buffered messages until cancelled
+
+        :param send: coroutine function called for each message with
+            (event, dst, seat, src=src, payload=payload), returning
+            'False' if the message could not be sent
+        :type send: function
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self._entries:
+            self._wakeup.set()
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                if self._resumed:
+                    self._resumed = False
+                    await asyncio.sleep(
+                        random.uniform(0, self._max_replay_delay)
+                    )
+                await self._replay(send)
+        finally:
+            self._loop = None
+
+    async def _replay(self, send):
+        replayed = 0
+        while self._entries:
+            entry = self._entries[0]
+            message = {key: entry[key] for key in _MESSAGE_KEYS}
+            try:
+                sent = await send(**message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # retrying would block the rest of the buffer, drop it
+                logging.warning(
+                    f"Replaying message {entry['event']} failed, "
+                    f"dropping it:\n{traceback.format_exc()}"
+                )
+                sent = None
+            if sent is False:
+                break
+            with self._lock:
+                if self._entries and self._entries[0] is entry:
+                    self._entries.popleft()
+                    self._append_to_file({"ack": entry["seq"]})
+            replayed += 1
+            await asyncio.sleep(self._replay_interval)
+        if replayed > 0:
+            logging.info(f"Replayed {replayed} buffered messages")
+            with self._lock:
+                self._rewrite_file()
+
+    def _append_to_file(self, record):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not write outbound buffer file: {e}")
+
+    def _rewrite_file(self):
+        if self.path is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                for entry in self._entries:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write outbound buffer file: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.warning(f"Could not read outbound buffer file: {e}")
+            return
+        entries = []
+        acked = set()
+        # acks, old and malformed lines are compacted away, so that the
+        # sequence numbers given here are kept
+        rewrite = False
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # the last line can be partial after a power loss
+                record = None
+            keys = set(record) if isinstance(record, dict) else None
+            if keys == _ACK_KEYS and type(record["ack"]) is int:
+                acked.add(record["ack"])
+                rewrite = True
+            elif keys in (_ENTRY_KEYS, _MESSAGE_KEYS):
+                if type(record.get("seq")) is not int:
+                    record["seq"] = None
+                    rewrite = True
+                entries.append(record)
+            else:
+                logging.warning(f"Skipping malformed buffered message {line}")
+                rewrite = True
+        self._next_seq = max(
+            (e["seq"] + 1 for e in entries if e["seq"] is not None), default=0,
+        )
+        entries = [e for e in entries if e["seq"] not in acked]
+        if len(entries) > self._max_size:
+            rewrite = True
+        for entry in entries[-self._max_size :]:
+            if entry["seq"] is None:
+                entry["seq"] = self._next_seq
+                self._next_seq += 1
+            self._entries.append(entry)
+        if rewrite:
+            self._rewrite_file()
+        if self._entries:
+            logging.info(
+                f"Loaded {len(self._entries)} buffered messages "
+                f"from {self.path}"
+            )
@@ -0,0 +1,150 @@
+"""Outbound message queue drained by a single writer task."""
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+
+# Events which only carry the latest state. A pending message of these
+# events is updated in place instead of queueing a new one.
+COALESCED_EVENTS = ("progress", "scoreUpdate", "botHealthState")
+OUTBOUND_QUEUE_MAX_SIZE = 1000
+
+
+class _OutboundEntry:
+    __slots__ = ("key", "event", "dst", "seat", "src", "payload", "callback")
+
+    def __init__(self, key, event, dst, seat, src, payload, callback):
+        self.key = key
+        self.event = event
+        self.dst = dst
+        self.seat = seat
+        self.src = src
+        self.payload = payload
+        self.callback = callback
+
+
+class OutboundQueue:
+    """Bounded multi-producer queue for outbound messages
+
+    Messages can be put from any thread. Puts from the event loop thread
+    are queued directly, other threads hand the message over to the loop
+    with call_soon_threadsafe. A single writer task, started with run(),
+    sends the messages in order.
+
+    Only the latest pending progress, scoreUpdate and botHealthState
+    message per seat is sent: if an older one is still waiting in the
+    queue, its payload is replaced and the queue position is kept. Final
+    score updates and messages with callbacks are never coalesced.
+
+    :param send: coroutine function called for each message with
+        (event, dst, seat, src=src, payload=payload, callback=callback)
+    :type send: function
+    :param max_size: maximum number of queued messages, defaults to
+        OUTBOUND_QUEUE_MAX_SIZE
+    :type max_size: int, optional
+    """
+
+    def __init__(self, send, max_size=OUTBOUND_QUEUE_MAX_SIZE):
+        self._send = send
+        self._max_size = max_size
+        self._queue = deque()
+        self._pending = {}
+        self._loop = None
+        self._loop_thread_id = None
+        self._wakeup = None
+        self.coalesced = 0
+        self.dropped = 0
+
+    def put(self, event, dst, seat, src=None, payload={}, callback=None):
+        """Queue a message for sending, can be called from any thread
+
+        :return: 'False' if the writer is not running or the queue is full
+        :rtype: bool
+        """
+        if self._loop is None:
+            logging.info("Did not send message: outbound queue not running")
+            return False
+        if threading.get_ident() == self._loop_thread_id:
+            return self._put(event, dst, seat, src, payload, callback)
+        self._loop.call_soon_threadsafe(
+            self._put, event, dst, seat, src, payload, callback
+        )
+        return True
+
+    def _put(self, event, dst, seat, src, payload, callback):
+        key = self._get_coalesce_key(event, seat, payload, callback)
+        if key is not None:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry.src = src
+                entry.payload = payload
+                self.coalesced += 1
+                return True
+        elif event in COALESCED_EVENTS:
+            # newer messages must not be merged into slots queued before
+            # this one, otherwise they would be sent before it
+            self._pending = {
+                k: v for k, v in self._pending.items() if k[0] != event
+            }
+
+        if len(self._queue) >= self._max_size:
+            self.dropped += 1
+            logging.warning(
+                f"Did not send message {event}: outbound queue full"
+            )
+            return False
+
+        entry = _OutboundEntry(key, event, dst, seat, src, payload, callback)
+        if key is not None:
+            self._pending[key] = entry
+        self._queue.append(entry)
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+        return True
+
+    @staticmethod
+    def _get_coalesce_key(event, seat, payload, callback):
+        if event not in COALESCED_EVENTS or callback is not None:
+            return None
+        if event == "scoreUpdate":
+            if payload.get("endGame") or payload.get("seatEndGame"):
+                return None
+            try:
+                return (event, frozenset(payload["scores"]))
+            except (KeyError, TypeError):
+                return None
+        return (event, seat)
+
+    async def run(self):
+        """Send queued messages until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+
+                entry = self._queue.popleft()
+                if self._pending.get(entry.key) is entry:
+                    del self._pending[entry.key]
+                try:
+                    await self._send(
+                        entry.event,
+                        entry.dst,
+                        entry.seat,
+                        src=entry.src,
+                        payload=entry.payload,
+                        callback=entry.callback,
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logging.warning(
+                        f"Sending message {entry.event} failed:\n"
+                        f"{traceback.format_exc()}"
+                    )
+        finally:
+            self._loop = None
@@ -0,0 +1,221 @@
+"""Awaitable requests with correlation ids, timeouts and latency stats.
+
+RpcClient is transport independent: the transport gives a send coroutine
+function, which sends the request with the given correlation id, and
+calls RpcClient.resolve when the response with the same id arrives.
+"""
+import asyncio
+import itertools
+import logging
+import math
+import time
+
+RPC_DEFAULT_TIMEOUT = 10
+RPC_MAX_IN_FLIGHT = 32
+# latency histogram buckets, 4 per doubling from 100 us to about 100 s
+LATENCY_HISTOGRAM_MIN = 0.0001
+LATENCY_HISTOGRAM_BUCKETS_PER_DOUBLING = 4
+LATENCY_HISTOGRAM_BUCKETS = 82
+
+
+class RpcError(Exception):
+    pass
+
+
+class RpcTimeoutError(RpcError):
+    pass
+
+
+class LatencyHistogram:
+    """Fixed memory latency histogram with logarithmic buckets
+
+    Percentiles are reported as the upper bound of the bucket, so they are
+    accurate to about 19 %, which is plenty for round-trip times.
+    """
+
+    def __init__(self):
+        self.counts = [0] * LATENCY_HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Record a latency
+
+        :param seconds: latency in seconds
+        :type seconds: float
+        """
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.counts[self._bucket(seconds)] += 1
+
+    @staticmethod
+    def _bucket(seconds):
+        if seconds <= LATENCY_HISTOGRAM_MIN:
+            return 0
+        index = 1 + int(
+            math.log2(seconds / LATENCY_HISTOGRAM_MIN)
+            * LATENCY_HISTOGRAM_BUCKETS_PER_DOUBLING
+        )
+        return min(index, LATENCY_HISTOGRAM_BUCKETS - 1)
+
+    @staticmethod
+    def _upper_bound(index):
+        return LATENCY_HISTOGRAM_MIN * 2 ** (
+            index / LATENCY_HISTOGRAM_BUCKETS_PER_DOUBLING
+        )
+
+    def percentile(self, percent):
+        """Returns the latency under which percent of the latencies are
+
+        :param percent: percentile, between 0 and 100
+        :type percent: float
+        :return: latency in seconds, None if nothing is recorded
+        :rtype: float/None
+        """
+        if self.count == 0:
+            return None
+        target = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count > 0 and seen >= target:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Returns the count, mean, p50, p95, p99 and max in a dict"""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max if self.count else None,
+        }
+
+
+class RpcClient:
+    """Matches responses to requests by correlation ids
+
+    :param name: transport name, used in logging and errors
+    :type name: str
+    :param timeout: default response timeout in seconds, defaults to
+        RPC_DEFAULT_TIMEOUT
+    :type timeout: float, optional
+    :param max_in_flight: maximum number of requests waiting for a
+        response, the rest wait for a free slot, defaults to
+        RPC_MAX_IN_FLIGHT
+    :type max_in_flight: int, optional
+    """
+
+    def __init__(
+        self,
+        name,
+        timeout=RPC_DEFAULT_TIMEOUT,
+        max_in_flight=RPC_MAX_IN_FLIGHT,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.timeouts = 0
+        self.failures = 0
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._semaphore = None
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    async def request(self, send, timeout=None, request_id=None):
+        """Send a request and wait for its response
+
+        :param send: coroutine function called with the correlation id,
+            which sends the request, and returns 'False' if it could not
+        :type send: function
+        :param timeout: response timeout in seconds, defaults to None
+            (the timeout given to the constructor)
+        :type timeout: float, optional
+        :param request_id: correlation id, defaults to None (generated)
+        :type request_id: int, optional
+        :raises RpcTimeoutError: if the response did not arrive in time
+        :raises RpcError: if the request could not be sent or the
+            transport disconnected
+        :return: response data
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if self._semaphore is None:
+            # created here to bind it to the running loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            if request_id is None:
+                request_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            self.requests += 1
+            start = time.perf_counter()
+            try:
+                if await send(request_id) is False:
+                    self.failures += 1
+                    raise RpcError(f"{self.name}: could not send request")
+                response = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise RpcTimeoutError(
+                    f"{self.name}: no response to request {request_id} "
+                    f"in {timeout}s"
+                ) from None
+            finally:
+                if self._pending.get(request_id) is future:
+                    del self._pending[request_id]
+            self.latency.record(time.perf_counter() - start)
+            return response
+
+    def resolve(self, request_id, *response):
+        """Complete the request with the response, can be used directly as
+        an acknowledgement callback with functools.partial
+
+        :param request_id: correlation id
+        :type request_id: int
+        :return: 'True' if a request was waiting for the response
+        :rtype: bool
+        """
+        future = self._pending.get(request_id)
+        if future is None or future.done():
+            logging.info(f"{self.name}: unexpected response {request_id}")
+            return False
+        if len(response) == 0:
+            future.set_result(None)
+        elif len(response) == 1:
+            future.set_result(response[0])
+        else:
+            future.set_result(response)
+        return True
+
+    def fail_all(self, reason):
+        """Fail all pending requests, call when the transport disconnects
+
+        :param reason: error message
+        :type reason: str
+        """
+        for future in self._pending.values():
+            if not future.done():
+                self.failures += 1
+                future.set_exception(RpcError(f"{self.name}: {reason}"))
+        self._pending.clear()
+
+    def stats(self):
+        """Returns the request counters and latency summary in a dict"""
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "latency": self.latency.summary(),
+        }
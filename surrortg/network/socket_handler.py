@@ -1,16 +1,27 @@
 import asyncio
 import sys
 import socket
+import functools
 import logging
-import json
+import random
+import time
 import traceback
 import socketio
-from dataclasses import dataclass, field, asdict
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, asdict
+from typing import Optional
+from .codecs import CODECS, JSON_CODEC, get_decoder
+from .control_frame import is_control_frame, decode_control_frame
+from .outbound_buffer import OutboundBuffer, BUFFERED_EVENTS
+from .outbound_queue import OutboundQueue
+from .rpc import RpcClient, RpcError
+from .tracing import TRACER, serve_stats
 
 # Socketio sleep when connecting fails.
-# Starting from MIN_SLEEP, sleep always doubles with a connection failure,
-# but it does not get larger than MAX_SLEEP
+# The first retry is fast, as most disconnects are short. After that the
+# sleep is a random value between MIN_SLEEP and three times the previous
+# sleep (decorrelated jitter), but it does not get larger than MAX_SLEEP.
+# The randomness spreads the reconnects of all robots after a GE restart.
+SOCKETIO_CONNECTION_FIRST_RETRY_MAX_SLEEP = 0.5
 SOCKETIO_CONNECTION_MIN_SLEEP = 1
 SOCKETIO_CONNECTION_MAX_SLEEP = 60
 SOCKETIO_WAIT_FOR_CONNECTED_TIMEOUT = 10
@@ -18,49 +29,182 @@ SOCKETIO_WAIT_FOR_CONNECTED_TIMEOUT = 10
 SOCKETIO_NAMESPACE = "/signaling"
 
 LOCAL_SOCKET_RECONNECT_TIMEOUT = 5
+# SEQPACKET packets are received into a preallocated buffer of this size
+LOCAL_SOCKET_BUFFER_SIZE = 65535
+# maximum number of ready packets read on one wakeup before dispatching
+LOCAL_SOCKET_MAX_BATCH = 64
+LOCAL_SOCKET_PEER = "datachannel"
+LOCAL_SOCKET_CODEC_OFFER_EVENT = "codecOffer"
+LOCAL_SOCKET_CODEC_SELECT_EVENT = "codecSelect"
+
+# the message handlers of a (src, event) pair are cached after the first
+# lookup, the cache is cleared when it grows larger than this
+MESSAGE_DISPATCH_CACHE_MAX_SIZE = 1024
 
 
 class MessageValidationError(Exception):
     pass
 
 
-@dataclass
+# Message field names and allowed types, in the constructor order
+_MESSAGE_FIELD_TYPES = (
+    ("event", (str,)),
+    ("dst", (str,)),
+    ("src", (type(None), str)),
+    ("seat", (int,)),
+    ("payload", (dict, list)),
+    ("isAdmin", (bool,)),
+)
+# default of Message payload, so that an explicit None is still rejected
+_NO_PAYLOAD = object()
+
+
 class Message:
-    event: str
-    dst: str
-    src: Optional[str] = None
-    seat: Optional[int] = 0
-    payload: Optional[Dict[Any, Any]] = field(default_factory=dict)
-    isAdmin: Optional[bool] = False
-
-    def __post_init__(self):
-        self._validate("event", self.event, str)
-        self._validate("dst", self.dst, str)
-        self._validate("src", self.src, type(None), str)
-        self._validate("seat", self.seat, int)
-        self._validate("payload", self.payload, dict, list)
-        self._validate("isAdmin", self.isAdmin, bool)
-
-    def _validate(self, name, value, *types):
-        if not isinstance(value, types):
-            raise MessageValidationError(
-                f"Message.{name} has to be of type {types}. "
-                f"Is now {type(value)} (value: {value})"
-            )
+    """Message between the robot, the game engine and the peers
+
+    A plain __slots__ class instead of a dataclass, as every inbound
+    control message and outbound update is one. Fields are validated
+    on construction, MessageValidationError is raised on wrong types.
+
+    :param event: event name
+    :type event: str
+    :param dst: recipient id
+    :type dst: str
+    :param src: sender id, defaults to None
+    :type src: str/None, optional
+    :param seat: robot seat, defaults to 0
+    :type seat: int, optional
+    :param payload: message payload, defaults to {}
+    :type payload: dict/list, optional
+    :param isAdmin: defines if the sender is an admin, defaults to False
+    :type isAdmin: bool, optional
+    """
+
+    __slots__ = (
+        "event",
+        "dst",
+        "src",
+        "seat",
+        "payload",
+        "isAdmin",
+        "received_ns",
+    )
+
+    def __init__(
+        self, event, dst, src=None, seat=0, payload=_NO_PAYLOAD, isAdmin=False,
+    ):
+        if payload is _NO_PAYLOAD:
+            payload = {}
+        self._validate(event, dst, src, seat, payload, isAdmin)
+        self.event = event
+        self.dst = dst
+        self.src = src
+        self.seat = seat
+        self.payload = payload
+        self.isAdmin = isAdmin
+        # time.perf_counter_ns() of the receipt when tracing, otherwise 0
+        self.received_ns = 0
+
+    @staticmethod
+    def _validate(event, dst, src, seat, payload, isAdmin):
+        values = (event, dst, src, seat, payload, isAdmin)
+        for (name, types), value in zip(_MESSAGE_FIELD_TYPES, values):
+            # exact type lookup first, isinstance only for subclasses
+            if type(value) not in types and not isinstance(value, types):
+                raise MessageValidationError(
+                    f"Message.{name} has to be of type {types}. "
+                    f"Is now {type(value)} (value: {value})"
+                )
 
     @classmethod
     def from_dict(cls, dictionary):
-        return cls(
-            dictionary.get("event"),
-            dictionary.get("dst"),
-            src=dictionary.get("src"),
-            seat=dictionary.get("seat", 0),
-            payload=dictionary.get("payload", {}),
-            isAdmin=dictionary.get("isAdmin", False),
-        )
+        get = dictionary.get
+        event = get("event")
+        dst = get("dst")
+        src = get("src")
+        seat = get("seat", 0)
+        payload = get("payload", {})
+        isAdmin = get("isAdmin", False)
+        # fast path for the common inbound messages, such as gameControls
+        # from peers, with exactly the expected types
+        if not (
+            type(event) is str
+            and type(dst) is str
+            and (src is None or type(src) is str)
+            and type(seat) is int
+            and type(payload) is dict
+            and type(isAdmin) is bool
+        ):
+            cls._validate(event, dst, src, seat, payload, isAdmin)
+        msg = cls.__new__(cls)
+        msg.event = event
+        msg.dst = dst
+        msg.src = src
+        msg.seat = seat
+        msg.payload = payload
+        msg.isAdmin = isAdmin
+        msg.received_ns = 0
+        return msg
 
     def to_dict(self):
-        return asdict(self)
+        """Returns the message as a dict
+
+        The payload is not copied.
+        """
+        return {
+            "event": self.event,
+            "dst": self.dst,
+            "src": self.src,
+            "seat": self.seat,
+            "payload": self.payload,
+            "isAdmin": self.isAdmin,
+        }
+
+    def _fields(self):
+        return (
+            self.event,
+            self.dst,
+            self.src,
+            self.seat,
+            self.payload,
+            self.isAdmin,
+        )
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(event={self.event!r}, "
+            f"dst={self.dst!r}, src={self.src!r}, seat={self.seat!r}, "
+            f"payload={self.payload!r}, isAdmin={self.isAdmin!r})"
+        )
+
+
+@dataclass
+class ConnectionStats:
+    """Socketio connection durations in seconds, measured from the
+    monotonic clock
+
+    An outage lasts from a disconnect to the next successful connect.
+    """
+
+    connects: int = 0
+    disconnects: int = 0
+    connect_attempts: int = 0
+    last_connect_attempts: int = 0
+    last_connect_duration: Optional[float] = None
+    last_outage_duration: Optional[float] = None
+    max_outage_duration: float = 0.0
+    total_outage_duration: float = 0.0
+
+    @property
+    def reconnects(self):
+        return max(0, self.connects - 1)
 
 
 class SocketioNamespace(socketio.AsyncClientNamespace):
@@ -79,6 +223,13 @@ class SocketioNamespace(socketio.AsyncClientNamespace):
         self.message_handler = message_handler
         self.on_connect_handler = on_connect_handler
         self.connected = False
+        self.stats = ConnectionStats()
+        self.rpc = RpcClient("socketio")
+        # created in run(), the namespace is constructed outside the loop
+        self._connected_event = None
+        self._disconnected_event = None
+        self._connecting_started = None
+        self._disconnected_at = None
         self.socketio_logger = self._get_logger(
             "socketio", socketio_logging_level
         )
@@ -112,19 +263,71 @@ class SocketioNamespace(socketio.AsyncClientNamespace):
     def on_connect(self):
         logging.info("socketio: connected")
         self.connected = True
+        self._record_connected()
+        if self._connected_event is not None:
+            self._disconnected_event.clear()
+            self._connected_event.set()
         self.on_connect_handler()
 
     def on_disconnect(self):
         logging.info("socketio: disconnected")
+        if self.connected:
+            self.stats.disconnects += 1
+            self._disconnected_at = time.monotonic()
+        self._set_disconnected()
+
+    def _set_disconnected(self):
         self.connected = False
+        self.rpc.fail_all("socketio disconnected")
+        if self._connected_event is not None:
+            self._connected_event.clear()
+            self._disconnected_event.set()
+
+    def _record_connected(self):
+        now = time.monotonic()
+        self.stats.connects += 1
+        if self._connecting_started is not None:
+            self.stats.last_connect_duration = now - self._connecting_started
+            self._connecting_started = None
+        if self._disconnected_at is not None:
+            outage = now - self._disconnected_at
+            self._disconnected_at = None
+            self.stats.last_outage_duration = outage
+            self.stats.total_outage_duration += outage
+            self.stats.max_outage_duration = max(
+                self.stats.max_outage_duration, outage
+            )
+            logging.info(f"socketio: reconnected after {outage:.2f}s outage")
 
     async def on_message(self, data, *args):
+        received_ns = time.perf_counter_ns() if TRACER.enabled else 0
         try:
             msg = Message.from_dict(data)
+            msg.received_ns = received_ns
             return await self.message_handler(msg)
         except MessageValidationError as e:
             logging.warning(f"Message validation failed: {e}")
 
+    async def request(self, msg, timeout=None):
+        """Send a message and wait for its acknowledgement
+
+        :param msg: message dict
+        :type msg: dict
+        :param timeout: acknowledgement timeout in seconds, defaults to None
+            (RpcClient default)
+        :type timeout: float, optional
+        :raises RpcTimeoutError: if not acknowledged in time
+        :raises RpcError: if not connected
+        :return: acknowledgement data
+        """
+
+        async def send(request_id):
+            return await self.send_message(
+                msg, callback=functools.partial(self.rpc.resolve, request_id)
+            )
+
+        return await self.rpc.request(send, timeout)
+
     async def send_message(self, msg, callback=None):
         try:
             await self.emit("message", data=msg, callback=callback)
@@ -133,49 +336,44 @@ class SocketioNamespace(socketio.AsyncClientNamespace):
                 f"Sending message {msg} failed, "
                 f"{SOCKETIO_NAMESPACE} not connected"
             )
+            return False
 
     async def run(self):
+        self._connected_event = asyncio.Event()
+        self._disconnected_event = asyncio.Event()
+
         # manually reconnect every time the socketio gets disconnected
         # 'await self.sio.wait()' would work with reconnection=True,
         # but it cannot be interrupted or disconnected
         while True:
             await self._connect()
 
-            # check periodically if still connected
-            while self.connected:
-                await asyncio.sleep(0.5)
+            # on_disconnect wakes this up
+            await self._disconnected_event.wait()
 
             await self.shutdown()
 
     async def _connect(self):
         logging.info("socketio: connecting...")
+        self._connecting_started = time.monotonic()
         last_exception = None
-        sleep = SOCKETIO_CONNECTION_MIN_SLEEP
+        sleep = None
+        attempts = 0
         while True:
+            self._connected_event.clear()
+            self._disconnected_event.clear()
+            attempts += 1
+            self.stats.connect_attempts += 1
             try:
-                # create client
-                self.sio = socketio.AsyncClient(
-                    logger=self.socketio_logger,
-                    engineio_logger=self.engineio_logger,
-                    reconnection=False,
-                )
-                # register connect_error handler
-                @self.sio.event(namespace=SOCKETIO_NAMESPACE)
-                def connect_error(msg):
-                    logging.error(f"GE socketio connection error: {msg}")
-                    self.connected = False
-                    if "Invalid robot token" in msg:
-                        sys.exit(2)
-
-                # register namespace
-                self.sio.register_namespace(self)
+                sio = self._get_client()
                 # connect
-                await self.sio.connect(self.url, transports="websocket")
+                await sio.connect(self.url, transports="websocket")
                 # wait that actually connects
                 await asyncio.wait_for(
                     self._wait_for_connected(),
                     timeout=SOCKETIO_WAIT_FOR_CONNECTED_TIMEOUT,
                 )
+                self.stats.last_connect_attempts = attempts
                 return
             except asyncio.CancelledError:
                 raise
@@ -192,13 +390,64 @@ class SocketioNamespace(socketio.AsyncClientNamespace):
                 else:
                     logging.warning(f"socketio: did not connect, {e}")
                     last_exception = str(e)
+                # the client must be disconnected before reusing it
+                if self.sio.connected:
+                    await self.sio.disconnect()
+                sleep = self._get_retry_sleep(sleep)
                 await asyncio.sleep(sleep)
-                sleep = min(SOCKETIO_CONNECTION_MAX_SLEEP, sleep * 2)
+
+    def _get_client(self):
+        """Returns the socketio client, which is created only once and
+        then reused for all connection attempts"""
+        if self.sio is None:
+            self.sio = socketio.AsyncClient(
+                logger=self.socketio_logger,
+                engineio_logger=self.engineio_logger,
+                reconnection=False,
+            )
+            # register connect_error handler
+            @self.sio.event(namespace=SOCKETIO_NAMESPACE)
+            def connect_error(msg):
+                logging.error(f"GE socketio connection error: {msg}")
+                self._set_disconnected()
+                if "Invalid robot token" in msg:
+                    sys.exit(2)
+
+            # register namespace
+            self.sio.register_namespace(self)
+        return self.sio
+
+    @staticmethod
+    def _get_retry_sleep(previous_sleep):
+        """Returns the sleep before the next connection attempt
+
+        :param previous_sleep: previous sleep, None before the first retry
+        :type previous_sleep: float/None
+        :rtype: float
+        """
+        if previous_sleep is None:
+            return random.uniform(0, SOCKETIO_CONNECTION_FIRST_RETRY_MAX_SLEEP)
+        return min(
+            SOCKETIO_CONNECTION_MAX_SLEEP,
+            random.uniform(
+                SOCKETIO_CONNECTION_MIN_SLEEP,
+                max(SOCKETIO_CONNECTION_MIN_SLEEP, previous_sleep) * 3,
+            ),
+        )
 
     async def _wait_for_connected(self):
         logging.info("socketio waiting for connected...")
-        while not self.connected:
-            await asyncio.sleep(0.1)
+        connected = asyncio.ensure_future(self._connected_event.wait())
+        failed = asyncio.ensure_future(self._disconnected_event.wait())
+        try:
+            await asyncio.wait(
+                [connected, failed], return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            connected.cancel()
+            failed.cancel()
+        if not self.connected:
+            raise ConnectionError(f"{SOCKETIO_NAMESPACE} connection failed")
 
     async def shutdown(self):
         logging.info("socketio shutting down...")
@@ -212,14 +461,28 @@ class LocalSocketHandler:
 
     Messages are forwarded to the message router passed when constructing a
     LocalSocketHandler.
+
+    Packets are received into one preallocated buffer. All packets that are
+    ready are read and decoded on a single wakeup, and then dispatched in
+    order. After connecting, the supported codecs are offered to the local
+    datachannel peer, which can select a faster one than JSON, see
+    surrortg.network.codecs.
+
+    Binary control frames are passed to control_frame_handler without
+    creating a Message, see surrortg.network.control_frame.
     """
 
-    def __init__(self, socket_name, message_handler):
+    def __init__(self, socket_name, message_handler, control_frame_handler):
         self.socket_name = socket_name
         self.message_handler = message_handler
+        self.control_frame_handler = control_frame_handler
         self.sock = None
         self.connected = False
         self.message_id = 0
+        self.rpc = RpcClient("local socket")
+        self.codec = JSON_CODEC
+        self._buffer = bytearray(LOCAL_SOCKET_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
 
     async def run(self):
         self.event_loop = asyncio.get_event_loop()
@@ -227,18 +490,17 @@ class LocalSocketHandler:
             await self.do_receive()
 
     async def do_receive(self):
-        """Selects socket and reads it when ready"""
+        """Waits until the socket is readable, reads all ready packets and
+        dispatches them"""
         if not self.connected:
             logging.info("Connecting..")
             await self.connect()
             logging.info("Connected: %s" % self.connected)
 
         try:
-            data = await self.event_loop.sock_recv(self.sock, 65535)
-            if len(data) == 0:
-                logging.info("Local socket disconnected")
-                self.connected = False
-                return
+            nbytes = await self.event_loop.sock_recv_into(
+                self.sock, self._buffer
+            )
         except asyncio.CancelledError:
             raise
         except Exception:
@@ -246,28 +508,62 @@ class LocalSocketHandler:
                 "Local socket disconnected unexpectedly:"
                 f"\n{traceback.format_exc()}"
             )
-            self.connected = False
+            self._set_disconnected()
             return
 
-        try:
-            parsed_data = self._parse_data(data)
-            if parsed_data is not None:
-                try:
-                    msg = Message.from_dict(parsed_data)
-                    return await self.message_handler(msg)
-                except MessageValidationError as e:
-                    logging.warning(f"Message validation failed: {e}")
-        except asyncio.CancelledError:
-            raise
-        except Exception:
-            logging.warning(
-                f"Failed to parse message: {data}\n\n{traceback.format_exc()}"
-            )
+        # the whole batch gets the receipt time of the first packet
+        received_ns = time.perf_counter_ns() if TRACER.enabled else 0
+        # the buffer is reused, so packets are decoded before the next read
+        messages = []
+        while nbytes > 0:
+            packet = self._view[:nbytes]
+            if is_control_frame(packet):
+                messages.append(decode_control_frame(packet) + (received_ns,))
+            else:
+                msg = self._parse_message(packet)
+                if msg is not None:
+                    msg.received_ns = received_ns
+                    messages.append(msg)
+            if len(messages) >= LOCAL_SOCKET_MAX_BATCH:
+                break
+            try:
+                nbytes = self.sock.recv_into(self._buffer)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                logging.info(
+                    "Local socket disconnected unexpectedly:"
+                    f"\n{traceback.format_exc()}"
+                )
+                nbytes = 0
+
+        for msg in messages:
+            try:
+                if type(msg) is tuple:
+                    await self.control_frame_handler(*msg)
+                else:
+                    await self.message_handler(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.warning(
+                    f"Failed to handle message: {msg}\n\n"
+                    f"{traceback.format_exc()}"
+                )
+
+        if nbytes == 0:
+            logging.info("Local socket disconnected")
+            self._set_disconnected()
+
+    def _set_disconnected(self):
+        self.connected = False
+        self.rpc.fail_all("local socket disconnected")
 
     async def connect(self):
         """Connects to the socket in an infinite loop with sleep"""
         logging.info("localsocket connect()")
         self.connected = False
+        self.codec = JSON_CODEC
         self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
         self.sock.settimeout(1)
         self.sock.setblocking(0)
@@ -283,29 +579,114 @@ class LocalSocketHandler:
                     f"Failed to connect localsocket: {traceback.format_exc()}"
                 )
                 await asyncio.sleep(LOCAL_SOCKET_RECONNECT_TIMEOUT)
+        await self._offer_codecs()
 
-    def _parse_data(self, data):
+    async def _offer_codecs(self):
+        """Offer the available codecs to the local datachannel peer
+
+        The peer answers with a codecSelect message. Peers which do not
+        support the negotiation ignore the offer, and JSON stays in use.
+        """
+        if list(CODECS) == [JSON_CODEC.name]:
+            return
+        await self.send(
+            Message(
+                LOCAL_SOCKET_CODEC_OFFER_EVENT,
+                LOCAL_SOCKET_PEER,
+                payload={"codecs": list(CODECS)},
+            ).to_dict()
+        )
+
+    def _select_codec(self, msg):
+        codec = None
+        if isinstance(msg.payload, dict):
+            codec = CODECS.get(str(msg.payload.get("codec")))
+        if codec is not None:
+            self.codec = codec
+            logging.info(f"Local socket codec: {codec.name}")
+        else:
+            logging.warning(f"Local socket peer selected unknown codec: {msg}")
+
+    def _parse_message(self, data):
+        parsed_data = self._parse_data(data)
+        if parsed_data is None:
+            return None
+        if self._is_response(parsed_data):
+            self.rpc.resolve(parsed_data["id"], parsed_data.get("payload"))
+            return None
         try:
-            return json.loads(data.decode("utf-8"))
+            msg = Message.from_dict(parsed_data)
+        except MessageValidationError as e:
+            logging.warning(f"Message validation failed: {e}")
+            return None
+        except Exception:
+            logging.warning(
+                f"Failed to parse message: {bytes(data)}\n\n"
+                f"{traceback.format_exc()}"
+            )
+            return None
+        if msg.event == LOCAL_SOCKET_CODEC_SELECT_EVENT:
+            self._select_codec(msg)
+            return None
+        return msg
 
-        except json.JSONDecodeError:
-            logging.warning(f"Received non-json message, discarding: {data}")
+    def _parse_data(self, data):
+        codec = get_decoder(data[0])
+        try:
+            return codec.decode(data)
         except UnicodeDecodeError:
             logging.warning(
-                f"Received a non-unicode message, discarding: {data}"
+                f"Received a non-unicode message, discarding: {bytes(data)}"
             )
-        except KeyError:
+        except ValueError:
             logging.warning(
-                f"Received malformed LocalSocketMessage, discarding: {data}"
+                f"Received non-{codec.name} message, discarding: "
+                f"{bytes(data)}"
             )
         return None
 
+    @staticmethod
+    def _is_response(parsed_data):
+        """Responses are wrapped like the requests, with the request id
+        and 'response': True, and have no event of their own"""
+        return (
+            type(parsed_data) is dict
+            and parsed_data.get("response") is True
+            and "event" not in parsed_data
+            and type(parsed_data.get("id")) is int
+        )
+
     async def send(self, msg):
         await self.event_loop.sock_sendall(
-            self.sock, str.encode(json.dumps(self._wrap_message(msg)))
+            self.sock, self.codec.encode(self._wrap_message(msg))
         )
 
-    def _wrap_message(self, msg):
+    async def request(self, msg, timeout=None):
+        """Send a message and wait for the peer to respond to it
+
+        The message is sent with 'response': True, and the peer responds
+        with a packet with the same id, 'response': True and the response
+        data as the payload.
+
+        :param msg: message dict
+        :type msg: dict
+        :param timeout: response timeout in seconds, defaults to None
+            (RpcClient default)
+        :type timeout: float, optional
+        :raises RpcTimeoutError: if the response did not arrive in time
+        :raises RpcError: if the local socket disconnected
+        :return: response payload
+        """
+        wrapped = self._wrap_message(msg, response=True)
+
+        async def send(request_id):
+            await self.event_loop.sock_sendall(
+                self.sock, self.codec.encode(wrapped)
+            )
+
+        return await self.rpc.request(send, timeout, request_id=wrapped["id"])
+
+    def _wrap_message(self, msg, response=False):
         # increment message_id
         if self.message_id != 0xFFFFFFFF:
             self.message_id += 1
@@ -314,7 +695,7 @@ class LocalSocketHandler:
 
         return {
             "id": self.message_id,
-            "response": False,
+            "response": response,
             "payload": msg,
         }
 
@@ -335,6 +716,13 @@ class SocketHandler:
     :param socketio_logging_level: both socketio and engineio logging level,
         None disables all logging, defaults to logging.WARNING
     :type socketio_logging_level: Int/None, optional
+    :param outbound_buffer_path: file for keeping the scoreUpdate, lapDone
+        and playingEnded messages which could not be sent yet, defaults to
+        None (kept only in memory)
+    :type outbound_buffer_path: String, optional
+    :param stats_socket_name: path to a unix socket serving the stats
+        from get_stats, defaults to None (not served)
+    :type stats_socket_name: String, optional
     """
 
     def __init__(
@@ -343,10 +731,20 @@ class SocketHandler:
         query={},
         local_socket_name=None,
         socketio_logging_level=logging.WARNING,
+        outbound_buffer_path=None,
+        stats_socket_name=None,
     ):
+        self.stats_socket_name = stats_socket_name
         self.connect_callbacks = []
-        self.callbacks = []
+        # stats key -> function returning the stats, see get_stats
+        self.stats_callbacks = {}
+        # (src, event) -> [(registration order, cb, create_task)],
+        # None matches any src or event
+        self.callbacks = {}
+        self.control_frame_callback = None
         self.response_callbacks = {}
+        self._dispatch_cache = {}
+        self._registrations = 0
         self.socketio_namespace = SocketioNamespace(
             SOCKETIO_NAMESPACE,
             url,
@@ -359,49 +757,199 @@ class SocketHandler:
         self.local_socket_handler = (
             None
             if local_socket_name is None
-            else LocalSocketHandler(local_socket_name, self._handle_message)
+            else LocalSocketHandler(
+                local_socket_name,
+                self._handle_message,
+                self._handle_control_frame,
+            )
         )
+        self.outbound_queue = OutboundQueue(self.send_socketio)
+        self.outbound_buffer = OutboundBuffer(outbound_buffer_path)
 
     async def run(self):
         self.event_loop = asyncio.get_event_loop()
 
-        if self.local_socket_handler is None:
-            await self.socketio_namespace.run()
-        else:
-            await asyncio.wait(
-                [
-                    self.socketio_namespace.run(),
-                    self.local_socket_handler.run(),
-                ],
-                return_when=asyncio.FIRST_COMPLETED,
+        tasks = [
+            asyncio.create_task(self.socketio_namespace.run()),
+            asyncio.create_task(self.outbound_queue.run()),
+            asyncio.create_task(self.outbound_buffer.run(self._send_buffered)),
+        ]
+        if self.local_socket_handler is not None:
+            tasks.append(asyncio.create_task(self.local_socket_handler.run()))
+        if self.stats_socket_name is not None:
+            tasks.append(
+                asyncio.create_task(
+                    serve_stats(self.stats_socket_name, self.get_stats)
+                )
+            )
+        try:
+            done, _ = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
             )
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self):
+        """Returns the connection, request, outbound message and input
+        latency stats in a dict"""
+        namespace = self.socketio_namespace
+        stats = {
+            "connection": {
+                **asdict(namespace.stats),
+                "reconnects": namespace.stats.reconnects,
+                "connected": namespace.connected,
+            },
+            "requests": {"socketio": namespace.rpc.stats()},
+            "outbound_queue": {
+                "coalesced": self.outbound_queue.coalesced,
+                "dropped": self.outbound_queue.dropped,
+            },
+            "outbound_buffer": {
+                "size": len(self.outbound_buffer),
+                "dropped": self.outbound_buffer.dropped,
+            },
+        }
+        if self.local_socket_handler is not None:
+            stats["requests"]["local"] = self.local_socket_handler.rpc.stats()
+        if TRACER.enabled:
+            stats["inputs"] = TRACER.summary()
+        for name, cb in self.stats_callbacks.items():
+            stats[name] = cb()
+        return stats
+
+    def register_stats_cb(self, name, cb):
+        """Adds the return value of cb to get_stats under name
+
+        :param name: stats key
+        :type name: str
+        :param cb: function returning JSON serializable stats
+        :type cb: function
+        """
+        self.stats_callbacks[name] = cb
 
     def register_on_connect_cb(self, cb):
         self.connect_callbacks.append(cb)
 
     def _handle_on_connect(self):
+        self.outbound_buffer.resume()
         for cb in self.connect_callbacks:
             asyncio.create_task(cb())
 
-    def register_on_message_cb(self, cb):
-        self.callbacks.append(cb)
+    def register_on_message_cb(
+        self, cb, src=None, event=None, create_task=False
+    ):
+        """Registers a message handler
+
+        Handlers are looked up from a dispatch table indexed by
+        (src, event), and called in the registration order. By default the
+        handlers are awaited inline, so they should return quickly. Long
+        running handlers should set create_task, so that they are run in
+        their own task and do not delay the next messages.
+
+        :param cb: coroutine function called with the Message
+        :type cb: function
+        :param src: handle only messages from this sender, defaults to None
+            (any sender)
+        :type src: str/None, optional
+        :param event: handle only this event, defaults to None (any event)
+        :type event: str/None, optional
+        :param create_task: run the handler in a new task, defaults to False
+        :type create_task: bool, optional
+        """
+        self._registrations += 1
+        self.callbacks.setdefault((src, event), []).append(
+            (self._registrations, cb, create_task)
+        )
+        self._dispatch_cache.clear()
+
+    def register_on_control_frame_cb(self, cb):
+        """Registers the handler of binary control frames
+
+        :param cb: coroutine function called with
+            (input_index, seat, a, b, received_ns)
+        :type cb: function
+        """
+        self.control_frame_callback = cb
+
+    async def _handle_control_frame(
+        self, input_index, seat, a, b, received_ns
+    ):
+        if self.control_frame_callback is not None:
+            await self.control_frame_callback(
+                input_index, seat, a, b, received_ns
+            )
 
-    def register_on_message_response_cb(self, cb, responds_checker):
-        self.response_callbacks[responds_checker] = cb
+    def register_on_message_response_cb(self, cb, src=None, event=None):
+        """Registers a handler, which responds to the matching messages
+
+        The handler is awaited and its return value is sent as the
+        acknowledgement of the message. The regular handlers are not called
+        for the messages which have a response handler.
+
+        :param cb: coroutine function called with the Message
+        :type cb: function
+        :param src: respond only to messages from this sender, defaults to
+            None (any sender)
+        :type src: str/None, optional
+        :param event: respond only to this event, defaults to None
+            (any event)
+        :type event: str/None, optional
+        """
+        self.response_callbacks[(src, event)] = cb
+        self._dispatch_cache.clear()
 
     async def _handle_message(self, msg):
+        response_callback, callbacks = self._get_callbacks(msg.src, msg.event)
         # use the correct response callback if exists
-        response_callback = self._get_response_callback(msg)
         if response_callback is not None:
             return await response_callback(msg)
         # otherwise use the regular callbacks
-        for cb in self.callbacks:
-            asyncio.create_task(cb(msg))
+        for cb, create_task in callbacks:
+            if create_task:
+                asyncio.create_task(cb(msg))
+                continue
+            try:
+                await cb(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.warning(
+                    f"Failed to handle message: {msg}\n\n"
+                    f"{traceback.format_exc()}"
+                )
 
-    def _get_response_callback(self, msg):
-        for checker, cb in self.response_callbacks.items():
-            if checker(msg):
-                return cb
+    def _get_callbacks(self, src, event):
+        """Returns the response callback and the regular callbacks for
+        (src, event), the exact matches first and the wildcards last
+
+        :rtype: (function/None, tuple)
+        """
+        key = (src, event)
+        cached = self._dispatch_cache.get(key)
+        if cached is not None:
+            return cached
+        keys = ((src, event), (src, None), (None, event), (None, None))
+        response_callback = None
+        for k in keys:
+            if k in self.response_callbacks:
+                response_callback = self.response_callbacks[k]
+                break
+        registrations = sorted(
+            registration
+            for k in set(keys)
+            for registration in self.callbacks.get(k, ())
+        )
+        cached = (
+            response_callback,
+            tuple((cb, create_task) for _, cb, create_task in registrations),
+        )
+        if len(self._dispatch_cache) >= MESSAGE_DISPATCH_CACHE_MAX_SIZE:
+            self._dispatch_cache.clear()
+        self._dispatch_cache[key] = cached
+        return cached
 
     def _create_message(self, event, dst, seat, src=None, payload={}):
         return Message(
@@ -411,28 +959,108 @@ class SocketHandler:
     async def send_socketio(
         self, event, dst, seat, src=None, payload={}, callback=None
     ):
+        if self._store_if_buffered(event, dst, seat, src, payload):
+            return False
         if self._socketio_ok():
             msg = self._create_message(
                 event, dst, seat, src=src, payload=payload
             )
-            await self.socketio_namespace.send_message(msg, callback=callback)
+            sent = await self.socketio_namespace.send_message(
+                msg, callback=callback
+            )
+            if sent is False and event in BUFFERED_EVENTS:
+                self.outbound_buffer.store(
+                    event, dst, seat, src=src, payload=payload
+                )
+            return sent
         else:
             return False
 
+    async def request_socketio(
+        self, event, dst, seat, src=None, payload={}, timeout=None
+    ):
+        """Send a socketio message and wait for its acknowledgement
+
+        scoreUpdate, lapDone and playingEnded messages are buffered and
+        RpcError is raised if they are not acknowledged, also when the
+        sending failed or timed out while connected. A message which timed
+        out can reach the game engine twice.
+
+        :param timeout: acknowledgement timeout in seconds, defaults to None
+            (RpcClient default)
+        :type timeout: float, optional
+        :raises RpcTimeoutError: if not acknowledged in time
+        :raises RpcError: if not connected
+        :return: acknowledgement data
+        """
+        if self._store_if_buffered(event, dst, seat, src, payload):
+            raise RpcError(f"{event} buffered until reconnected")
+        msg = self._create_message(event, dst, seat, src=src, payload=payload)
+        try:
+            return await self.socketio_namespace.request(msg, timeout)
+        except RpcError as e:
+            if event in BUFFERED_EVENTS:
+                self.outbound_buffer.store(
+                    event, dst, seat, src=src, payload=payload
+                )
+            raise e
+
+    async def request_local(
+        self, event, dst, seat, src=None, payload={}, timeout=None
+    ):
+        """Send a local socket message and wait for the peer to respond
+
+        :param timeout: response timeout in seconds, defaults to None
+            (RpcClient default)
+        :type timeout: float, optional
+        :raises RpcTimeoutError: if the response did not arrive in time
+        :raises RpcError: if the local socket is not connected
+        :return: response payload
+        """
+        if not self._local_socket_ok():
+            raise RpcError("local socket not connected")
+        msg = self._create_message(event, dst, seat, src=src, payload=payload)
+        return await self.local_socket_handler.request(msg, timeout)
+
+    async def _send_buffered(self, event, dst, seat, src=None, payload={}):
+        if not self.socketio_namespace.connected:
+            return False
+        msg = self._create_message(event, dst, seat, src=src, payload=payload)
+        return await self.socketio_namespace.send_message(msg)
+
+    def _store_if_buffered(self, event, dst, seat, src, payload):
+        """Buffer critical messages while disconnected
+
+        Also while older messages are still waiting to be replayed,
+        so that the messages arrive in order.
+
+        :return: 'True' if the message was buffered
+        :rtype: bool
+        """
+        if event not in BUFFERED_EVENTS or (
+            self.socketio_namespace.connected
+            and len(self.outbound_buffer) == 0
+        ):
+            return False
+        self.outbound_buffer.store(event, dst, seat, src=src, payload=payload)
+        return True
+
     def send_socketio_threadsafe(
         self, event, dst, seat, src=None, payload={}, callback=None
     ):
+        """Queue a socketio message, can be called from any thread
+
+        The message is sent by the outbound queue writer task. Pending
+        progress, scoreUpdate and botHealthState messages are replaced
+        by newer ones, see OutboundQueue. scoreUpdate, lapDone and
+        playingEnded messages are buffered while disconnected and sent
+        after reconnecting, see OutboundBuffer.
+        """
+        if self._store_if_buffered(event, dst, seat, src, payload):
+            return False
         if self._socketio_ok():
-            asyncio.run_coroutine_threadsafe(
-                self.send_socketio(
-                    event,
-                    dst,
-                    seat,
-                    src=src,
-                    payload=payload,
-                    callback=callback,
-                ),
-                self.event_loop,
+            return self.outbound_queue.put(
+                event, dst, seat, src=src, payload=payload, callback=callback
             )
         else:
             return False
@@ -514,7 +1142,7 @@ if __name__ == "__main__":
 
     socket_handler.register_on_message_cb(handle_ge_message)
     socket_handler.register_on_message_response_cb(
-        handle_ge_message, is_config
+        handle_ge_message, src="gameEngine", event="config"
     )
 
     loop = asyncio.get_event_loop()
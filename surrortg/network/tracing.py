@@ -0,0 +1,168 @@
+"""Opt-in input latency tracing and a local stats socket.
+
+When TRACER is enabled, input messages and control frames are timestamped
+when they are received from the socket, when the router dispatches them to
+an input mailbox, when the input starts handling them and when the input
+returns. The latencies are kept in fixed memory histograms per input and
+per seat:
+
+- dispatch: from receipt to the router
+- queue: waiting in the input mailbox
+- device: handling by the input
+- total: from receipt to the input returning
+
+The stats are served as JSON on a unix socket, and can be printed with:
+
+    python -m surrortg.network.tracing [SOCKET]
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+from .rpc import LatencyHistogram
+
+STATS_SOCKET_NAME = "/tmp/.srtg-stats-sock"
+TRACE_STAGES = ("dispatch", "queue", "device", "total")
+_NS_PER_SECOND = 1e9
+
+
+class Tracer:
+    """Input latency histograms, recording is enabled with enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        # input id -> {stage: LatencyHistogram}
+        self.inputs = {}
+        # seat -> LatencyHistogram of total latencies
+        self.seats = {}
+
+    def record(
+        self, input_id, seat, received_ns, dispatched_ns, started_ns, done_ns
+    ):
+        """Record the timestamps of a handled input command
+
+        :param input_id: Input id
+        :type input_id: str
+        :param seat: Robot seat
+        :type seat: int
+        :param received_ns: receipt time, 0 if not known
+        :type received_ns: int
+        :param dispatched_ns: time of putting into the input mailbox
+        :type dispatched_ns: int
+        :param started_ns: time when the input started handling
+        :type started_ns: int
+        :param done_ns: time when the input returned
+        :type done_ns: int
+        """
+        stages = self.inputs.get(input_id)
+        if stages is None:
+            stages = self.inputs[input_id] = {
+                stage: LatencyHistogram() for stage in TRACE_STAGES
+            }
+        if received_ns:
+            stages["dispatch"].record(
+                (dispatched_ns - received_ns) / _NS_PER_SECOND
+            )
+        else:
+            received_ns = dispatched_ns
+        stages["queue"].record((started_ns - dispatched_ns) / _NS_PER_SECOND)
+        stages["device"].record((done_ns - started_ns) / _NS_PER_SECOND)
+        total = (done_ns - received_ns) / _NS_PER_SECOND
+        stages["total"].record(total)
+        seat_histogram = self.seats.get(seat)
+        if seat_histogram is None:
+            seat_histogram = self.seats[seat] = LatencyHistogram()
+        seat_histogram.record(total)
+
+    def summary(self):
+        """Returns the latency summaries of the inputs and seats in a dict"""
+        return {
+            "inputs": {
+                input_id: {
+                    stage: histogram.summary()
+                    for stage, histogram in stages.items()
+                }
+                for input_id, stages in self.inputs.items()
+            },
+            "seats": {
+                str(seat): histogram.summary()
+                for seat, histogram in self.seats.items()
+            },
+        }
+
+    def reset(self):
+        """Forget all the recorded latencies"""
+        self.inputs = {}
+        self.seats = {}
+
+
+TRACER = Tracer()
+
+
+async def serve_stats(socket_name, get_stats):
+    """Serve stats as JSON on a unix socket until cancelled
+
+    Each connection gets the current stats, after which it is closed. If
+    the socket cannot be created, a warning is logged and the stats are
+    not served, but this still runs until cancelled, so that the other
+    tasks are not stopped.
+
+    :param socket_name: unix socket path
+    :type socket_name: str
+    :param get_stats: function returning the stats as a JSON serializable
+        dict
+    :type get_stats: function
+    """
+
+    async def handle(reader, writer):
+        try:
+            writer.write(json.dumps(get_stats(), default=str).encode())
+            await writer.drain()
+        except Exception as e:
+            logging.warning(f"Failed to send stats: {e}")
+        finally:
+            writer.close()
+
+    try:
+        try:
+            os.unlink(socket_name)
+        except FileNotFoundError:
+            pass
+        server = await asyncio.start_unix_server(handle, path=socket_name)
+    except OSError as e:
+        logging.warning(f"Could not serve stats on {socket_name}: {e}")
+        await asyncio.Event().wait()
+    logging.info(f"Serving stats on {socket_name}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        try:
+            os.unlink(socket_name)
+        except FileNotFoundError:
+            pass
+
+
+def read_stats(socket_name=STATS_SOCKET_NAME):
+    """Read the stats from the stats socket
+
+    :param socket_name: unix socket path, defaults to STATS_SOCKET_NAME
+    :type socket_name: str, optional
+    :rtype: dict
+    """
+    chunks = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_name)
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+if __name__ == "__main__":
+    socket_name = sys.argv[1] if len(sys.argv) > 1 else STATS_SOCKET_NAME
+    print(json.dumps(read_stats(socket_name), indent=2))
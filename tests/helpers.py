@@ -0,0 +1,94 @@
+"""Recording inputs and messages shared by the tests"""
+import asyncio
+from surrortg.inputs import Joystick, LinearActuator, Switch
+from surrortg.network import Message
+
+
+class RecordingJoystick(Joystick):
+    """Records the coordinates as (x, y, seat) and the resets as
+    ("reset", seat) to calls
+
+    :param reset_delay: seconds reset takes, defaults to 0
+    :type reset_delay: float, optional
+    """
+
+    def __init__(self, reset_delay=0):
+        self.calls = []
+        self.reset_delay = reset_delay
+
+    async def handle_coordinates(self, x, y, seat):
+        self.calls.append((x, y, seat))
+
+    async def reset(self, seat):
+        if self.reset_delay > 0:
+            await asyncio.sleep(self.reset_delay)
+        self.calls.append(("reset", seat))
+
+
+class RecordingSwitch(Switch):
+    """Records the calls as ("on", seat) and ("off", seat) to calls, and
+    their event loop times to times. Reset turns the switch off.
+
+    :param reset_delay: seconds reset takes, defaults to 0
+    :type reset_delay: float, optional
+    :param fail_reset: if reset raises RuntimeError instead, defaults to
+        False
+    :type fail_reset: bool, optional
+    :param single_seat: single_seat of the input, defaults to False
+    :type single_seat: bool, optional
+    """
+
+    def __init__(self, reset_delay=0, fail_reset=False, single_seat=False):
+        self.calls = []
+        self.times = []
+        self.reset_delay = reset_delay
+        self.fail_reset = fail_reset
+        self.single_seat = single_seat
+
+    async def on(self, seat):
+        self._record("on", seat)
+
+    async def off(self, seat):
+        self._record("off", seat)
+
+    async def reset(self, seat):
+        if self.reset_delay > 0:
+            await asyncio.sleep(self.reset_delay)
+        if self.fail_reset:
+            raise RuntimeError("reset failed")
+        await self.off(seat)
+
+    def _record(self, method, seat):
+        self.calls.append((method, seat))
+        self.times.append(asyncio.get_running_loop().time())
+
+
+class RecordingActuator(LinearActuator):
+    """Records the driven values as (value, seat) to values, the values
+    rounded to 6 decimals"""
+
+    def __init__(self):
+        self.values = []
+
+    async def drive_actuator(self, val, seat):
+        self.values.append((round(val, 6), seat))
+
+
+def new_peer(peer_id, seat, client_type="player"):
+    """Returns a newPeer message of the game engine"""
+    return Message(
+        "newPeer",
+        "robot",
+        src="gameEngine",
+        payload={"id": peer_id, "seat": seat, "clientType": client_type},
+    )
+
+
+def controls(input_id, command, src="peer"):
+    """Returns a gameControls message for the input"""
+    return Message(
+        "gameControls",
+        "robot",
+        src=src,
+        payload={"id": input_id, "command": command},
+    )
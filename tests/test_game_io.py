@@ -0,0 +1,51 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+from surrortg.game_io import GameIO
+from helpers import RecordingSwitch, new_peer
+
+
+class GameIOTest(unittest.TestCase):
+    @patch("surrortg.network.message_router.INPUT_RESET_TIMEOUT", 0.2)
+    def test_reset_inputs(self):
+        """Inputs should be reset concurrently, single seat inputs only
+        once, and inputs which are too slow should not be waited for"""
+        io = GameIO(
+            lambda msg: None, None, "./tests/test_config.toml", None, "test"
+        )
+        fast = RecordingSwitch(reset_delay=0.05)
+        shared = RecordingSwitch(reset_delay=0.05, single_seat=True)
+        stuck = RecordingSwitch(reset_delay=10)
+        io._can_register_inputs = True
+        io.register_inputs({"fast": fast, "shared": shared, "stuck": stuck})
+
+        async def main():
+            for seat in range(3):
+                await io._message_router.handle_message(
+                    new_peer(f"p{seat}", seat)
+                )
+            start = time.monotonic()
+            with self.assertLogs(level="WARNING") as logs:
+                await io.reset_inputs()
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertIn("'stuck' (seat 2)", logs.output[-1])
+            # the inputs do not set skip_reset_at_rest, so they are reset
+            # even though they are at rest
+            await io.reset_inputs(seat=1)
+            self.assertEqual(
+                io.get_input_states(1),
+                {
+                    1: {
+                        "fast": {"command": None, "at_rest": True},
+                        "shared": {"command": None, "at_rest": True},
+                    }
+                },
+            )
+
+        asyncio.run(main())
+        self.assertEqual(
+            sorted(fast.calls), [("off", s) for s in (0, 1, 1, 2)]
+        )
+        self.assertEqual(shared.calls, [("off", 0), ("off", 1)])
+        self.assertEqual(stuck.calls, [])
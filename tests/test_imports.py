@@ -16,7 +16,13 @@ class ImportTest(unittest.TestCase):
         """
 
         # DEVICES
-        from surrortg.devices.udp import UdpActuator, UdpBot, UdpCar, UdpInput
+        from surrortg.devices.udp import (
+            UdpActuator,
+            UdpBot,
+            UdpCar,
+            UdpInput,
+            UdpKeepalive,
+        )
         from surrortg.devices.udp.udp_protocol import (  # noqa:F811
             open_remote_endpoint,
             open_local_endpoint,
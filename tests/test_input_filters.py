@@ -0,0 +1,146 @@
+import unittest
+import asyncio
+from surrortg.inputs.input_filters import (
+    FilterChain,
+    RateLimit,
+    Deadzone,
+    Quantize,
+    Dedup,
+    Smoothing,
+)
+from surrortg.network import MultiSeatMessageRouter
+from helpers import RecordingJoystick, RecordingSwitch, controls, new_peer
+
+
+class InputFiltersTest(unittest.TestCase):
+    def test_rate_limit(self):
+        """Commands should be dropped per seat, except the releases"""
+        rate_limit = RateLimit(1)
+        self.assertIsNotNone(rate_limit.filter({"x": 1}, 0))
+        self.assertIsNone(rate_limit.filter({"x": 1}, 0))
+        self.assertIsNotNone(rate_limit.filter({"x": 1}, 1))
+        self.assertIsNotNone(rate_limit.filter({"x": 0, "y": 0}, 0))
+        self.assertIsNotNone(rate_limit.filter({"state": "up"}, 0))
+        rate_limit.reset(0)
+        self.assertIsNotNone(rate_limit.filter({"x": 1}, 0))
+
+    def test_rate_limit_trailing_edge(self):
+        """The latest command of a burst should be passed on once the
+        interval has passed"""
+        chain = FilterChain([RateLimit(20)])
+        passed = []
+        chain.set_output(lambda command, seat: passed.append((command, seat)))
+
+        async def main():
+            for x in (0.1, 0.2, 0.3):
+                command = chain.filter({"x": x}, 0)
+                if command is not None:
+                    passed.append((command, 0))
+            self.assertEqual(passed, [({"x": 0.1}, 0)])
+            await asyncio.sleep(0.1)
+            # a passed command cancels the deferred one
+            chain.filter({"x": 0.4}, 1)
+            chain.filter({"x": 0.5}, 1)
+            chain.filters[0].state[1] = 0
+            self.assertIsNotNone(chain.filter({"x": 0.6}, 1))
+            await asyncio.sleep(0.1)
+
+        asyncio.run(main())
+        self.assertEqual(passed, [({"x": 0.1}, 0), ({"x": 0.3}, 0)])
+
+    def test_smoothing_timer(self):
+        """Smoothing should keep approaching the last value when no new
+        commands arrive, and stop at it"""
+        chain = FilterChain([Smoothing(0.5, interval=0.005)])
+        passed = []
+        chain.set_output(lambda command, seat: passed.append(command["val"]))
+
+        async def main():
+            chain.filter({"val": 1.0}, 0)
+            self.assertEqual(chain.filter({"val": 0.5}, 0), {"val": 0.75})
+            await asyncio.sleep(0.2)
+
+        asyncio.run(main())
+        self.assertEqual(passed[0], 0.625)
+        self.assertEqual(passed[-1], 0.5)
+        self.assertEqual(passed, sorted(passed, reverse=True))
+        self.assertEqual(chain.filters[0].timers, {})
+
+    def test_value_filters(self):
+        """Deadzone, quantization and smoothing should change only the
+        numeric values"""
+        self.assertEqual(
+            Deadzone(0.1).filter({"x": 0.05, "y": -0.5, "id": 1}, 0),
+            {"x": 0, "y": -0.5, "id": 1},
+        )
+        command = {"state": "down"}
+        self.assertIs(Quantize(0.25).filter(command, 0), command)
+        self.assertEqual(Quantize(0.25).filter({"val": 0.3}, 0), {"val": 0.25})
+
+        smoothing = Smoothing(0.5)
+        self.assertEqual(smoothing.filter({"val": 1.0}, 0), {"val": 1.0})
+        self.assertEqual(smoothing.filter({"val": 0.5}, 0), {"val": 0.75})
+        self.assertEqual(smoothing.filter({"val": 0.5}, 1), {"val": 0.5})
+        self.assertEqual(smoothing.filter({"val": 0}, 0), {"val": 0})
+        self.assertEqual(smoothing.filter({"val": 0.5}, 0), {"val": 0.5})
+
+    def test_dedup(self):
+        """Identical commands should be dropped, but never releases"""
+        dedup = Dedup()
+        self.assertIsNotNone(dedup.filter({"state": "down"}, 0))
+        self.assertIsNone(dedup.filter({"state": "down"}, 0))
+        self.assertIsNotNone(dedup.filter({"state": "up"}, 0))
+        self.assertIsNotNone(dedup.filter({"state": "up"}, 0))
+
+    def test_router(self):
+        """The router should run the filter chain of each input before
+        the input, also for control frames"""
+        joystick = RecordingJoystick()
+        switch = RecordingSwitch()
+        filters = [Deadzone(0.2), Quantize(0.5), Dedup()]
+        router = MultiSeatMessageRouter(lambda msg: None)
+        router.register_input(
+            "joystick", joystick, filters=FilterChain.copy_of(filters)
+        )
+        router.register_input(
+            "button", switch, filters=FilterChain.copy_of(filters)
+        )
+
+        async def main():
+            await router.handle_message(new_peer("peer", 0))
+            router.set_enabled_all(True)
+            for x in (0.1, 0.15, 0.6, 0.55, 0.9):
+                await router.handle_message(
+                    controls("joystick", {"x": x, "y": 0})
+                )
+                await router.router.wait_for_inputs()
+            await router.handle_control_frame(1, 0, 1, 0)
+            await router.handle_control_frame(1, 0, 1, 0)
+            await router.handle_control_frame(1, 0, 0, 0)
+            await router.router.wait_for_inputs()
+
+        asyncio.run(main())
+        self.assertEqual(joystick.calls, [(0, 0, 0), (0.5, 0, 0), (1.0, 0, 0)])
+        self.assertEqual(switch.calls, [("on", 0), ("off", 0)])
+
+    def test_router_deferred(self):
+        """Commands which the filters pass on later should reach the
+        input through the router"""
+        joystick = RecordingJoystick()
+        router = MultiSeatMessageRouter(lambda msg: None)
+        router.register_input(
+            "joystick", joystick, filters=FilterChain.copy_of([RateLimit(20)])
+        )
+
+        async def main():
+            await router.handle_message(new_peer("peer", 0))
+            router.set_enabled_all(True)
+            for x in (0.1, 0.2, 0.3):
+                await router.handle_message(
+                    controls("joystick", {"x": x, "y": 0})
+                )
+            await asyncio.sleep(0.1)
+            await router.router.wait_for_inputs()
+
+        asyncio.run(main())
+        self.assertEqual(joystick.calls, [(0.1, 0, 0), (0.3, 0, 0)])
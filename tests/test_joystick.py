@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from surrortg.inputs import Joystick, Directions
 
@@ -42,3 +43,146 @@ class JoystickTest(unittest.TestCase):
         self.assertEqual(
             joystick.get_direction_8(1, -1), Directions.BOTTOM_RIGHT
         )
+
+    def test_min_amount(self):
+        """set_min_amount should change the middle threshold"""
+        joystick = TestJoystick()
+        joystick.set_min_amount(0.5)
+
+        self.assertEqual(joystick.get_direction_8(0, 0.4), Directions.MIDDLE)
+        self.assertEqual(joystick.get_direction_8(0, 0.6), Directions.TOP)
+        self.assertEqual(
+            TestJoystick().get_direction_8(0, 0.4), Directions.TOP
+        )
+
+    def test_hysteresis(self):
+        """The previous direction should be kept near the border, per seat
+        """
+        joystick = TestJoystick()
+        joystick.set_direction_hysteresis(0.1)
+
+        # 0.45 radians is past the RIGHT/TOP_RIGHT border at 0.39
+        self.assertEqual(joystick.get_direction_8(1, 0), Directions.RIGHT)
+        self.assertEqual(
+            joystick.get_direction_8(0.9, 0.435), Directions.RIGHT
+        )
+        self.assertEqual(
+            joystick.get_direction_8(0.9, 0.435, seat=1), Directions.TOP_RIGHT,
+        )
+        # 0.6 radians is past the hysteresis
+        self.assertEqual(
+            joystick.get_direction_8(0.825, 0.565), Directions.TOP_RIGHT
+        )
+        # and going back the same applies to the other direction
+        self.assertEqual(
+            joystick.get_direction_8(0.94, 0.343), Directions.TOP_RIGHT
+        )
+        self.assertEqual(
+            joystick.get_direction_8(0.969, 0.247), Directions.RIGHT
+        )
+        # the middle resets the hysteresis
+        self.assertEqual(joystick.get_direction_8(0, 0), Directions.MIDDLE)
+        self.assertEqual(joystick.get_direction_8(1, 0), Directions.RIGHT)
+
+    def test_batch(self):
+        """The batch directions should be the same as the single ones"""
+        joystick = TestJoystick()
+        values = [-1, -0.7, -0.3, -0.05, 0, 0.05, 0.3, 0.7, 1]
+        xs = [x for x in values for y in values]
+        ys = [y for x in values for y in values]
+
+        self.assertEqual(
+            joystick.get_directions_8(xs, ys),
+            [joystick.get_direction_8(x, y) for x, y in zip(xs, ys)],
+        )
+        self.assertEqual(
+            joystick.get_directions_4(xs, ys),
+            [joystick.get_direction_4(x, y) for x, y in zip(xs, ys)],
+        )
+
+
+class DirectionJoystick(Joystick):
+    def __init__(self, keepalive=None):
+        self.set_direction_mode(8, keepalive=keepalive)
+        self.directions = []
+
+    async def handle_direction(self, direction, seat):
+        self.directions.append((direction, seat))
+
+
+class DirectionModeTest(unittest.TestCase):
+    def test_changes_only(self):
+        """handle_direction should be called only when the direction of the
+        seat changes, and again after a reset"""
+        joystick = DirectionJoystick()
+
+        async def main():
+            for x, y, seat in [
+                (0, 1, 0),
+                (0.1, 0.9, 0),
+                (0, 0.5, 0),
+                (0, 1, 1),
+                (1, 0, 0),
+            ]:
+                await joystick._on_input({"x": x, "y": y}, seat)
+            joystick._reset(0)
+            await joystick._on_input({"x": 1, "y": 0}, 0)
+            await joystick._on_input({"x": 1, "y": 0}, 1)
+            await joystick.reset(1)
+
+        asyncio.run(main())
+        self.assertEqual(
+            joystick.directions,
+            [
+                (Directions.TOP, 0),
+                (Directions.TOP, 1),
+                (Directions.RIGHT, 0),
+                (Directions.RIGHT, 0),
+                (Directions.RIGHT, 1),
+                (Directions.MIDDLE, 1),
+            ],
+        )
+
+    def test_keepalive(self):
+        """The last direction should be passed again every keepalive
+        seconds without new samples, until the middle or a reset"""
+        joystick = DirectionJoystick(keepalive=0.1)
+
+        async def main():
+            await joystick._on_input({"x": 0, "y": 1}, 0)
+            await asyncio.sleep(0.25)
+            await joystick._on_input({"x": 0, "y": 0}, 0)
+            await asyncio.sleep(0.15)
+            await joystick._on_input({"x": 1, "y": 0}, 0)
+            await joystick.reset(0)
+            await asyncio.sleep(0.15)
+
+        asyncio.run(main())
+        self.assertEqual(
+            joystick.directions,
+            [(Directions.TOP, 0)] * 3
+            + [
+                (Directions.MIDDLE, 0),
+                (Directions.RIGHT, 0),
+                (Directions.MIDDLE, 0),
+            ],
+        )
+
+    def test_reset_forgets_direction(self):
+        """A direct reset should pass the next direction again"""
+        joystick = DirectionJoystick()
+
+        async def main():
+            await joystick._on_input({"x": 0, "y": 1}, 0)
+            await joystick.reset(0)
+            await joystick._on_input({"x": 0, "y": 1}, 0)
+
+        asyncio.run(main())
+        self.assertEqual(
+            joystick.directions,
+            [
+                (Directions.TOP, 0),
+                (Directions.MIDDLE, 0),
+                (Directions.TOP, 0),
+            ],
+        )
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from helpers import RecordingActuator
+
+
+class LinearActuatorTest(unittest.TestCase):
+    def test_resolution(self):
+        """Values which round to the last driven value should be skipped,
+        per seat"""
+        actuator = RecordingActuator()
+        actuator.set_output_limits(resolution=0.01)
+
+        async def main():
+            for val, seat in [
+                (0.5, 0),
+                (0.501, 0),
+                (0.501, 1),
+                (0.52, 0),
+                (-1, 0),
+            ]:
+                await actuator._on_input({"val": val}, seat)
+
+        asyncio.run(main())
+        self.assertEqual(
+            actuator.values, [(0.5, 0), (0.5, 1), (0.52, 0), (-1, 0)]
+        )
+
+    def test_max_rate(self):
+        """The first value should be driven immediately, and then only the
+        latest value after the interval"""
+        actuator = RecordingActuator()
+        actuator.set_output_limits(max_rate=20)
+
+        async def main():
+            for val in [0.1, 0.2, 0.3, 0.4]:
+                await actuator._on_input({"val": val}, 0)
+                await asyncio.sleep(0)
+            self.assertEqual(actuator.values, [(0.1, 0)])
+            await asyncio.sleep(0.1)
+
+        asyncio.run(main())
+        self.assertEqual(actuator.values, [(0.1, 0), (0.4, 0)])
+
+    def test_slew_rate(self):
+        """The actuator should move towards the value at most slew_rate per
+        second, and reset should drive 0 immediately"""
+        actuator = RecordingActuator()
+        actuator.set_output_limits(resolution=0.01, slew_rate=10)
+
+        async def main():
+            await actuator._on_input({"val": 1}, 0)
+            await asyncio.sleep(0.05)
+            self.assertGreater(len(actuator.values), 0)
+            self.assertLess(actuator.values[-1][0], 1)
+            await asyncio.sleep(0.2)
+            self.assertEqual(actuator.values[-1], (1, 0))
+
+            await actuator._on_input({"val": -1}, 0)
+            await asyncio.sleep(0.05)
+            await actuator.reset(0)
+            count = len(actuator.values)
+            await asyncio.sleep(0.05)
+            self.assertEqual(len(actuator.values), count)
+            self.assertEqual(actuator.values[-1], (0, 0))
+
+            # the slew starts from the reset value, not the stale one
+            await actuator._on_input({"val": 1}, 0)
+            await asyncio.sleep(0.05)
+            self.assertLess(actuator.values[-1][0], 1)
+            await asyncio.sleep(0.2)
+
+        asyncio.run(main())
+        values = [val for val, seat in actuator.values]
+        rising = values[: values.index(1) + 1]
+        self.assertEqual(rising, sorted(rising))
+        self.assertTrue(
+            all(b - a <= 0.5 for a, b in zip([0] + rising, rising))
+        )
@@ -20,19 +20,19 @@ class MessageTest(unittest.TestCase):
             Message("event", "dst", src=1, payload={"foo": "bar"})
         with self.assertRaises(MessageValidationError):
             Message("event", "dst", src="src", payload=1)
+        with self.assertRaises(MessageValidationError):
+            Message("event", "dst", src="src", payload=None)
 
     def test_from_dict(self):
         def _compare(dictionary):
             self.assertEqual(
-                vars(Message.from_dict(dictionary)),
-                vars(
-                    Message(
-                        dictionary["event"],
-                        dictionary["dst"],
-                        src=dictionary.get("src"),
-                        payload=dictionary.get("payload", {}),
-                    )
-                ),
+                Message.from_dict(dictionary).to_dict(),
+                Message(
+                    dictionary["event"],
+                    dictionary["dst"],
+                    src=dictionary.get("src"),
+                    payload=dictionary.get("payload", {}),
+                ).to_dict(),
             )
 
         # test allowed initializations are the same as with regular init
@@ -97,3 +97,23 @@ class MessageTest(unittest.TestCase):
                 "payload={'foo': 'bar'}, isAdmin=False)"
             ),
         )
+
+    def test_to_dict(self):
+        payload = {"foo": ["bar"]}
+        msg = Message("event", "dst", src="src", seat=2, payload=payload)
+        self.assertEqual(
+            msg.to_dict(),
+            {
+                "event": "event",
+                "dst": "dst",
+                "src": "src",
+                "seat": 2,
+                "payload": {"foo": ["bar"]},
+                "isAdmin": False,
+            },
+        )
+        # the payload is not copied
+        self.assertIs(msg.to_dict()["payload"], payload)
+        # and the dict can be parsed back to an equal message
+        self.assertEqual(Message.from_dict(msg.to_dict()), msg)
+        self.assertNotEqual(Message("event", "dst", seat=1), msg)
@@ -0,0 +1,369 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+from surrortg.network import MultiSeatMessageRouter, Message
+from surrortg.network.message_router import (
+    PeerRoute,
+    SeatStatus,
+    SeatTable,
+)
+from surrortg.network.control_frame import (
+    encode_control_frame,
+    decode_control_frame,
+    quantize_axis,
+)
+from helpers import (
+    RecordingActuator,
+    RecordingJoystick,
+    RecordingSwitch,
+    controls,
+    new_peer,
+)
+
+
+class MessageRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.router = MultiSeatMessageRouter(lambda msg: None)
+        self.joystick = RecordingJoystick()
+        self.switch = RecordingSwitch()
+        self.assertEqual(
+            self.router.register_input("joystick", self.joystick), 0
+        )
+        self.assertEqual(self.router.register_input("button", self.switch), 1)
+
+    def test_control_frames(self):
+        """Control frames should reach the typed input handlers, but only
+        for enabled seats"""
+
+        async def main():
+            await self.router.handle_message(new_peer("peer", 1))
+            frame = encode_control_frame(
+                0, 1, quantize_axis(-1.0), quantize_axis(0.5)
+            )
+            await self.router.handle_control_frame(
+                *decode_control_frame(frame)
+            )
+            self.router.set_enabled_seat(1, True)
+            await self.router.handle_control_frame(
+                *decode_control_frame(frame)
+            )
+            await self.router.handle_control_frame(1, 1, 1, 0)
+            await self.router.handle_control_frame(1, 1, 0, 0)
+            await self.router.handle_control_frame(5, 1, 0, 0)
+            await self.router.handle_control_frame(0, 2, 0, 0)
+            await self.router.router.wait_for_inputs()
+
+        asyncio.run(main())
+        self.assertEqual(len(self.joystick.calls), 1)
+        x, y, seat = self.joystick.calls[0]
+        self.assertEqual((x, seat), (-1.0, 1))
+        self.assertAlmostEqual(y, 0.5, places=4)
+        self.assertEqual(self.switch.calls, [("on", 1), ("off", 1)])
+
+    @patch("surrortg.network.message_router.INPUT_WORKER_IDLE_TIMEOUT", 0.05)
+    def test_mailboxes(self):
+        """A slow input should get only the latest value after a burst, and
+        should not delay the other inputs, which keep all commands. The
+        workers should be reused until they have been idle for a while"""
+
+        class SlowJoystick(RecordingJoystick):
+            async def handle_coordinates(self, x, y, seat):
+                await asyncio.sleep(0.02)
+                await super().handle_coordinates(x, y, seat)
+
+        slow = SlowJoystick()
+        self.router.register_input("joystick", slow)
+        router = self.router.router
+
+        async def main():
+            await self.router.handle_message(new_peer("peer", 0))
+            self.router.set_enabled_seat(0, True)
+            for i in range(5):
+                await self.router.handle_message(
+                    controls("joystick", {"x": i / 10, "y": 0})
+                )
+                await self.router.handle_message(
+                    controls(
+                        "button", {"state": "down" if i % 2 == 0 else "up"}
+                    )
+                )
+            await asyncio.sleep(0)
+            # the button is not waiting for the joystick
+            self.assertEqual(len(self.switch.calls), 5)
+            self.assertEqual(slow.calls, [])
+            await router.wait_for_inputs()
+            self.assertEqual(router.busy_workers, set())
+            worker = router.input_workers[(0, "button")]
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+                await self.router.handle_message(
+                    controls("button", {"state": "up"})
+                )
+            await router.wait_for_inputs()
+            self.assertIs(router.input_workers[(0, "button")], worker)
+            await asyncio.sleep(0.1)
+            self.assertEqual(router.mailboxes, {})
+            self.assertEqual(router.input_workers, {})
+
+        asyncio.run(main())
+        self.assertEqual(slow.calls, [(0.4, 0.0, 0)])
+        self.assertEqual(
+            self.switch.calls,
+            [("on", 0), ("off", 0), ("on", 0), ("off", 0), ("on", 0)]
+            + [("off", 0)] * 3,
+        )
+
+    def test_actuator_edges(self):
+        """A linear actuator should get all the values by default, so
+        that a press and release routed without yielding are both kept"""
+
+        shift = RecordingActuator()
+        self.router.register_input("shift", shift)
+
+        async def main():
+            await self.router.handle_message(new_peer("peer", 0))
+            self.router.set_enabled_seat(0, True)
+            for val in (1, 0, -1, 0):
+                await self.router.handle_message(
+                    controls("shift", {"val": val})
+                )
+            await self.router.router.wait_for_inputs()
+
+        asyncio.run(main())
+        self.assertEqual([val for val, seat in shift.values], [1, 0, -1, 0])
+
+    @patch("surrortg.network.message_router.WATCHDOG_TIMEOUT", 0.05)
+    def test_watchdog(self):
+        """Inputs should be reset only after the seat has been silent for
+        the watchdog timeout, and departed seats should be forgotten"""
+        router = self.router.router
+
+        async def main():
+            for _ in range(4):
+                await router.handle_message(
+                    Message("ping", "robot", src="peer1"), 1, False
+                )
+                await router.handle_message(
+                    Message("ping", "robot", src="peer2"), 2, False
+                )
+                await asyncio.sleep(0.02)
+            self.assertEqual(self.joystick.calls, [])
+            self.assertEqual(set(router.watchdog_deadlines), {1, 2})
+            for _ in range(5):
+                await router.handle_message(
+                    Message("ping", "robot", src="peer2"), 2, False
+                )
+                await asyncio.sleep(0.02)
+            self.assertEqual(self.joystick.calls, [("reset", 1)])
+            self.assertEqual(set(router.watchdog_deadlines), {2})
+            router.trigger_watchdog_reset(2)
+            await asyncio.sleep(0.1)
+            self.assertEqual(self.joystick.calls, [("reset", 1), ("reset", 2)])
+            self.assertEqual(router.watchdog_deadlines, {})
+            self.assertEqual(router.reset_tasks, {})
+
+        asyncio.run(main())
+
+    @patch("surrortg.network.message_router.INPUT_RESET_TIMEOUT", 0.1)
+    def test_disable_all(self):
+        """Disabling all seats should reset them concurrently, and not wait
+        for the resets which do not finish in time"""
+
+        class SlowResetJoystick(RecordingJoystick):
+            async def reset(self, seat):
+                await asyncio.sleep(0.05 if seat != 3 else 10)
+                await super().reset(seat)
+
+        joystick = SlowResetJoystick()
+        self.router.register_input("joystick", joystick)
+        router = self.router.router
+
+        async def main():
+            for seat in range(32):
+                await self.router.handle_message(new_peer(f"p{seat}", seat))
+            self.router.set_enabled_all(True)
+            self.assertEqual(
+                self.router.peer_routes["p5"], PeerRoute(5, False, True)
+            )
+            self.router.set_enabled_all(False)
+            self.assertFalse(self.router.peer_routes["p5"].enabled)
+            self.assertEqual(len(set(router.reset_tasks.values())), 1)
+            with self.assertLogs(level="WARNING") as logs:
+                await asyncio.wait_for(router.reset_tasks[0], 1)
+            self.assertIn("'joystick' (seat 3)", logs.output[0])
+            self.assertEqual(router.reset_tasks, {})
+
+        asyncio.run(main())
+        self.assertEqual(
+            sorted(seat for _, seat in joystick.calls),
+            [s for s in range(32) if s != 3],
+        )
+
+    def test_input_states(self):
+        """Resets should skip the inputs which are at rest after their last
+        command or reset, and the states should be queryable"""
+        router = self.router.router
+        self.joystick.skip_reset_at_rest = True
+        self.switch.skip_reset_at_rest = True
+
+        async def main():
+            await self.router.handle_message(new_peer("peer", 0))
+            self.router.set_enabled_seat(0, True)
+            await self.router.handle_message(
+                controls("joystick", {"x": 0.5, "y": 0})
+            )
+            await self.router.handle_message(
+                controls("button", {"state": "down"})
+            )
+            await self.router.handle_message(
+                controls("button", {"state": "up"})
+            )
+            await router.wait_for_inputs()
+            self.assertEqual(
+                router.get_input_states(),
+                {
+                    0: {
+                        "joystick": {
+                            "command": {"x": 0.5, "y": 0},
+                            "at_rest": False,
+                        },
+                        "button": {
+                            "command": {"state": "up"},
+                            "at_rest": True,
+                        },
+                    }
+                },
+            )
+            await router.call_inputs([0], "reset")
+            await router.call_inputs([0], "reset")
+            await self.router.handle_control_frame(1, 0, 1, 0)
+            await router.call_inputs([0], "reset")
+            self.assertEqual(
+                router.get_input_states(0)[0]["button"],
+                {"command": None, "at_rest": True},
+            )
+
+        asyncio.run(main())
+        self.assertEqual(self.joystick.calls, [(0.5, 0, 0), ("reset", 0)])
+        # the down frame was dropped by the reset before it was handled
+        self.assertEqual(
+            self.switch.calls, [("on", 0), ("off", 0), ("off", 0)]
+        )
+        self.assertEqual(router.skipped_calls, 4)
+
+    def test_command_during_reset(self):
+        """A command posted during a reset should keep the input active,
+        so that the next reset is not skipped"""
+
+        class SlowResetSwitch(RecordingSwitch):
+            skip_reset_at_rest = True
+
+            async def reset(self, seat):
+                await resume.wait()
+                resume.clear()
+                await super().off(seat)
+
+        switch = SlowResetSwitch()
+        self.router.register_input("button", switch)
+        router = self.router.router
+
+        async def main():
+            nonlocal resume
+            resume = asyncio.Event()
+            await self.router.handle_message(new_peer("peer", 0))
+            self.router.set_enabled_seat(0, True)
+            reset = asyncio.create_task(router.call_inputs([0], "reset"))
+            await asyncio.sleep(0)
+            await router.handle_control_frame(1, 0, 1, 0, False)
+            await router.wait_for_inputs()
+            resume.set()
+            await reset
+            await router.wait_for_inputs()
+            self.assertEqual(
+                router.get_input_states(0)[0]["button"],
+                {"command": {"state": "down"}, "at_rest": False},
+            )
+            resume.set()
+            await router.call_inputs([0], "reset")
+
+        resume = None
+        asyncio.run(main())
+        self.assertEqual(switch.calls, [("on", 0), ("off", 0), ("off", 0)])
+
+    def test_reset_during_reset(self):
+        """A reset requested during a running reset of the seat should be
+        run once after it"""
+        joystick = RecordingJoystick(reset_delay=0.02)
+        self.router.register_input("joystick", joystick)
+        router = self.router.router
+
+        async def main():
+            router.trigger_watchdog_reset(0)
+            await asyncio.sleep(0.01)
+            router.trigger_watchdog_resets([0, 1])
+            router.trigger_watchdog_reset(0)
+            await asyncio.sleep(0.1)
+            self.assertEqual(router.reset_tasks, {})
+            self.assertEqual(router.queued_resets, set())
+
+        asyncio.run(main())
+        self.assertEqual(
+            sorted(joystick.calls), [("reset", 0), ("reset", 0), ("reset", 1)]
+        )
+
+    def test_no_skip_by_default(self):
+        """Inputs without skip_reset_at_rest should always be reset"""
+        router = self.router.router
+
+        async def main():
+            await router.call_inputs([0], "reset")
+            await router.call_inputs([0], "reset")
+
+        asyncio.run(main())
+        self.assertEqual(self.joystick.calls, [("reset", 0), ("reset", 0)])
+        self.assertEqual(router.skipped_calls, 0)
+
+
+class SeatTableTest(unittest.TestCase):
+    def test_seat_table(self):
+        table = SeatTable()
+        table.add(0, False)
+        table.add(70, True)
+        self.assertEqual(list(table), [0, 70])
+        self.assertEqual(len(table), 2)
+        self.assertIn(70, table)
+        self.assertNotIn(1, table)
+        self.assertNotIn("gameEngine", table)
+        self.assertTrue(table.is_admin(70))
+        table.set_enabled_all(True)
+        self.assertTrue(table.is_enabled(0) and table.is_enabled(70))
+        table.set_enabled(0, False)
+        self.assertFalse(table.is_enabled(0))
+        self.assertTrue(table.is_enabled(70))
+        with self.assertRaises(KeyError):
+            table.set_enabled(1, True)
+        table.add(70, False)
+        self.assertFalse(table.is_admin(70))
+        for seat in (-1, 2 ** 31, "1"):
+            with self.assertRaises(ValueError):
+                table.add(seat, False)
+        self.assertEqual(list(table), [0, 70])
+
+    def test_seat_statuses(self):
+        """Out of range seats should be rejected, and seat_statuses should
+        still describe the seats"""
+        router = MultiSeatMessageRouter(lambda msg: None)
+
+        async def main():
+            await router.handle_message(new_peer("p1", 1))
+            await router.handle_message(new_peer("p2", 2, "admin"))
+            with self.assertLogs(level="WARNING"):
+                await router.handle_message(new_peer("p3", 2 ** 31))
+            router.set_enabled_seat(1, True)
+
+        asyncio.run(main())
+        self.assertEqual(router.get_all_seats(), [1, 2])
+        self.assertEqual(
+            router.seat_statuses,
+            {1: SeatStatus(True, "player"), 2: SeatStatus(False, "admin")},
+        )
@@ -0,0 +1,221 @@
+import asyncio
+import sys
+import time
+import unittest
+from unittest.mock import Mock
+
+try:
+    import serial  # noqa:F401
+except ImportError:
+    # the tests use a fake port, so pyserial is not needed
+    sys.modules["serial"] = Mock()
+
+from games.ninswitch.ns_gamepad_serial import (  # noqa:E402
+    MAX_PENDING_REPORTS,
+    NSButton,
+    NSGamepadSerial,
+    REPORT_STRUCT,
+)
+from games.ninswitch.ns_joystick import NSJoystick  # noqa:E402
+from games.ninswitch.ns_switch import NSSwitch  # noqa:E402
+from surrortg.inputs import Directions  # noqa:E402
+from surrortg.network import MultiSeatMessageRouter  # noqa:E402
+from helpers import controls, new_peer  # noqa:E402
+
+
+def unpack(report):
+    """Returns the buttons and the left stick axes of the report"""
+    fields = REPORT_STRUCT.unpack(report)
+    return fields[3], fields[5], fields[6]
+
+
+class NSGamepadSerialBatchTest(unittest.TestCase):
+    def setUp(self):
+        # without begin there is no writer, so the queued reports stay
+        self.nsg = NSGamepadSerial()
+        self.pending = self.nsg._pending_reports
+
+    def test_batch(self):
+        """The changes inside batch should be queued as a single report"""
+        with self.nsg.batch():
+            self.nsg.press(NSButton.A)
+            self.nsg.press(NSButton.B)
+            self.nsg.leftXAxis(0)
+            self.assertEqual(len(self.pending), 0)
+
+        self.assertEqual(
+            [unpack(report) for report in self.pending],
+            [(1 << NSButton.A | 1 << NSButton.B, 0, 128)],
+        )
+
+    def test_nested_batch(self):
+        """Only the outermost batch should queue the report"""
+        with self.nsg.batch():
+            with self.nsg.batch():
+                self.nsg.press(NSButton.A)
+            self.assertEqual(len(self.pending), 0)
+            self.nsg.press(NSButton.B)
+        self.assertEqual(
+            [unpack(report) for report in self.pending],
+            [(1 << NSButton.A | 1 << NSButton.B, 128, 128)],
+        )
+
+        # an unchanged batch does not queue anything
+        self.pending.clear()
+        with self.nsg.batch():
+            with self.nsg.batch():
+                pass
+        self.assertEqual(len(self.pending), 0)
+
+    def test_set_state(self):
+        """set_state should queue a single report, also inside batch"""
+        self.nsg.set_state(buttons=1 << NSButton.X, left=(0, 255))
+        self.assertEqual(
+            [unpack(report) for report in self.pending],
+            [(1 << NSButton.X, 0, 255)],
+        )
+
+        self.pending.clear()
+        with self.nsg.batch():
+            self.nsg.set_state(buttons=0)
+            self.nsg.set_state(buttons=1 << NSButton.Y, left=(255, 0))
+        self.assertEqual(
+            [unpack(report) for report in self.pending],
+            [(1 << NSButton.Y, 255, 0)],
+        )
+
+
+class FakePort:
+    def __init__(self):
+        self.reports = []
+        self.closed = False
+
+    def write(self, report):
+        self.reports.append(unpack(report))
+
+    def close(self):
+        self.closed = True
+
+
+class NSGamepadSerialWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.port = FakePort()
+        # 0.05 second interval between the reports
+        self.nsg = NSGamepadSerial(max_report_rate=20)
+
+    def test_short_press(self):
+        """A press and release within one interval should both be sent"""
+        self.nsg.begin(self.port)
+        self.nsg.press(NSButton.A)
+        self.nsg.release(NSButton.A)
+        time.sleep(0.2)
+        self.assertEqual(
+            self.port.reports,
+            [(0, 128, 128), (1 << NSButton.A, 128, 128), (0, 128, 128)],
+        )
+        self.nsg.end()
+
+    def test_combine_and_skip(self):
+        """Reports with the same buttons should be combined, and a report
+        identical to the previous one should not be sent"""
+        self.nsg.begin(self.port)
+        # let the writer send the report of begin
+        time.sleep(0.01)
+        self.nsg.leftXAxis(0)
+        self.nsg.leftYAxis(0)
+        self.nsg.leftXAxis(128)
+        self.nsg.leftYAxis(128)
+        time.sleep(0.2)
+        self.assertEqual(self.port.reports, [(0, 128, 128)])
+        self.nsg.end()
+
+    def test_pending_overflow(self):
+        """The pending reports should be limited by merging into the
+        latest one"""
+        # without begin there is no writer, so the queued reports stay
+        for _ in range(MAX_PENDING_REPORTS):
+            self.nsg.press(NSButton.A)
+            self.nsg.release(NSButton.A)
+        self.nsg.press(NSButton.B)
+        pending = self.nsg._pending_reports
+        self.assertEqual(len(pending), MAX_PENDING_REPORTS)
+        self.assertEqual(unpack(pending[-1]), (1 << NSButton.B, 128, 128))
+
+    def test_end(self):
+        """end should send the latest report and close the port"""
+        self.nsg.begin(self.port)
+        self.nsg.press(NSButton.A)
+        self.nsg.leftAxes(0, 255)
+        self.nsg.release(NSButton.A)
+        self.nsg.end()
+        self.assertEqual(self.port.reports[-1], (0, 0, 255))
+        self.assertTrue(self.port.closed)
+
+
+class NSJoystickTest(unittest.TestCase):
+    def test_axes(self):
+        """NSJoystick should set both axes with a single call"""
+        axes = Mock()
+        joystick = NSJoystick(axes)
+
+        async def main():
+            await joystick.handle_direction(Directions.TOP_RIGHT, 0)
+            await joystick.reset(0)
+
+        asyncio.run(main())
+        self.assertEqual(
+            axes.call_args_list, [((255, 0),), ((128, 128),)],
+        )
+
+    def test_separate_axes(self):
+        """NSJoystick should still work with separate axis functions"""
+        calls = []
+        joystick = NSJoystick(
+            x_axis=lambda x: calls.append(("x", x)),
+            y_axis=lambda y: calls.append(("y", y)),
+        )
+
+        async def main():
+            await joystick.handle_direction(Directions.LEFT, 0)
+            await joystick.reset(0)
+
+        asyncio.run(main())
+        self.assertEqual(calls, [("x", 0), ("y", 128), ("x", 128), ("y", 128)])
+
+        with self.assertRaises(AssertionError):
+            NSJoystick(x_axis=lambda x: None)
+
+
+class NSInputResetTest(unittest.TestCase):
+    def test_skip_reset_at_rest(self):
+        """The resets of the gamepad inputs at rest should not write to
+        the gamepad"""
+        nsg = Mock()
+        router = MultiSeatMessageRouter(lambda msg: None)
+        router.register_input("A", NSSwitch(nsg, NSButton.A))
+        router.register_input("left", NSJoystick(nsg.leftAxes))
+
+        async def main():
+            await router.handle_message(new_peer("peer", 0))
+            router.set_enabled_seat(0, True)
+            await router.handle_message(controls("A", {"state": "down"}))
+            await router.handle_message(controls("A", {"state": "up"}))
+            await router.handle_message(controls("left", {"x": 1, "y": 0}))
+            await router.router.wait_for_inputs()
+            await router.handle_message(controls("left", {"x": 0, "y": 0}))
+            await router.router.wait_for_inputs()
+            await router.router.call_inputs([0], "reset")
+            self.assertEqual(nsg.release.call_count, 1)
+            self.assertEqual(nsg.leftAxes.call_count, 2)
+
+            await router.handle_message(controls("A", {"state": "down"}))
+            await router.router.wait_for_inputs()
+            await router.router.call_inputs([0], "reset")
+            self.assertEqual(nsg.release.call_count, 2)
+            self.assertEqual(nsg.leftAxes.call_count, 2)
+
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unittest.main()
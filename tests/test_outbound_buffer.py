@@ -0,0 +1,119 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from surrortg.network.outbound_buffer import OutboundBuffer
+
+
+class OutboundBufferTest(unittest.TestCase):
+    def test_replay(self):
+        """Messages should be replayed in order once sending succeeds,
+        and kept while it fails, equal messages should not be merged"""
+        connected = False
+        sent = []
+
+        async def send(event, dst, seat, src=None, payload={}):
+            if not connected:
+                return False
+            sent.append((event, payload))
+
+        async def main():
+            nonlocal connected
+            buffer = OutboundBuffer(replay_rate=1000, max_replay_delay=0)
+            replay = asyncio.create_task(buffer.run(send))
+            buffer.store("scoreUpdate", "gameEngine", 0, payload={"s": 1})
+            buffer.store("scoreUpdate", "gameEngine", 0, payload={"s": 1})
+            buffer.store("lapDone", "gameEngine", 0)
+            buffer.store("scoreUpdate", "gameEngine", 0, payload={"s": 2})
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(buffer), 4)
+
+            connected = True
+            buffer.resume()
+            await asyncio.sleep(0.05)
+            replay.cancel()
+            self.assertEqual(len(buffer), 0)
+
+        asyncio.run(main())
+        self.assertEqual(
+            sent,
+            [
+                ("scoreUpdate", {"s": 1}),
+                ("scoreUpdate", {"s": 1}),
+                ("lapDone", {}),
+                ("scoreUpdate", {"s": 2}),
+            ],
+        )
+
+    def test_persistence(self):
+        """Buffered messages should survive a restart, and the file should
+        be compacted after replaying"""
+        sent = []
+
+        async def send(event, dst, seat, src=None, payload={}):
+            sent.append(event)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buffer.jsonl")
+            buffer = OutboundBuffer(path)
+            buffer.store("lapDone", "gameEngine", 1)
+            buffer.store("lapDone", "gameEngine", 1)
+            buffer.store("playingEnded", "gameEngine", 0)
+            with open(path, "a") as f:
+                # a line of an older file
+                f.write(
+                    '{"event": "lapDone", "dst": "gameEngine", "seat": 2, '
+                    '"src": null, "payload": {}}\n'
+                )
+                f.write('{"event": "partial')
+
+            buffer = OutboundBuffer(path, replay_rate=1000, max_replay_delay=0)
+            self.assertEqual(len(buffer), 4)
+            buffer.store("lapDone", "gameEngine", 3)
+            self.assertEqual(len({e["seq"] for e in buffer._entries}), 5)
+            self.assertEqual(len(OutboundBuffer(path)), 5)
+
+            async def main():
+                replay = asyncio.create_task(buffer.run(send))
+                await asyncio.sleep(0.05)
+                replay.cancel()
+
+            asyncio.run(main())
+            self.assertEqual(
+                sent,
+                ["lapDone", "lapDone", "playingEnded", "lapDone", "lapDone"],
+            )
+            self.assertEqual(len(OutboundBuffer(path)), 0)
+
+    def test_restart_during_replay(self):
+        """Messages replayed before a restart should not be replayed
+        again after it"""
+        sent = []
+
+        async def send(event, dst, seat, src=None, payload={}):
+            if len(sent) == 2:
+                # the program is stopped while sending the third one
+                await asyncio.Event().wait()
+            sent.append(payload["lap"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buffer.jsonl")
+            buffer = OutboundBuffer(path, replay_rate=1000, max_replay_delay=0)
+            for lap in range(4):
+                buffer.store("lapDone", "gameEngine", 0, payload={"lap": lap})
+
+            async def main(buffer):
+                replay = asyncio.create_task(buffer.run(send))
+                await asyncio.sleep(0.05)
+                replay.cancel()
+
+            asyncio.run(main(buffer))
+            self.assertEqual(sent, [0, 1])
+
+            buffer = OutboundBuffer(path, replay_rate=1000, max_replay_delay=0)
+            self.assertEqual(
+                [entry["payload"]["lap"] for entry in buffer._entries], [2, 3]
+            )
+            sent.append("restart")
+            asyncio.run(main(buffer))
+            self.assertEqual(sent, [0, 1, "restart", 2, 3])
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+from threading import Thread
+from surrortg.network.outbound_queue import OutboundQueue
+
+
+class OutboundQueueTest(unittest.TestCase):
+    def _run_queue(self, producer):
+        sent = []
+
+        async def send(event, dst, seat, src=None, payload={}, callback=None):
+            sent.append((event, seat, payload))
+
+        async def main():
+            queue = OutboundQueue(send)
+            writer = asyncio.create_task(queue.run())
+            await asyncio.sleep(0)
+            await producer(queue)
+            await asyncio.sleep(0.01)
+            writer.cancel()
+            return queue
+
+        return asyncio.run(main()), sent
+
+    def test_coalescing(self):
+        """Only the latest pending progress per seat should be sent"""
+
+        async def producer(queue):
+            for i in range(5):
+                queue.put("progress", "gameEngine", 0, payload={"val": i})
+                queue.put("progress", "gameEngine", 1, payload={"val": i})
+            queue.put("lapDone", "gameEngine", 0)
+            queue.put("lapDone", "gameEngine", 0)
+
+        queue, sent = self._run_queue(producer)
+        self.assertEqual(
+            sent,
+            [
+                ("progress", 0, {"val": 4}),
+                ("progress", 1, {"val": 4}),
+                ("lapDone", 0, {}),
+                ("lapDone", 0, {}),
+            ],
+        )
+        self.assertEqual(queue.coalesced, 8)
+
+    def test_final_score_not_coalesced(self):
+        """Final score updates should never be replaced"""
+
+        async def producer(queue):
+            queue.put(
+                "scoreUpdate",
+                "gameEngine",
+                0,
+                payload={"scores": {0: 1}, "endGame": False},
+            )
+            queue.put(
+                "scoreUpdate",
+                "gameEngine",
+                0,
+                payload={"scores": {0: 2}, "endGame": True},
+            )
+            queue.put(
+                "scoreUpdate",
+                "gameEngine",
+                0,
+                payload={"scores": {0: 3}, "endGame": False},
+            )
+
+        _, sent = self._run_queue(producer)
+        self.assertEqual(
+            [payload["scores"][0] for _, _, payload in sent], [1, 2, 3]
+        )
+
+    def test_threadsafe_put(self):
+        """Messages put from other threads should be sent"""
+
+        async def producer(queue):
+            thread = Thread(
+                target=queue.put, args=("lapDone", "gameEngine", 3)
+            )
+            thread.start()
+            thread.join()
+
+        _, sent = self._run_queue(producer)
+        self.assertEqual(sent, [("lapDone", 3, {})])
+
+    def test_not_running(self):
+        """Putting before the writer is running should fail"""
+
+        async def send(*args, **kwargs):
+            pass
+
+        self.assertFalse(OutboundQueue(send).put("lapDone", "gameEngine", 0))
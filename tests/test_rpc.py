@@ -0,0 +1,71 @@
+import unittest
+import asyncio
+from surrortg.network.rpc import (
+    RpcClient,
+    RpcError,
+    RpcTimeoutError,
+    LatencyHistogram,
+)
+
+
+class RpcClientTest(unittest.TestCase):
+    def test_request(self):
+        """Responses should be matched by correlation ids, and timeouts and
+        disconnects should fail the requests"""
+
+        async def main():
+            rpc = RpcClient("test", timeout=0.05, max_in_flight=2)
+            sent = []
+
+            async def send(request_id):
+                sent.append(request_id)
+
+            first = asyncio.create_task(rpc.request(send))
+            second = asyncio.create_task(rpc.request(send))
+            third = asyncio.create_task(rpc.request(send, timeout=1))
+            await asyncio.sleep(0.01)
+            # the third waits for a free slot
+            self.assertEqual(rpc.in_flight, 2)
+            rpc.resolve(sent[1], "second")
+            rpc.resolve(sent[0], "first", "extra")
+            self.assertEqual(await first, ("first", "extra"))
+            self.assertEqual(await second, "second")
+            await asyncio.sleep(0.01)
+            self.assertFalse(rpc.resolve(1000))
+            rpc.fail_all("disconnected")
+            with self.assertRaises(RpcError):
+                await third
+
+            with self.assertRaises(RpcTimeoutError):
+                await rpc.request(send)
+
+            async def send_failed(request_id):
+                return False
+
+            with self.assertRaises(RpcError):
+                await rpc.request(send_failed)
+            self.assertEqual(rpc.in_flight, 0)
+            return rpc.stats()
+
+        stats = asyncio.run(main())
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["failures"], 2)
+        self.assertEqual(stats["latency"]["count"], 2)
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles(self):
+        """Percentiles should be within the bucket accuracy"""
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        for i in range(1, 101):
+            histogram.record(i / 1000)
+        for percent in (50, 95, 99):
+            value = histogram.percentile(percent)
+            self.assertGreaterEqual(value, percent / 1000)
+            self.assertLessEqual(value, percent / 1000 * 1.2)
+        self.assertEqual(histogram.percentile(100), 0.1)
+        histogram.record(0)
+        histogram.record(10000)
+        self.assertEqual(histogram.summary()["max"], 10000)
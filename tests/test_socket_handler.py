@@ -0,0 +1,265 @@
+import unittest
+import asyncio
+import json
+import os
+import socket
+import tempfile
+from surrortg.network.socket_handler import (
+    Message,
+    SocketHandler,
+    SocketioNamespace,
+    LocalSocketHandler,
+    SOCKETIO_CONNECTION_FIRST_RETRY_MAX_SLEEP,
+    SOCKETIO_CONNECTION_MIN_SLEEP,
+    SOCKETIO_CONNECTION_MAX_SLEEP,
+)
+from surrortg.network.control_frame import encode_control_frame
+from surrortg.network.rpc import RpcTimeoutError
+
+
+def get_namespace():
+    return SocketioNamespace(
+        "/signaling",
+        "http://localhost:9123",
+        {},
+        message_handler=None,
+        on_connect_handler=lambda: None,
+        socketio_logging_level=None,
+        engineio_logging_level=None,
+    )
+
+
+class SocketioNamespaceTest(unittest.TestCase):
+    def test_connection_events(self):
+        """Connection state changes should wake up the waiters and the
+        outage durations should be recorded"""
+
+        async def main():
+            namespace = get_namespace()
+            namespace._connected_event = asyncio.Event()
+            namespace._disconnected_event = asyncio.Event()
+
+            waiter = asyncio.create_task(namespace._wait_for_connected())
+            await asyncio.sleep(0)
+            namespace.on_connect()
+            await asyncio.wait_for(waiter, 1)
+            self.assertTrue(namespace.connected)
+            self.assertFalse(namespace._disconnected_event.is_set())
+
+            namespace.on_disconnect()
+            self.assertFalse(namespace.connected)
+            self.assertTrue(namespace._disconnected_event.is_set())
+
+            namespace.on_connect()
+            return namespace.stats
+
+        stats = asyncio.run(main())
+        self.assertEqual(stats.connects, 2)
+        self.assertEqual(stats.reconnects, 1)
+        self.assertEqual(stats.disconnects, 1)
+        self.assertIsNotNone(stats.last_outage_duration)
+        self.assertEqual(
+            stats.total_outage_duration, stats.last_outage_duration
+        )
+
+    def test_connect_error_wakes_waiter(self):
+        """A connection error should fail the wait immediately"""
+
+        async def main():
+            namespace = get_namespace()
+            namespace._connected_event = asyncio.Event()
+            namespace._disconnected_event = asyncio.Event()
+
+            waiter = asyncio.create_task(namespace._wait_for_connected())
+            await asyncio.sleep(0)
+            namespace._set_disconnected()
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(waiter, 1)
+
+        asyncio.run(main())
+
+    def test_client_reused(self):
+        """The socketio client should be created only once"""
+        namespace = get_namespace()
+        client = namespace._get_client()
+        self.assertIs(namespace._get_client(), client)
+        self.assertIs(namespace.client, client)
+
+    def test_retry_sleep(self):
+        """The first retry should be fast, and the later sleeps should be
+        randomized and bounded"""
+        sleep = SocketioNamespace._get_retry_sleep(None)
+        self.assertLessEqual(sleep, SOCKETIO_CONNECTION_FIRST_RETRY_MAX_SLEEP)
+        sleeps = set()
+        for _ in range(100):
+            sleep = SocketioNamespace._get_retry_sleep(sleep)
+            self.assertGreaterEqual(sleep, SOCKETIO_CONNECTION_MIN_SLEEP)
+            self.assertLessEqual(sleep, SOCKETIO_CONNECTION_MAX_SLEEP)
+            sleeps.add(sleep)
+        self.assertGreater(len(sleeps), 1)
+
+
+class SocketHandlerTest(unittest.TestCase):
+    def test_dispatch(self):
+        """Messages should be dispatched by (src, event) in registration
+        order, and response handlers should take over the message"""
+        called = []
+
+        def recorder(name):
+            async def cb(msg):
+                called.append((name, msg.src, msg.event))
+                return name
+
+            return cb
+
+        async def failing(msg):
+            raise RuntimeError()
+
+        async def main():
+            handler = SocketHandler("http://localhost:9123")
+            handler.register_on_message_cb(
+                recorder("ge"), src="gameEngine", create_task=True
+            )
+            handler.register_on_message_cb(recorder("any"))
+            handler.register_on_message_cb(failing, event="gameControls")
+            handler.register_on_message_cb(
+                recorder("controls"), event="gameControls"
+            )
+            handler.register_on_message_response_cb(
+                recorder("config"), src="gameEngine", event="config"
+            )
+            for _ in range(2):
+                await handler._handle_message(
+                    Message("gameControls", "robot", src="peer")
+                )
+            await handler._handle_message(
+                Message("newPeer", "robot", src="gameEngine")
+            )
+            response = await handler._handle_message(
+                Message("config", "robot", src="gameEngine")
+            )
+            await asyncio.sleep(0)
+            return response
+
+        response = asyncio.run(main())
+        self.assertEqual(response, "config")
+        self.assertEqual(
+            called,
+            [
+                ("any", "peer", "gameControls"),
+                ("controls", "peer", "gameControls"),
+                ("any", "peer", "gameControls"),
+                ("controls", "peer", "gameControls"),
+                ("any", "gameEngine", "newPeer"),
+                ("config", "gameEngine", "config"),
+                ("ge", "gameEngine", "newPeer"),
+            ],
+        )
+
+    def test_request_failure_buffered(self):
+        """Critical messages should be buffered when the request fails
+        while connected, other messages should not"""
+
+        async def main():
+            handler = SocketHandler("http://localhost:9123")
+            handler.socketio_namespace.connected = True
+
+            async def request(msg, timeout):
+                raise RpcTimeoutError("timed out")
+
+            handler.socketio_namespace.request = request
+            for event in ("lapDone", "progress"):
+                with self.assertRaises(RpcTimeoutError):
+                    await handler.request_socketio(event, "gameEngine", 0)
+            return handler.outbound_buffer
+
+        buffer = asyncio.run(main())
+        self.assertEqual([e["event"] for e in buffer._entries], ["lapDone"])
+
+
+class LocalSocketHandlerTest(unittest.TestCase):
+    def test_receive_batch(self):
+        """All ready packets should be dispatched on a single receive, and
+        invalid packets should be skipped"""
+
+        async def main(socket_name):
+            received = []
+
+            async def handler(msg):
+                received.append((msg.event, msg.seat))
+
+            async def frame_handler(input_index, seat, a, b, received_ns):
+                received.append((input_index, seat, a, b))
+
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            server.bind(socket_name)
+            server.listen(1)
+            handler_ = LocalSocketHandler(socket_name, handler, frame_handler)
+            handler_.event_loop = asyncio.get_running_loop()
+            await handler_.connect()
+            peer, _ = server.accept()
+
+            for packet in (
+                {"event": "gameControls", "dst": "robot", "seat": 1},
+                {"event": "gameControls", "dst": 1},
+                {"event": "codecSelect", "dst": "robot", "payload": {}},
+                {"event": "ping", "dst": "robot"},
+            ):
+                peer.send(json.dumps(packet).encode())
+            peer.send(b"not json")
+            peer.send(encode_control_frame(2, 1, -32767, 100))
+            await handler_.do_receive()
+            self.assertTrue(handler_.connected)
+
+            peer.close()
+            await handler_.do_receive()
+            self.assertFalse(handler_.connected)
+
+            handler_.shutdown()
+            server.close()
+            return received
+
+        with tempfile.TemporaryDirectory() as directory:
+            received = asyncio.run(main(os.path.join(directory, "sock")))
+        self.assertEqual(
+            received, [("gameControls", 1), ("ping", 0), (2, 1, -32767, 100)],
+        )
+
+    def test_request(self):
+        """The response with the request id should complete the request"""
+
+        async def main(socket_name):
+            async def handler(msg):
+                pass
+
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            server.bind(socket_name)
+            server.listen(1)
+            handler_ = LocalSocketHandler(socket_name, handler, handler)
+            handler_.event_loop = asyncio.get_running_loop()
+            await handler_.connect()
+            peer, _ = server.accept()
+            peer.setblocking(False)
+
+            request = asyncio.create_task(
+                handler_.request({"event": "ping", "dst": "datachannel"})
+            )
+            await asyncio.sleep(0.01)
+            sent = json.loads(peer.recv(1024))
+            self.assertTrue(sent["response"])
+            peer.send(
+                json.dumps(
+                    {"id": sent["id"], "response": True, "payload": "pong"}
+                ).encode()
+            )
+            await handler_.do_receive()
+            response = await asyncio.wait_for(request, 1)
+
+            handler_.shutdown()
+            peer.close()
+            server.close()
+            return response
+
+        with tempfile.TemporaryDirectory() as directory:
+            response = asyncio.run(main(os.path.join(directory, "sock")))
+        self.assertEqual(response, "pong")
@@ -0,0 +1,50 @@
+import unittest
+from surrortg.inputs.input_filters import SpamFilter
+
+
+class SpamFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+
+    def clock(self):
+        return self.now
+
+    def test_limit(self):
+        """Reaching max_inputs inside the window should be spam, and the
+        inputs should pass again when the window has refilled"""
+        spam_filter = SpamFilter(6, 1, self.clock)
+        results = [spam_filter.too_much_spam() for _ in range(6)]
+        self.assertEqual(results, [False] * 5 + [True])
+
+        self.now += 0.2
+        self.assertFalse(spam_filter.too_much_spam())
+        self.assertTrue(spam_filter.too_much_spam())
+
+        self.now += 1
+        results = [spam_filter.too_much_spam() for _ in range(6)]
+        self.assertEqual(results, [False] * 5 + [True])
+        self.assertEqual(spam_filter.passed, 11)
+        self.assertEqual(spam_filter.rejected, 3)
+
+    def test_seats(self):
+        """A spamming seat should not throttle the other seats"""
+        spam_filter = SpamFilter(3, 1, self.clock)
+        for _ in range(10):
+            spam_filter.too_much_spam(seat=0)
+        self.assertFalse(spam_filter.too_much_spam(seat=1))
+        self.assertEqual(spam_filter.rejected_by_seat, {0: 8})
+
+        spam_filter.reset(0)
+        self.assertFalse(spam_filter.too_much_spam(seat=0))
+
+    def test_single_input(self):
+        """max_inputs of 1 should reject everything, as before"""
+        spam_filter = SpamFilter(1, 1, self.clock)
+        self.now += 10
+        self.assertTrue(spam_filter.too_much_spam())
+
+    def test_empty_window(self):
+        """per_seconds of 0 should never detect spam, as before"""
+        spam_filter = SpamFilter(2, 0, self.clock)
+        results = [spam_filter.too_much_spam() for _ in range(5)]
+        self.assertEqual(results, [False] * 5)
@@ -0,0 +1,62 @@
+import unittest
+import asyncio
+from surrortg.inputs import Timeline
+from helpers import RecordingSwitch
+
+
+class TimelineTest(unittest.TestCase):
+    def test_steps_run_at_offsets(self):
+        """Steps should run in offset order, at the offsets from the
+        start, without the delays of the earlier steps adding up"""
+        switch = RecordingSwitch()
+        timeline = Timeline(
+            [(0.02 * i, switch, {"state": "down"}) for i in range(1, 11)]
+            + [(0, switch, {"state": "up"})],
+            seat=2,
+        )
+        self.assertEqual(timeline.duration, 0.2)
+
+        async def main():
+            start = asyncio.get_running_loop().time()
+            await timeline.run()
+            return start
+
+        start = asyncio.run(main())
+        self.assertEqual(switch.calls, [("off", 2)] + [("on", 2)] * 10)
+        self.assertEqual(len(timeline.timing_errors), 11)
+        for error in timeline.timing_errors:
+            self.assertGreaterEqual(error, 0)
+            self.assertLess(error, 0.02)
+        self.assertAlmostEqual(switch.times[-1] - start, 0.2, delta=0.02)
+
+    def test_cancel_resets_used_inputs(self):
+        """Cancelling should reset the inputs which got commands, even if
+        resetting one of them fails"""
+        pressed = RecordingSwitch()
+        failing = RecordingSwitch(fail_reset=True)
+        unused = RecordingSwitch()
+        timeline = Timeline(
+            [
+                (0, failing, {"state": "down"}),
+                (0, pressed, {"state": "down"}),
+                (10, pressed, {"state": "up"}),
+                (10, unused, {"state": "down"}),
+            ]
+        )
+
+        async def main():
+            task = asyncio.create_task(timeline.run())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with self.assertLogs(level="WARNING"):
+            asyncio.run(main())
+        self.assertEqual(pressed.calls, [("on", 0), ("off", 0)])
+        self.assertEqual(unused.calls, [])
+        self.assertEqual(len(timeline.timing_errors), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
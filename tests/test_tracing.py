@@ -0,0 +1,71 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import time
+from surrortg.network import MultiSeatMessageRouter
+from surrortg.network.tracing import TRACER, serve_stats, read_stats
+from helpers import RecordingSwitch, controls, new_peer
+
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        TRACER.reset()
+        TRACER.enabled = True
+
+    def tearDown(self):
+        TRACER.enabled = False
+        TRACER.reset()
+
+    def test_input_latencies(self):
+        """Routed commands should be recorded per input and seat, and the
+        stats should be readable from the stats socket"""
+        router = MultiSeatMessageRouter(lambda msg: None)
+        router.register_input("button", RecordingSwitch())
+
+        async def main(socket_name):
+            await router.handle_message(new_peer("peer", 2))
+            router.set_enabled_all(True)
+            msg = controls("button", {"state": "down"})
+            msg.received_ns = time.perf_counter_ns()
+            await router.handle_message(msg)
+            await router.handle_control_frame(0, 2, 0, 0)
+            await router.router.wait_for_inputs()
+
+            server = asyncio.create_task(
+                serve_stats(socket_name, TRACER.summary)
+            )
+            for _ in range(100):
+                if os.path.exists(socket_name):
+                    break
+                await asyncio.sleep(0.01)
+            stats = await asyncio.get_running_loop().run_in_executor(
+                None, read_stats, socket_name
+            )
+            server.cancel()
+            return stats
+
+        with tempfile.TemporaryDirectory() as directory:
+            stats = asyncio.run(main(os.path.join(directory, "stats")))
+        button = stats["inputs"]["button"]
+        self.assertEqual(button["total"]["count"], 2)
+        # the control frame did not have a receipt time
+        self.assertEqual(button["dispatch"]["count"], 1)
+        self.assertEqual(stats["seats"]["2"]["count"], 2)
+        self.assertGreater(button["total"]["max"], 0)
+
+    def test_stats_socket_failure(self):
+        """A stats socket which cannot be created should not stop the
+        server task"""
+
+        async def main(socket_name):
+            server = asyncio.create_task(serve_stats(socket_name, dict))
+            with self.assertLogs(level="WARNING"):
+                await asyncio.sleep(0.05)
+            self.assertFalse(server.done())
+            server.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await server
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(main(os.path.join(directory, "missing", "stats")))
@@ -0,0 +1,67 @@
+import unittest
+import asyncio
+from surrortg.devices.udp import UdpActuator, UdpKeepalive
+
+
+class RecordingActuator(UdpActuator):
+    def __init__(self, cmd):
+        super().__init__(cmd, repeat_commands=True)
+        self.sent = []
+
+    def _send_command(self, val, seat):
+        self.sent.append((val, seat))
+
+
+class UdpKeepaliveTest(unittest.TestCase):
+    def test_repeats(self):
+        """Changes should be sent immediately, and the latest value of
+        each actuator and seat repeated by a single task, until the
+        actuator is reset or the keepalive stopped"""
+        throttle = RecordingActuator(0x01)
+        steering = RecordingActuator(0x02)
+
+        async def main():
+            keepalive = UdpKeepalive(interval=0.01, repeats=3)
+            throttle.set_keepalive(keepalive)
+            steering.set_keepalive(keepalive)
+            await throttle.drive_actuator(0.5, 0)
+            task = keepalive._task
+            await throttle.drive_actuator(1, 0)
+            self.assertEqual(throttle.sent, [(0.5, 0), (1, 0)])
+            await steering.drive_actuator(-1, 1)
+            self.assertIs(keepalive._task, task)
+            await asyncio.sleep(0.1)
+            self.assertTrue(task.done())
+            self.assertEqual(keepalive.repeated, 6)
+
+            await throttle.drive_actuator(0.5, 1)
+            await steering.drive_actuator(1, 1)
+            throttle._reset(1)
+            await asyncio.sleep(0.1)
+
+            keepalive.stop()
+            await throttle.drive_actuator(0, 0)
+            await asyncio.sleep(0.03)
+
+        asyncio.run(main())
+        self.assertEqual(
+            throttle.sent, [(0.5, 0)] + [(1, 0)] * 4 + [(0.5, 1), (0, 0)],
+        )
+        self.assertEqual(steering.sent, [(-1, 1)] * 4 + [(1, 1)] * 4)
+
+    def test_without_repeats(self):
+        """Commands should be sent once when repeating is disabled"""
+        actuator = RecordingActuator(0x01)
+        actuator.should_repeat = False
+
+        async def main():
+            await actuator.drive_actuator(0.5, 0)
+            await asyncio.sleep(0.01)
+
+        asyncio.run(main())
+        self.assertEqual(actuator.sent, [(0.5, 0)])
+        self.assertIsNone(actuator.keepalive)
+
+
+if __name__ == "__main__":
+    unittest.main()
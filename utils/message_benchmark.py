@@ -0,0 +1,115 @@
+"""Microbenchmark for surrortg.network.Message
+
+Compares the current Message against the previous dataclass based
+implementation by parsing an inbound gameControls message and
+serializing an outbound progress update.
+
+Usage: python -m utils.message_benchmark [-n NUMBER]
+"""
+import argparse
+import timeit
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+from surrortg.network import Message, MessageValidationError
+
+INBOUND = {
+    "event": "gameControls",
+    "dst": "robot",
+    "src": "peer-1",
+    "seat": 0,
+    "payload": {"type": "joystick", "id": "joystick", "command": {"x": 1}},
+    "isAdmin": False,
+}
+OUTBOUND = ("progress", "gameEngine", 0, None, {"val": 0.5})
+
+
+@dataclass
+class DataclassMessage:
+    """The previous Message implementation, kept here for comparison"""
+
+    event: str
+    dst: str
+    src: Optional[str] = None
+    seat: Optional[int] = 0
+    payload: Optional[Dict[Any, Any]] = field(default_factory=dict)
+    isAdmin: Optional[bool] = False
+
+    def __post_init__(self):
+        self._validate("event", self.event, str)
+        self._validate("dst", self.dst, str)
+        self._validate("src", self.src, type(None), str)
+        self._validate("seat", self.seat, int)
+        self._validate("payload", self.payload, dict, list)
+        self._validate("isAdmin", self.isAdmin, bool)
+
+    def _validate(self, name, value, *types):
+        if not isinstance(value, types):
+            raise MessageValidationError(name)
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        return cls(
+            dictionary.get("event"),
+            dictionary.get("dst"),
+            src=dictionary.get("src"),
+            seat=dictionary.get("seat", 0),
+            payload=dictionary.get("payload", {}),
+            isAdmin=dictionary.get("isAdmin", False),
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def messages_per_second(func, number):
+    return number / min(timeit.repeat(func, number=number, repeat=5))
+
+
+def bytes_per_message(func, number):
+    tracemalloc.start()
+    results = [func() for _ in range(number)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return size / number
+
+
+def benchmark(cls, number):
+    event, dst, seat, src, payload = OUTBOUND
+
+    def inbound():
+        return cls.from_dict(INBOUND)
+
+    def outbound():
+        return cls(event, dst, src=src, seat=seat, payload=payload).to_dict()
+
+    return {
+        "inbound": (
+            messages_per_second(inbound, number),
+            bytes_per_message(inbound, number),
+        ),
+        "outbound": (
+            messages_per_second(outbound, number),
+            bytes_per_message(outbound, number),
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    results = {
+        "dataclass": benchmark(DataclassMessage, args.number),
+        "Message": benchmark(Message, args.number),
+    }
+    print(f"{'':10} {'':9} {'messages/s':>12} {'bytes/message':>14}")
+    for name, result in results.items():
+        for direction, (rate, size) in result.items():
+            print(f"{name:10} {direction:9} {rate:12.0f} {size:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark for surrortg.network.MultiSeatMessageRouter
+
+Routes gameControls messages from the peers of 1, 8 and 64 seats to a
+joystick and a switch, which do nothing, and reports the routed messages
+per second. The time includes the input mailbox workers.
+
+Usage: python -m utils.router_benchmark [-n NUMBER]
+"""
+import argparse
+import asyncio
+import time
+from surrortg.inputs import Joystick, Switch
+from surrortg.network import Message, MultiSeatMessageRouter
+
+SEAT_COUNTS = (1, 8, 64)
+
+
+class NullJoystick(Joystick):
+    async def handle_coordinates(self, x, y, seat):
+        pass
+
+    async def reset(self, seat):
+        pass
+
+
+class NullSwitch(Switch):
+    async def on(self, seat):
+        pass
+
+    async def off(self, seat):
+        pass
+
+
+def get_messages(seats):
+    messages = []
+    for seat in range(seats):
+        peer_id = f"peer-{seat}"
+        messages.append(
+            Message(
+                "gameControls",
+                "robot",
+                src=peer_id,
+                payload={"id": "joystick", "command": {"x": 0.5, "y": 0}},
+            )
+        )
+        messages.append(
+            Message(
+                "gameControls",
+                "robot",
+                src=peer_id,
+                payload={"id": "button", "command": {"state": "down"}},
+            )
+        )
+    return messages
+
+
+async def benchmark(seats, number):
+    router = MultiSeatMessageRouter(lambda msg: None)
+    router.register_input("joystick", NullJoystick())
+    router.register_input("button", NullSwitch())
+    for seat in range(seats):
+        await router.handle_message(
+            Message(
+                "newPeer",
+                "robot",
+                src="gameEngine",
+                payload={
+                    "id": f"peer-{seat}",
+                    "seat": seat,
+                    "clientType": "player",
+                },
+            )
+        )
+    router.set_enabled_all(True)
+    messages = get_messages(seats)
+
+    routed = 0
+    start = time.perf_counter()
+    while routed < number:
+        for msg in messages:
+            await router.handle_message(msg)
+        routed += len(messages)
+        # let the input workers drain, like the receive loop does
+        await router.router.wait_for_inputs()
+    return routed / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'seats':>5} {'messages/s':>12}")
+    for seats in SEAT_COUNTS:
+        rate = asyncio.run(benchmark(seats, args.number))
+        print(f"{seats:5} {rate:12.0f}")
+
+
+if __name__ == "__main__":
+    main()